@@ -1,109 +1,113 @@
 import sqlite3
 from sqlite3 import Error
-import bcrypt
 import re
-from flask import Flask, request, jsonify, session
+from flask import Blueprint, Flask, current_app, request, jsonify, session
 from flask_cors import CORS
 import base64
-import io
-import PyPDF2
-from PyPDF2 import PdfReader
-import requests
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import uuid
-import time
 import json
+from datetime import datetime, timezone
+from database import Database
+from job_refresh import JobRefresher
+from external_jobs import ConcurrentJobFetcher, job_dedupe_key
+from near_duplicates import cluster, index_jobs, index_unsigned_jobs, signatures
+from transcripts import process_transcript
+from metrics import FETCHED_JOBS, RESPONSE_CACHE, RESPONSE_CACHE_BYTES, configure_logging, get_logger, init_app
+from timing import observe_stage, span
+from response_cache import ResponseCache, response_etag
+from auth import Overloaded, PasswordHasher, ServerSessionInterface, SessionStore
+from schema import ensure_schema
 
-app = Flask(__name__)
-app.secret_key = 'avellin'
-CORS(app, supports_credentials=True)
-
-# Simpler session configuration
-app.config['SESSION_TYPE'] = 'filesystem'
-
-class Database:
-    def __init__(self, db_file):
-        self.db_file = db_file
-        self.conn = None
-
-    def __enter__(self):
-        self.conn = sqlite3.connect(self.db_file)
-        self.conn.row_factory = sqlite3.Row
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.conn:
-            self.conn.close()
-
-    def execute(self, query, params=()):
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        self.conn.commit()
-        return cursor
-
-    def fetchone(self, query, params=()):
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchone()
-
-    def fetchall(self, query, params=()):
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchall()
-
-# Initialize database and tables at startup
-def init_db():
-    print("Initializing database...")
-    try:
-        with Database('KoraQuest.db') as db:
-            # Create Talent table
-            db.execute('''
-            CREATE TABLE IF NOT EXISTS Talent (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                password TEXT NOT NULL,
-                email TEXT NOT NULL UNIQUE,
-                phone TEXT NOT NULL,
-                resume TEXT NOT NULL
-            )
-            ''')
-            
-            # Create Organization table
-            db.execute('''
-            CREATE TABLE IF NOT EXISTS Organization (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                org_names TEXT NOT NULL UNIQUE,
-                org_password TEXT NOT NULL,
-                org_email TEXT NOT NULL UNIQUE
-            )
-            ''')
-            
-            # Create Jobs table with corrected column names
-            db.execute('''
-            DROP TABLE IF EXISTS Jobs;
-            ''')
-            
-            db.execute('''
-            CREATE TABLE IF NOT EXISTS Jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                org_email TEXT,
-                job_title TEXT NOT NULL,
-                job_description TEXT,
-                job_location TEXT,
-                job_type TEXT,
-                is_remote INTEGER,
-                org_name TEXT,  -- Changed from org_names to org_name
-                source TEXT DEFAULT 'created',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                external_job_id TEXT UNIQUE,
-                job_url TEXT
-            )
-            ''')
-        print("Database tables created successfully!")
-    except Exception as e:
-        print(f"Error initializing database: {e}")
+log = get_logger('app')
+
+# The routes; create_app() builds the application around them
+bp = Blueprint('koraquest', __name__)
+
+# Sessions live server-side (memory LRU over the Sessions table); the cookie holds only the id
+session_store = SessionStore('KoraQuest.db')
+
+# Password hashing runs on its own bounded pool; excess logins get a 503 instead of queueing
+password_hasher = PasswordHasher()
+
+def overloaded_response():
+    response = jsonify({'error': 'Too many logins in progress, try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def catalog_state(db):
+    """(generation, modified_at) of the Jobs catalog."""
+    row = db.fetchone('SELECT generation, modified_at FROM CatalogState WHERE id = 1')
+    return row[0], datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+def bump_catalog(db):
+    """Mark the catalog changed; call in the same transaction as the write to Jobs."""
+    db.execute('UPDATE CatalogState SET generation = generation + 1, modified_at = CURRENT_TIMESTAMP WHERE id = 1')
+
+# Dashboards poll the job listings: repeats are served from memory, revalidations with 304s
+response_cache = ResponseCache(max_bytes=int(os.environ.get('RESPONSE_CACHE_BYTES', 64 * 1024 * 1024)))
+
+def cached_json(endpoint, params, build):
+    """Answer a job listing from the response cache, or with a 304 when the client is current.
+
+    The ETag depends only on the catalog generation and the normalized
+    params, so a matching If-None-Match (or If-Modified-Since, when no ETag
+    is sent) is answered without running the query. On a miss build() runs
+    and its 200 response is cached (a streamed one once it has been sent);
+    error responses are returned as is.
+    """
+    key = (endpoint, params)
+    with Database('KoraQuest.db') as db:
+        generation, modified_at = catalog_state(db)
+    etag = response_etag(generation, key)
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = request.if_modified_since is not None and modified_at <= request.if_modified_since
+
+    if not_modified:
+        RESPONSE_CACHE.labels(endpoint, 'not_modified').inc()
+        response = current_app.response_class(status=304)
+    else:
+        entry = response_cache.get(key, generation)
+        if entry is not None:
+            RESPONSE_CACHE.labels(endpoint, 'hit').inc()
+            response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+        else:
+            RESPONSE_CACHE.labels(endpoint, 'miss').inc()
+            response, status = build()
+            if status != 200:
+                return response, status
+            if response.is_streamed:
+                response.response = cache_streamed_body(key, generation, response.response, response.mimetype)
+            else:
+                response_cache.put(key, generation, response.get_data(), response.mimetype)
+                RESPONSE_CACHE_BYTES.set(response_cache.size)
 
-# Call initialization
-init_db()
+    response.set_etag(etag)
+    response.last_modified = modified_at
+    response.cache_control.no_cache = True  # Clients may keep the body but must revalidate
+    return response
+
+def cache_streamed_body(key, generation, chunks, mimetype):
+    """Pass a streamed body through and cache it once complete, unless it outgrew the entry limit."""
+    body, size = [], 0
+    for chunk in chunks:
+        if body is not None:
+            data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+            size += len(data)
+            if size <= response_cache.max_entry_bytes:
+                body.append(data)
+            else:
+                body = None
+        yield chunk
+    if body is not None:
+        response_cache.put(key, generation, b''.join(body), mimetype)
+        RESPONSE_CACHE_BYTES.set(response_cache.size)
 
 def validate_email(email):
     email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -115,7 +119,58 @@ def validate_password(password):
             any(c.islower() for c in password) and 
             any(c.isdigit() for c in password))
 
-@app.route('/register/talent', methods=['POST'])
+FTS_TOKEN_RE = re.compile(r'\w+')
+
+# bm25 column weights for Jobs_fts: title, description, location, org name
+FTS_RANK = 'bm25(Jobs_fts, 10.0, 1.0, 2.0, 4.0)'
+
+def build_fts_query(text, column=None):
+    """Turn free text into an FTS5 MATCH expression of quoted prefix terms."""
+    terms = [f'"{token}"*' for token in FTS_TOKEN_RE.findall(text or '')]
+    if column:
+        terms = [f'{column} : {term}' for term in terms]
+    return ' AND '.join(terms)
+
+def build_job_search(search_query, location):
+    """Return the FROM/WHERE clause, params, sort key columns and sort direction for a job search.
+
+    Text and location filters go through the Jobs_fts index and are ranked by
+    bm25 (ascending, best first); with neither, jobs are listed newest first
+    along the (created_at, id) index.
+    """
+    match = ' AND '.join(q for q in (
+        build_fts_query(search_query),
+        build_fts_query(location, column='job_location')
+    ) if q)
+
+    if match:
+        where = " FROM Jobs_fts JOIN Jobs ON Jobs.id = Jobs_fts.rowid WHERE Jobs_fts MATCH ?"
+        return where, [match], (FTS_RANK, 'Jobs.id'), True
+
+    return " FROM Jobs WHERE 1=1", [], ('Jobs.created_at', 'Jobs.id'), False
+
+def order_by(sort_keys, ascending):
+    direction = 'ASC' if ascending else 'DESC'
+    return ' ORDER BY ' + ', '.join(f'{key} {direction}' for key in sort_keys)
+
+def encode_cursor(direction, key):
+    """Opaque page cursor: which way to page and the sort key of the edge row.
+
+    Ranked searches page with direction 'rank' and key (offset, snapshot id)
+    instead; see search_job_page.
+    """
+    payload = json.dumps({'d': direction, 'k': list(key)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    if payload['d'] not in ('next', 'prev', 'rank') or len(payload['k']) != 2:
+        raise ValueError('Malformed cursor')
+    if payload['d'] == 'rank' and not all(isinstance(value, int) for value in payload['k']):
+        raise ValueError('Malformed cursor')
+    return payload['d'], payload['k']
+
+@bp.route('/register/talent', methods=['POST'])
 def register_talent():
     data = request.get_json()
     
@@ -143,106 +198,138 @@ def register_talent():
         return jsonify({'error': 'Resume link is required'}), 400
 
     talent = TalentRegister(name, password, email, phone, resume)
-    result = talent.register()
+    try:
+        result = talent.register()
+    except Overloaded:
+        return overloaded_response()
     
     if result:
         return jsonify({'message': 'Talent registered successfully'}), 201
     else:
         return jsonify({'error': 'Email already exists'}), 409
 
-@app.route('/login/talent', methods=['POST'])
+@bp.route('/login/talent', methods=['POST'])
 def login_talent():
     data = request.get_json()
     email = data.get('email', '').strip()
     password = data.get('password', '')
-    transcript_data = data.get('transcript')  # This will be a dict with file info
     
     if not validate_email(email):
         return jsonify({'error': 'Invalid email format'}), 400
     
     with Database('KoraQuest.db') as db:
-        talent = db.fetchone('SELECT * FROM Talent WHERE email = ?', (email,))
+        talent = db.fetchone('SELECT password FROM Talent WHERE email = ?', (email,))
     
     if talent:
-        hashed_password = talent[2]
-        if bcrypt.checkpw(password.encode('utf-8'), hashed_password):
+        try:
+            matches, new_hash = password_hasher.verify(password, talent['password'])
+        except Overloaded:
+            return overloaded_response()
+        if matches:
+            if new_hash:
+                with Database('KoraQuest.db') as db:
+                    db.execute('UPDATE Talent SET password = ? WHERE email = ?', (new_hash, email))
+            session.rotate()
             session['email'] = email
-            
-            # Process and update resume/transcript if provided
-            if transcript_data:
-                try:
-                    # Extract text from PDF
-                    extracted_text = extract_text_from_pdf(transcript_data['content'])
-                    
-                    if not extracted_text:
-                        return jsonify({'error': 'Could not extract text from PDF'}), 400
-                    
-                    # Clean and store the extracted text
-                    cleaned_text = clean_transcript_text(extracted_text)
-                    
-                    with Database('KoraQuest.db') as db:
-                        db.execute('''
-                            UPDATE Talent 
-                            SET resume = ? 
-                            WHERE email = ?
-                        ''', (cleaned_text, email))
-                        
-                except Exception as e:
-                    print(f"Error processing PDF: {e}")
-                    return jsonify({'error': 'Failed to process PDF file'}), 500
-            
             return jsonify({'message': 'Login successful'}), 200
         else:
             return jsonify({'error': 'Incorrect password'}), 401
     else:
         return jsonify({'error': 'Email not found'}), 404
 
-def extract_text_from_pdf(base64_content):
-    """Extract text from a base64-encoded PDF file."""
+# Transcripts are uploaded separately from login and processed off the request path
+TRANSCRIPT_UPLOAD_DIR = os.path.join('uploads', 'transcripts')
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024  # 25 MB
+
+_transcript_pool = None
+_transcript_pool_lock = threading.Lock()
+
+def get_transcript_pool():
+    """Process pool for PDF extraction, created on first use (after any pre-fork)."""
+    global _transcript_pool
+    with _transcript_pool_lock:
+        if _transcript_pool is None:
+            _transcript_pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn'))
+        return _transcript_pool
+
+@bp.route('/upload/transcript', methods=['POST'])
+def upload_transcript():
+    if 'email' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    upload = request.files.get('transcript')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'Transcript file is required'}), 400
+    if upload.mimetype != 'application/pdf' and not upload.filename.lower().endswith('.pdf'):
+        return jsonify({'error': 'Only PDF files are supported'}), 400
+    # The name and type are the client's word; a file that is not a PDF would only fail later in the worker
+    if upload.stream.read(5) != b'%PDF-':
+        return jsonify({'error': 'File is not a PDF'}), 400
+    upload.stream.seek(0)
+
+    email = session['email']
+    job_id = uuid.uuid4().hex
+    os.makedirs(TRANSCRIPT_UPLOAD_DIR, exist_ok=True)
+    path = os.path.abspath(os.path.join(TRANSCRIPT_UPLOAD_DIR, f'{job_id}.pdf'))
+    # The multipart parser has already spooled the upload; copy it to disk in chunks
+    upload.save(path)
+
+    with Database('KoraQuest.db') as db:
+        db.execute(
+            "INSERT INTO TranscriptJobs (id, email, status) VALUES (?, ?, 'queued')",
+            (job_id, email)
+        )
+
+    future = get_transcript_pool().submit(process_transcript, path)
+    future.add_done_callback(lambda f: finish_transcript_job(job_id, email, path, f))
+    return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+def finish_transcript_job(job_id, email, path, future):
+    """Store the processed transcript and record the job outcome."""
     try:
-        # Decode base64 content
-        pdf_bytes = base64.b64decode(base64_content)
-        pdf_file = io.BytesIO(pdf_bytes)
-        
-        # Create PDF reader object
-        pdf_reader = PdfReader(pdf_file)
-        
-        # Extract text from all pages
-        text_content = []
-        for page in pdf_reader.pages:
-            text_content.append(page.extract_text())
-        
-        return '\n'.join(text_content)
-        
+        cleaned_text, grades, timings = future.result()
+        for stage, seconds in timings.items():
+            observe_stage(stage, seconds)
+        with Database('KoraQuest.db') as db:
+            with db.transaction():
+                db.execute(
+                    'UPDATE Talent SET resume = ?, grades = ? WHERE email = ?',
+                    (cleaned_text, json.dumps(grades), email)
+                )
+                db.execute(
+                    "UPDATE TranscriptJobs SET status = 'done', finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (job_id,)
+                )
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
-        return None
+        log.warning("Error processing transcript", extra={'job_id': job_id, 'error': str(e)})
+        with Database('KoraQuest.db') as db:
+            db.execute(
+                "UPDATE TranscriptJobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (str(e) or type(e).__name__, job_id)
+            )
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
-def clean_transcript_text(text):
-    """Clean and validate transcript text content."""
-    if not text or not isinstance(text, str):
-        return ""
-    
-    # Remove any null bytes
-    text = text.replace('\x00', '')
-    
-    # Remove excessive whitespace while preserving paragraphs
-    paragraphs = text.split('\n')
-    cleaned_paragraphs = [' '.join(p.split()) for p in paragraphs if p.strip()]
-    text = '\n'.join(cleaned_paragraphs)
-    
-    # Remove any non-printable characters
-    text = ''.join(char for char in text if char.isprintable() or char in ['\n', '\t'])
-    
-    # Limit the text length if needed (adjust the limit as needed)
-    max_length = 1000000  # 1 million characters
-    if len(text) > max_length:
-        text = text[:max_length]
-    
-    return text
+@bp.route('/transcript/status/<job_id>', methods=['GET'])
+def transcript_status(job_id):
+    if 'email' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    with Database('KoraQuest.db') as db:
+        job = db.fetchone(
+            'SELECT id, status, error, created_at, finished_at FROM TranscriptJobs WHERE id = ? AND email = ?',
+            (job_id, session['email'])
+        )
+
+    if not job:
+        return jsonify({'error': 'Transcript job not found'}), 404
+    return jsonify(dict(job)), 200
 
 # Add a route to view the stored transcript
-@app.route('/get/transcript', methods=['GET'])
+@bp.route('/get/transcript', methods=['GET'])
 def get_transcript():
     if 'email' not in session:
         return jsonify({'error': 'Not logged in'}), 401
@@ -250,14 +337,15 @@ def get_transcript():
     email = session['email']
     
     with Database('KoraQuest.db') as db:
-        talent = db.fetchone('SELECT resume FROM Talent WHERE email = ?', (email,))
+        talent = db.fetchone('SELECT resume, grades FROM Talent WHERE email = ?', (email,))
         
     if talent and talent[0]:
         # Format the text for better readability
         formatted_text = format_transcript_text(talent[0])
         return jsonify({
             'transcript': formatted_text,
-            'raw_transcript': talent[0]
+            'raw_transcript': talent[0],
+            'grades': json.loads(talent[1]) if talent[1] else {}
         }), 200
     else:
         return jsonify({'error': 'No transcript found'}), 404
@@ -280,7 +368,7 @@ def format_transcript_text(text):
     
     return '\n\n'.join(formatted_paragraphs)
 
-@app.route('/register/organization', methods=['POST'])
+@bp.route('/register/organization', methods=['POST'])
 def register_organization():
     data = request.get_json()
     
@@ -301,14 +389,17 @@ def register_organization():
         return jsonify({'error': 'Password must be at least 8 characters and contain uppercase, lowercase, and number'}), 400
 
     organization = Organization(org_names, org_password, org_email, org_phone)
-    result = organization.register()
+    try:
+        result = organization.register()
+    except Overloaded:
+        return overloaded_response()
     
     if result:
         return jsonify({'message': 'Organization registered successfully'}), 201
     else:
         return jsonify({'error': 'Organization name or email already exists'}), 409
 
-@app.route('/login/organization', methods=['POST'])
+@bp.route('/login/organization', methods=['POST'])
 def login_organization():
     data = request.get_json()
     org_email = data.get('email', '').strip()
@@ -318,24 +409,28 @@ def login_organization():
         return jsonify({'error': 'Invalid email format'}), 400
     
     with Database('KoraQuest.db') as db:
-        organization = db.fetchone('SELECT * FROM Organization WHERE org_email = ?', (org_email,))
+        organization = db.fetchone('SELECT org_names, org_password FROM Organization WHERE org_email = ?', (org_email,))
     
     if organization:
-        hashed_password = organization[2]
-        if bcrypt.checkpw(org_password.encode('utf-8'), hashed_password):
+        try:
+            matches, new_hash = password_hasher.verify(org_password, organization['org_password'])
+        except Overloaded:
+            return overloaded_response()
+        if matches:
+            if new_hash:
+                with Database('KoraQuest.db') as db:
+                    db.execute('UPDATE Organization SET org_password = ? WHERE org_email = ?', (new_hash, org_email))
+            session.rotate()
             session.permanent = True
             session['org_email'] = org_email
-            with Database('KoraQuest.db') as db:
-                org_names = db.fetchone('SELECT org_names FROM Organization WHERE org_email = ?', (org_email,))
-            session['org_names'] = org_names[0]
-            print("Session set:", session)
+            session['org_names'] = organization['org_names']
             return jsonify({'message': 'Login successful', 'org_email': org_email}), 200
         else:
             return jsonify({'error': 'Incorrect password'}), 401
     else:
         return jsonify({'error': 'Email not found'}), 404 
 
-@app.route('/post/job', methods=['POST'])
+@bp.route('/post/job', methods=['POST'])
 def post_job():
     if 'org_email' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
@@ -355,42 +450,104 @@ def post_job():
 
     try:
         with Database('KoraQuest.db') as db:
-            db.execute('''
-                INSERT INTO Jobs (
-                    org_email, job_title, job_description, job_location, 
-                    job_type, is_remote, org_names, source
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                org_email, job_title, job_description, job_location,
-                job_type, is_remote, org_names, 'created'
-            ))
+            with db.transaction():
+                db.execute('''
+                    INSERT INTO Jobs (
+                        org_email, job_title, job_description, job_location, 
+                        job_type, is_remote, org_name, source
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    org_email, job_title, job_description, job_location,
+                    job_type, is_remote, org_names, 'created'
+                ))
+                bump_catalog(db)
             
         return jsonify({'message': 'Job posted successfully'}), 201
-    except Exception as e:
-        print(f"Error posting job: {e}")
+    except Exception:
+        log.exception("Error posting job")
         return jsonify({'error': 'Failed to post job'}), 500
 
-@app.route('/jobs', methods=['GET'])
+# Jobs columns a response may include; listings can narrow them with ?fields=a,b
+JOB_COLUMNS = (
+    'id', 'org_email', 'job_title', 'job_description', 'job_location', 'job_type',
+    'is_remote', 'org_name', 'source', 'created_at', 'external_job_id', 'job_url'
+)
+JOB_LIST_FIELDS = JOB_COLUMNS[:8]
+APPLICATION_FIELDS = ('id', 'org_email', 'job_title')
+STREAM_BATCH_SIZE = 500
+
+def requested_fields(default):
+    """The Jobs columns named in ?fields= (in table order), or default; ValueError on unknown names."""
+    names = {name.strip() for name in request.args.get('fields', '').split(',') if name.strip()}
+    if not names:
+        return default
+    unknown = names.difference(JOB_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(column for column in JOB_COLUMNS if column in names)
+
+def stream_rows(query, params, fields, ndjson=False):
+    """Stream query rows as a JSON array of objects (or NDJSON), a batch at a time from the cursor.
+
+    Only one batch is in memory at once, and the first bytes go out after
+    the first batch instead of after the whole result set.
+    """
+    # The body is generated after the request context is gone, so take the encoder now
+    json_provider = current_app.json
+
+    def generate():
+        with Database('KoraQuest.db') as db:
+            cursor = db.execute(query, params)
+            separator = '\n' if ndjson else ','
+            first = True
+            if not ndjson:
+                yield '['
+            while True:
+                with span('db_query'):
+                    rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                with span('serialize'):
+                    chunk = separator.join(
+                        json_provider.dumps(dict(zip(fields, row)), separators=(',', ':')) for row in rows
+                    )
+                if ndjson:
+                    chunk += '\n'
+                elif not first:
+                    chunk = ',' + chunk
+                first = False
+                yield chunk
+            if not ndjson:
+                yield ']'
+
+    return current_app.response_class(generate(), mimetype='application/x-ndjson' if ndjson else 'application/json')
+
+@bp.route('/jobs', methods=['GET'])
 def get_jobs():
+    """Every job, streamed; ?fields= picks the columns and ?format=ndjson streams one job per line."""
+    try:
+        fields = requested_fields(JOB_LIST_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    ndjson = request.args.get('format', '').strip().lower() == 'ndjson'
+
+    query = f"SELECT {', '.join(fields)} FROM Jobs ORDER BY id"
+    return cached_json('jobs', (fields, ndjson), lambda: (stream_rows(query, (), fields, ndjson), 200))
+
+@bp.route('/jobs/<int:job_id>/alternates', methods=['GET'])
+def get_job_alternates(job_id):
+    """The near-duplicate postings folded into a job, most similar first."""
     with Database('KoraQuest.db') as db:
-        jobs = db.fetchall('SELECT * FROM Jobs')
-    jobs_list = []
-    for job in jobs:
-        job_dict = {
-            'id': job[0],
-            'org_email': job[1],
-            'job_title': job[2],
-            'job_description': job[3],
-            'job_location': job[4],
-            'job_type': job[5],
-            'is_remote': job[6],
-            'org_name': job[7],
-        }
-        jobs_list.append(job_dict)
-    
-    return jsonify(jobs_list), 200
-
-@app.route('/local_search/jobs', methods=['POST'])
+        if db.fetchone('SELECT id FROM Jobs WHERE id = ?', (job_id,)) is None:
+            return jsonify({'error': 'Job ID not found'}), 404
+        alternates = db.fetchall(
+            'SELECT external_job_id, job_title, org_name, job_location, job_url, similarity, created_at '
+            'FROM JobAlternates WHERE canonical_id = ? ORDER BY similarity DESC, id',
+            (job_id,)
+        )
+    return jsonify({'job_id': job_id, 'alternates': [dict(row) for row in alternates]}), 200
+
+@bp.route('/local_search/jobs', methods=['POST'])
 def search_local():
     data = request.get_json()
     job_location = data.get('location', '').strip()
@@ -398,81 +555,46 @@ def search_local():
     is_remote = data.get('isremote', False)
     job_title = data.get('title', '').strip()
     
-    print(f"\nProcessing local job search request:")
-    print(f"Title: {job_title}")
-    print(f"Location: {job_location}")
-    print(f"Job Type: {job_type}")
+    log.debug("Local job search", extra={'title': job_title, 'location': job_location, 'job_type': job_type})
     
     try:
-        # First, fetch from external API and store immediately
-        print("Fetching jobs from external API...")
-        external_jobs = fetch_external_jobs(job_title, job_type, job_location)
-        
-        if external_jobs:
-            print(f"Found {len(external_jobs)} jobs from external API")
-            # Store the fetched jobs FIRST
-            stored_count = store_fetched_jobs(external_jobs)
-            print(f"Stored {stored_count} new jobs in database")
-        else:
-            print("No new jobs found from external API")
+        # Refresh from the external API in the background; answer from local jobs now
+        refresh_pending = job_refresher.schedule(job_title, job_type, job_location)
             
-        # Now search in database with better matching
+        # Now search in database through the full-text index
         with Database('KoraQuest.db') as db:
-            query = """
-                SELECT * FROM Jobs 
-                WHERE 1=1 
-                AND (
-                    LOWER(job_title) LIKE LOWER(?) 
-                    OR LOWER(job_description) LIKE LOWER(?)
-                )
-            """
-            search_term = f"%{job_title}%"
-            params = [search_term, search_term]
-            
+            where, params, sort_keys, ascending = build_job_search(job_title, job_location)
+            query = f"SELECT {', '.join('Jobs.' + column for column in JOB_COLUMNS)}" + where
+
             if job_type:
-                query += " AND LOWER(job_type) LIKE LOWER(?)"
+                query += " AND LOWER(Jobs.job_type) LIKE LOWER(?)"
                 params.append(f"%{job_type}%")
-                
-            if job_location:
-                query += " AND LOWER(job_location) LIKE LOWER(?)"
-                params.append(f"%{job_location}%")
             
             if is_remote:
-                query += " AND is_remote = 1"
+                query += " AND Jobs.is_remote = 1"
             
-            # Add ordering by created_at
-            query += " ORDER BY created_at DESC"
+            query += order_by(sort_keys, ascending)
             
             # Execute the search
             jobs = db.fetchall(query, tuple(params))
-            print(f"Found {len(jobs)} matching jobs in database")
+            log.debug("Local job search results", extra={'jobs': len(jobs)})
             
             # Format the results
             jobs_list = []
             for job in jobs:
-                job_dict = {
-                    'id': job[0],
-                    'org_email': job[1],
-                    'job_title': job[2],
-                    'job_description': job[3],
-                    'job_location': job[4],
-                    'job_type': job[5],
-                    'is_remote': bool(job[6]),
-                    'org_name': job[7],
-                    'source': job[8] if len(job) > 8 else 'created',
-                    'created_at': job[9] if len(job) > 9 else None,
-                    'external_job_id': job[10] if len(job) > 10 else None,
-                    'job_url': job[11] if len(job) > 11 else None
-                }
+                job_dict = {column: job[column] for column in JOB_COLUMNS}
+                job_dict['is_remote'] = bool(job_dict['is_remote'])
                 jobs_list.append(job_dict)
             
-            return jsonify(jobs_list), 200
+            response = jsonify(jobs_list)
+            response.headers['X-Refresh-Pending'] = '1' if refresh_pending else '0'
+            return response, 200
             
-    except Exception as e:
-        print(f"Error searching jobs: {e}")
+    except Exception:
+        log.exception("Error searching local jobs")
         return jsonify({'error': 'Failed to search jobs'}), 500
 
-@app.route('/apply/job', methods=['POST'])
+@bp.route('/apply/job', methods=['POST'])
 def apply_job():
     data = request.get_json()
     
@@ -488,34 +610,27 @@ def apply_job():
         return jsonify({'error': 'Job ID is required'}), 400
     
     with Database('KoraQuest.db') as db:
-        job = db.fetchone('SELECT * FROM Jobs WHERE id = ?', (job_id,))
+        job = db.fetchone('SELECT id FROM Jobs WHERE id = ?', (job_id,))
     
     if job:
         return jsonify({'message': 'Job application successful'}), 200
     else:
         return jsonify({'error': 'Job ID not found'}), 404
 
-@app.route('/organization/applications', methods=['GET'])
+@bp.route('/organization/applications', methods=['GET'])
 def view_applications():
     org_email = session.get('org_email')
     if not org_email:
-        print('no org_email')
         return jsonify({'error': 'Unauthorized'}), 401
 
-    with Database('KoraQuest.db') as db:
-        applications = db.fetchall('SELECT * FROM Jobs WHERE org_email = ?', (org_email,))
-    
-    applications_list = []
-    for application in applications:
-        application_dict = {
-            'id': application[0],
-            'org_email': application[1],
-            'job_title': application[2]
-        }
-        applications_list.append(application_dict)
-    
-    print("Applications:", applications_list)
-    return jsonify(applications_list), 200
+    try:
+        fields = requested_fields(APPLICATION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    ndjson = request.args.get('format', '').strip().lower() == 'ndjson'
+
+    query = f"SELECT {', '.join(fields)} FROM Jobs WHERE org_email = ? ORDER BY id"
+    return stream_rows(query, (org_email,), fields, ndjson), 200
 
 class TalentRegister:
     def __init__(self, name, password, email, phone, resume):
@@ -526,13 +641,18 @@ class TalentRegister:
         self.resume = resume
 
     def register(self):
-        hashed_password = bcrypt.hashpw(self.password.encode('utf-8'), bcrypt.gensalt())
         with Database('KoraQuest.db') as db:
-            if db.fetchone('SELECT * FROM Talent WHERE email = ?', (self.email,)):
+            if db.fetchone('SELECT 1 FROM Talent WHERE email = ?', (self.email,)):
+                return False
+        hashed_password = password_hasher.hash(self.password)
+        with Database('KoraQuest.db') as db:
+            try:
+                return db.execute('''
+                    INSERT INTO Talent (name, password, email, phone, resume) VALUES (?, ?, ?, ?, ?)
+                ''', (self.name, hashed_password, self.email, self.phone, self.resume))
+            except sqlite3.IntegrityError:
+                # A concurrent registration took the email between the check and the insert
                 return False
-            return db.execute('''
-                INSERT INTO Talent (name, password, email, phone, resume) VALUES (?, ?, ?, ?, ?)
-            ''', (self.name, hashed_password, self.email, self.phone, self.resume))
 
 class Organization:
     def __init__(self, org_names, org_password, org_email, org_phone):
@@ -542,13 +662,17 @@ class Organization:
         self.org_phone = org_phone
 
     def register(self):
-        hashed_password = bcrypt.hashpw(self.org_password.encode('utf-8'), bcrypt.gensalt())
         with Database('KoraQuest.db') as db:
-            if db.fetchone('SELECT * FROM Organization WHERE org_email = ? OR org_names = ?', (self.org_email, self.org_names)):
+            if db.fetchone('SELECT 1 FROM Organization WHERE org_email = ? OR org_names = ?', (self.org_email, self.org_names)):
+                return False
+        hashed_password = password_hasher.hash(self.org_password)
+        with Database('KoraQuest.db') as db:
+            try:
+                return db.execute('''
+                    INSERT INTO Organization (org_names, org_password, org_email) VALUES (?, ?, ?)
+                ''', (self.org_names, hashed_password, self.org_email))
+            except sqlite3.IntegrityError:
                 return False
-            return db.execute('''
-                INSERT INTO Organization (org_names, org_password, org_email) VALUES (?, ?, ?)
-            ''', (self.org_names, hashed_password, self.org_email))
 
 class Jobs:
     def __init__(self, org_email, job_title, job_description, job_location, job_type, is_remote, org_names):
@@ -562,295 +686,364 @@ class Jobs:
 
     def post(self):
         with Database('KoraQuest.db') as db:
-            return db.execute('''
-                INSERT INTO Jobs (org_email, job_title, job_description, job_location, job_type, is_remote, org_names) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (self.org_email, self.job_title, self.job_description, self.job_location, self.job_type, self.is_remote, self.org_names))
+            with db.transaction():
+                cursor = db.execute('''
+                    INSERT INTO Jobs (org_email, job_title, job_description, job_location, job_type, is_remote, org_name) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (self.org_email, self.job_title, self.job_description, self.job_location, self.job_type, self.is_remote, self.org_names))
+                bump_catalog(db)
+            return cursor
+
+# Fields refreshed when a fetched job is already stored; only rows that changed are rewritten
+UPSERT_UPDATE = """
+    DO UPDATE SET
+        job_description = excluded.job_description,
+        job_type = excluded.job_type,
+        is_remote = excluded.is_remote,
+        job_url = excluded.job_url
+    WHERE Jobs.job_description IS NOT excluded.job_description
+        OR Jobs.job_type IS NOT excluded.job_type
+        OR Jobs.is_remote IS NOT excluded.is_remote
+        OR Jobs.job_url IS NOT excluded.job_url
+"""
+
+def store_fetched_jobs(jobs, batch_size=500):
+    """Upsert jobs fetched from external API in a single transaction.
+
+    Returns a dict of inserted/updated/duplicates/skipped counts. Jobs
+    without a title and repeats within the batch are skipped, as are stored
+    jobs whose fields did not change. A new job that nearly duplicates a
+    stored one, or an earlier one in the batch, is not inserted: it is
+    linked to that canonical row in JobAlternates (see near_duplicates.py).
+    """
+    rows = []
+    seen_ids = set()
+    seen_keys = set()
+    skipped = 0
+    for job in jobs:
+        title = (job.get('title') or '').strip()
+        external_id = job.get('external_job_id') or job.get('id') or str(uuid.uuid4())
+        dedupe_key = job_dedupe_key(title, job.get('location'), job.get('company'))
+        if not title or external_id in seen_ids or dedupe_key in seen_keys:
+            skipped += 1
+            continue
+        seen_ids.add(external_id)
+        seen_keys.add(dedupe_key)
+        rows.append((
+            title,
+            job.get('description', ''),
+            job.get('location', ''),
+            job.get('job_type', 'Full Time'),
+            1 if job.get('is_remote') else 0,
+            job.get('company', ''),
+            external_id,
+            job.get('job_url', ''),
+            dedupe_key
+        ))
+
+    if not rows:
+        return {'inserted': 0, 'updated': 0, 'duplicates': 0, 'skipped': skipped}
 
-def store_fetched_jobs(jobs):
-    """Store jobs fetched from external API in the database"""
-    stored_count = 0
-    print(f"\n=== Storing Jobs in Database ===")
-    print(f"Attempting to store {len(jobs)} jobs from external API")
-    
     with Database('KoraQuest.db') as db:
-        # First, let's verify the database connection
-        try:
-            test_query = "SELECT COUNT(*) FROM Jobs"
-            count = db.fetchone(test_query)[0]
-            print(f"Current number of jobs in database: {count}")
-        except Exception as e:
-            print(f"Error checking database: {e}")
-            return 0
+        with db.transaction():
+            # Look up which rows already exist, a batch of keys per indexed IN query
+            existing_by_id = {}
+            existing_by_key = {}
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                placeholders = ', '.join('?' * len(batch))
+                for existing in db.fetchall(
+                    f"SELECT id, job_title, org_name, job_description, external_job_id, dedupe_key FROM Jobs "
+                    f"WHERE external_job_id IN ({placeholders}) OR dedupe_key IN ({placeholders})",
+                    [row[6] for row in batch] + [row[8] for row in batch]
+                ):
+                    existing_by_id[existing['external_job_id']] = existing
+                    existing_by_key[existing['dedupe_key']] = existing
+            stored = [existing_by_id.get(row[6]) or existing_by_key.get(row[8]) for row in rows]
 
-        for job in jobs:
-            try:
-                # Generate a unique ID if none exists
-                external_id = job.get('external_job_id') or job.get('id') or str(uuid.uuid4())
-                
-                print(f"\nProcessing job: {job.get('title')} at {job.get('company')}")
-                # Check if job already exists
-                existing_job = db.fetchone(
-                    """
-                    SELECT id FROM Jobs 
-                    WHERE external_job_id = ? 
-                    OR (
-                        LOWER(job_title) = LOWER(?) 
-                        AND LOWER(job_location) = LOWER(?)
-                        AND org_name = ?
-                    )
-                    """, 
+            # New jobs are clustered against the band index; matches become alternates
+            with span('near_duplicates'):
+                index_unsigned_jobs(db)
+                fresh = [i for i, existing in enumerate(stored) if existing is None]
+                fresh_signatures = signatures((rows[i][0], rows[i][5], rows[i][1]) for i in fresh)
+                matches = dict(zip(fresh, cluster(db, fresh_signatures, (rows[i][2] for i in fresh))))
+            upserts = [row for i, row in enumerate(rows) if matches.get(i) is None]
+
+            cursor = db.executemany(f'''
+                INSERT INTO Jobs (
+                    job_title, job_description, job_location, job_type,
+                    is_remote, org_name, source, external_job_id, job_url,
+                    dedupe_key, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, 'external_api', ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (external_job_id) {UPSERT_UPDATE}
+                ON CONFLICT (dedupe_key) {UPSERT_UPDATE}
+            ''', upserts)
+            if cursor.rowcount:
+                bump_catalog(db)
+
+            with span('near_duplicates'):
+                inserted_ids = {}
+                canonical = [(i, sig) for i, sig in zip(fresh, fresh_signatures) if matches[i] is None]
+                for start in range(0, len(canonical), batch_size):
+                    batch = [rows[i][6] for i, _ in canonical[start:start + batch_size]]
+                    placeholders = ', '.join('?' * len(batch))
+                    inserted_ids.update(db.fetchall(
+                        f"SELECT external_job_id, id FROM Jobs WHERE external_job_id IN ({placeholders})", batch
+                    ))
+                    # A posting linked as an alternate before, that no longer matches, is a job of its own now
+                    db.execute(f"DELETE FROM JobAlternates WHERE external_job_id IN ({placeholders})", batch)
+                # Stored jobs whose description changed are signed again
+                changed = [
+                    (existing['id'], (existing['job_title'], existing['org_name'], row[1]))
+                    for row, existing in zip(rows, stored)
+                    if existing is not None and existing['job_description'] != row[1]
+                ]
+                resigned = zip((job_id for job_id, _ in changed), signatures(text for _, text in changed))
+                index_jobs(db, [(inserted_ids[rows[i][6]], sig) for i, sig in canonical] + list(resigned))
+
+                alternates = [
                     (
-                        external_id,
-                        job.get('title', ''),
-                        job.get('location', ''),
-                        job.get('company', '')
+                        match.job_id if match.job_id is not None else inserted_ids[rows[fresh[match.index]][6]],
+                        rows[i][6], rows[i][0], rows[i][5], rows[i][2], rows[i][7], match.similarity
                     )
-                )
-                
-                if existing_job:
-                    print(f"Job already exists in database with ID: {existing_job[0]}")
-                else:
-                    print("Job is new, inserting into database...")
-                    db.execute('''
-                    INSERT INTO Jobs (
-                        job_title, job_description, job_location, job_type,
-                        is_remote, org_name, source, external_job_id, job_url,
-                        created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    ''', (
-                        job.get('title', ''),
-                        job.get('description', ''),
-                        job.get('location', ''),
-                        job.get('job_type', 'Full Time'),
-                        1 if job.get('is_remote') else 0,
-                        job.get('company', ''),
-                        'external_api',
-                        external_id,
-                        job.get('job_url', '')
-                    ))
-                    stored_count += 1
-                    print(f"Successfully stored job in database")
-            except Exception as e:
-                print(f"Error storing job: {e}")
-                print(f"Job data that caused error: {job}")
-                continue
-    
-    print(f"\nFinal Results:")
-    print(f"Successfully stored {stored_count} new jobs in database")
-    
-    # Verify final count
-    with Database('KoraQuest.db') as db:
-        try:
-            final_count = db.fetchone("SELECT COUNT(*) FROM Jobs")[0]
-            print(f"Total jobs now in database: {final_count}")
-        except Exception as e:
-            print(f"Error getting final count: {e}")
-    
-    return stored_count
+                    for i, match in matches.items() if match is not None
+                ]
+                db.executemany('''
+                    INSERT INTO JobAlternates (
+                        canonical_id, external_job_id, job_title, org_name, job_location, job_url, similarity
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (external_job_id) DO UPDATE SET
+                        canonical_id = excluded.canonical_id,
+                        job_title = excluded.job_title,
+                        org_name = excluded.org_name,
+                        job_location = excluded.job_location,
+                        job_url = excluded.job_url,
+                        similarity = excluded.similarity
+                ''', alternates)
+
+    inserted = len(canonical)
+    updated = cursor.rowcount - inserted
+    result = {
+        'inserted': inserted, 'updated': updated, 'duplicates': len(alternates),
+        'skipped': skipped + len(rows) - inserted - updated - len(alternates)
+    }
+    for outcome, count in result.items():
+        FETCHED_JOBS.labels(outcome).inc(count)
+    log.info("Stored fetched jobs", extra=result)
+    return result
+
+# Default counts stop here; pass count=exact for the full count
+SEARCH_COUNT_CAP = 1000
 
-@app.route('/search/jobs', methods=['GET'])
+@bp.route('/search/jobs', methods=['GET'])
 def search_jobs():
     search_query = request.args.get('q', '').strip()
     job_type = request.args.get('type', '').strip()
     location = request.args.get('location', '').strip()
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 10))
+    cursor = request.args.get('cursor', '').strip()
+    count_mode = request.args.get('count', 'estimate').strip().lower()
+    if count_mode not in ('exact', 'none'):
+        count_mode = 'estimate'
+    try:
+        per_page = min(max(int(request.args.get('per_page', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'per_page must be a number'}), 400
+
+    direction, after = 'next', None
+    if cursor:
+        try:
+            direction, after = decode_cursor(cursor)
+        except (ValueError, KeyError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
     
-    print(f"\nProcessing job search request:")
-    print(f"Query: {search_query}")
-    print(f"Location: {location}")
-    print(f"Job Type: {job_type}")
+    log.debug("Job search", extra={'query': search_query, 'location': location, 'job_type': job_type})
     
     try:
-        # First, fetch from external API and store immediately
-        print("Fetching jobs from external API...")
-        external_jobs = fetch_external_jobs(search_query, job_type, location)
-        
-        if external_jobs:
-            print(f"Found {len(external_jobs)} jobs from external API")
-            # Store the fetched jobs FIRST
-            stored_count = store_fetched_jobs(external_jobs)
-            print(f"Stored {stored_count} new jobs in database")
-        else:
-            print("No new jobs found from external API")
+        # Refresh from the external API in the background; answer from local jobs now
+        refresh_pending = job_refresher.schedule(search_query, job_type, location)
         
-        # Now search in database including the newly stored jobs
-        with Database('KoraQuest.db') as db:
-            # Build the base query with better search conditions
-            query = """
-                SELECT * FROM Jobs 
-                WHERE 1=1 
-                AND (
-                    LOWER(job_title) LIKE LOWER(?) 
-                    OR LOWER(job_description) LIKE LOWER(?)
-                )
-            """
-            search_term = f"%{search_query}%"
-            params = [search_term, search_term]
-            
-            if job_type:
-                query += " AND LOWER(job_type) = LOWER(?)"
-                params.append(job_type)
-                
-            if location:
-                query += " AND LOWER(job_location) LIKE LOWER(?)"
-                params.append(f"%{location}%")
-            
-            # Get total count first
-            count_query = "SELECT COUNT(*) FROM (" + query + ")"
-            total_count = db.fetchone(count_query, tuple(params))[0]
-            print(f"Total matching jobs in database: {total_count}")
-            
-            # Add ordering and pagination
-            query += " ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
-            params.extend([per_page, (page - 1) * per_page])
-            
-            # Execute the search
-            jobs = db.fetchall(query, tuple(params))
-            print(f"Returning {len(jobs)} jobs for current page")
-            
-            # Format the results
-            formatted_jobs = []
-            for job in jobs:
-                job_dict = {
-                    'id': job[0],
-                    'org_email': job[1],
-                    'job_title': job[2],
-                    'job_description': job[3],
-                    'job_location': job[4],
-                    'job_type': job[5],
-                    'is_remote': bool(job[6]),
-                    'org_name': job[7],
-                    'source': job[8] if len(job) > 8 else 'created',
-                    'created_at': job[9] if len(job) > 9 else None,
-                    'external_job_id': job[10] if len(job) > 10 else None,
-                    'job_url': job[11] if len(job) > 11 else None
-                }
-                formatted_jobs.append(job_dict)
+        # Text filters are matched token by token and case-insensitively, so the cache key is too
+        params = (
+            search_terms(search_query), job_type.lower(), search_terms(location),
+            cursor, count_mode, per_page, refresh_pending
+        )
+        return cached_json('search_jobs', params, lambda: search_job_page(
+            search_query, job_type, location, direction, after, count_mode, per_page, refresh_pending
+        ))
             
-            return jsonify({
-                'jobs': formatted_jobs,
-                'total_count': total_count,
-                'page': page,
-                'per_page': per_page,
-                'total_pages': (total_count + per_page - 1) // per_page
-            }), 200
-            
-    except Exception as e:
-        print(f"Error searching jobs: {e}")
+    except Exception:
+        log.exception("Error searching jobs")
         return jsonify({'error': 'Failed to search jobs'}), 500
 
-def fetch_external_jobs(query, job_type, location):
-    """Fetch jobs from external API and format them properly"""
-    try:
-        print("\n=== Fetching External Jobs ===")
-        print(f"Search Query: {query}")
-        print(f"Job Type: {job_type}")
-        print(f"Location: {location}")
+def search_terms(text):
+    return tuple(FTS_TOKEN_RE.findall((text or '').lower()))
+
+def search_job_page(search_query, job_type, location, direction, after, count_mode, per_page, refresh_pending):
+    """One page of /search/jobs results as a JSON response.
+
+    Newest-first listings page by keyset on (created_at, id). bm25 scores
+    depend on corpus-wide term statistics and change whenever jobs are
+    written, so a stored score cannot anchor a page of ranked results: those
+    page by offset within the first SEARCH_COUNT_CAP results, over the jobs
+    that existed when the first page was served (the snapshot id in the
+    cursor). Background refreshes therefore do not shift later pages; edits
+    to already-listed jobs can still reorder near-tied results.
+    """
+    with Database('KoraQuest.db') as db:
+        # Build the base query on the full-text index
+        where, params, sort_keys, ascending = build_job_search(search_query, location)
+        ranked = sort_keys[0] == FTS_RANK
+        if after is not None and (direction == 'rank') != ranked:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
-        # Prepare request data
-        request_data = {
-            'search_term': query or 'software',
-            'location': location or 'mumbai',
-            'results_wanted': 10,  # Reduced to improve response time
-            'site_name': [
-                'indeed',
-                'linkedin'  # Reduced sites to improve reliability
-            ],
-            'distance': 25,  # Reduced distance to improve response time
-            'job_type': job_type.lower().replace(' ', '') if job_type else 'fulltime',
-            'is_remote': False,
-            'linkedin_fetch_description': True,
-            'hours_old': 168  # Last 7 days
-        }
-
-        print("Making API request with data:", request_data)
+        if job_type:
+            where += " AND LOWER(Jobs.job_type) = LOWER(?)"
+            params.append(job_type)
+
+        if ranked:
+            offset, snapshot = after if after is not None else (0, None)
+            if snapshot is None:
+                snapshot = db.fetchone('SELECT COALESCE(MAX(id), 0) FROM Jobs')[0]
+            where += " AND Jobs.id <= ?"
+            params.append(snapshot)
         
-        # Make request to external API with retries
-        max_retries = 3
-        retry_delay = 2  # seconds
+        # Counting is optional: capped by default, exact only on request
+        total_count = None
+        count_is_exact = False
+        if count_mode == 'exact':
+            total_count = db.fetchone("SELECT COUNT(*)" + where, tuple(params))[0]
+            count_is_exact = True
+        elif count_mode != 'none':
+            total_count = db.fetchone(
+                f"SELECT COUNT(*) FROM (SELECT 1{where} LIMIT {SEARCH_COUNT_CAP + 1})", tuple(params)
+            )[0]
+            count_is_exact = total_count <= SEARCH_COUNT_CAP
+            total_count = min(total_count, SEARCH_COUNT_CAP)
         
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(
-                    'https://jobs-search-api.p.rapidapi.com/getjobs',
-                    headers={
-                        'x-rapidapi-key': '8ec0ed2528mshdbc246edfb4c888p1d4a42jsn6450870c3cc0',
-                        'x-rapidapi-host': 'jobs-search-api.p.rapidapi.com',
-                        'Content-Type': 'application/json'
-                    },
-                    json=request_data,
-                    timeout=15  # Reduced timeout
-                )
-                
-                print(f"API Response Status: {response.status_code}")
-                
-                if response.status_code == 429:
-                    print("Rate limit exceeded. Waiting before retry...")
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-                
-                if not response.ok:
-                    print(f"API request failed with status {response.status_code}")
-                    print(f"Response content: {response.text}")
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-                
-                try:
-                    response_data = response.json()
-                    if not response_data or 'jobs' not in response_data:
-                        print("No jobs found in API response")
-                        return None
-                    
-                    # Format jobs for our database
-                    formatted_jobs = []
-                    for job in response_data['jobs']:
-                        try:
-                            # Skip jobs without required fields
-                            if not job.get('title') or not job.get('company'):
-                                continue
-                                
-                            formatted_job = {
-                                'title': job.get('title', '').strip(),
-                                'description': job.get('description', '').strip(),
-                                'location': job.get('location', '').strip(),
-                                'company': job.get('company', '').strip(),
-                                'job_type': job.get('job_type', 'Full Time').strip(),
-                                'is_remote': bool(job.get('is_remote', False)),
-                                'external_job_id': job.get('job_id') or str(uuid.uuid4()),
-                                'job_url': job.get('url') or job.get('job_url', ''),
-                                'source': 'external_api'
-                            }
-                            
-                            formatted_jobs.append(formatted_job)
-                            print(f"Formatted job: {formatted_job['title']} at {formatted_job['company']}")
-                            
-                        except Exception as e:
-                            print(f"Error formatting job: {e}")
-                            continue
-                    
-                    print(f"Successfully formatted {len(formatted_jobs)} jobs")
-                    return formatted_jobs
-                    
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse response as JSON: {e}")
-                    print(f"Raw response content: {response.text}")
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-
-            except requests.exceptions.RequestException as e:
-                print(f"Request failed (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-                return None
-
-        print("All retry attempts failed")
-        return None
+        if ranked:
+            jobs, next_cursor, prev_cursor = ranked_page(db, where, params, offset, snapshot, per_page)
+        else:
+            jobs, next_cursor, prev_cursor = keyset_page(db, where, params, sort_keys, ascending, direction, after, per_page)
+        
+        # Format the results
+        formatted_jobs = []
+        for job in jobs:
+            job_dict = {column: job[column] for column in JOB_COLUMNS}
+            job_dict['is_remote'] = bool(job_dict['is_remote'])
+            formatted_jobs.append(job_dict)
+        
+        return jsonify({
+            'jobs': formatted_jobs,
+            'total_count': total_count,
+            'count_is_exact': count_is_exact,
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'refresh_pending': refresh_pending
+        }), 200
 
-    except Exception as e:
-        print(f"Error fetching external jobs: {e}")
+def ranked_page(db, where, params, offset, snapshot, per_page):
+    """Rows, next and previous cursors of one page of bm25-ranked results, by offset within the capped window."""
+    offset = min(max(offset, 0), SEARCH_COUNT_CAP)
+    limit = max(min(per_page, SEARCH_COUNT_CAP - offset), 0)
+    query = f"SELECT {', '.join('Jobs.' + column for column in JOB_COLUMNS)}" + where
+    query += order_by((FTS_RANK, 'Jobs.id'), True) + " LIMIT ? OFFSET ?"
+    jobs = db.fetchall(query, tuple(params) + (limit + 1, offset))
+    has_more = len(jobs) > limit and offset + limit < SEARCH_COUNT_CAP
+    jobs = jobs[:limit]
+    next_cursor = encode_cursor('rank', (offset + limit, snapshot)) if has_more else None
+    prev_cursor = encode_cursor('rank', (max(offset - per_page, 0), snapshot)) if offset > 0 else None
+    return jobs, next_cursor, prev_cursor
+
+def keyset_page(db, where, params, sort_keys, ascending, direction, after, per_page):
+    """Rows, next and previous cursors of one page, seeking past the cursor row instead of using OFFSET."""
+    # Fetch one extra row to know whether another page exists
+    forward = direction == 'next'
+    page_ascending = ascending == forward
+    query = f"SELECT {', '.join('Jobs.' + column for column in JOB_COLUMNS)}, {sort_keys[0]} AS sort_key" + where
+    page_params = list(params)
+    if after is not None:
+        query += f" AND ({sort_keys[0]}, {sort_keys[1]}) {'>' if page_ascending else '<'} (?, ?)"
+        page_params.extend(after)
+    query += order_by(sort_keys, page_ascending) + " LIMIT ?"
+    page_params.append(per_page + 1)
+    
+    # Execute the search
+    jobs = db.fetchall(query, tuple(page_params))
+    has_more = len(jobs) > per_page
+    jobs = jobs[:per_page]
+    if not forward:
+        jobs.reverse()
+    
+    next_cursor = prev_cursor = None
+    if jobs:
+        first_key = (jobs[0]['sort_key'], jobs[0]['id'])
+        last_key = (jobs[-1]['sort_key'], jobs[-1]['id'])
+        if forward:
+            next_cursor = encode_cursor('next', last_key) if has_more else None
+            prev_cursor = encode_cursor('prev', first_key) if after is not None else None
+        else:
+            next_cursor = encode_cursor('next', last_key)
+            prev_cursor = encode_cursor('prev', first_key) if has_more else None
+    
+    return jobs, next_cursor, prev_cursor
+
+# One shared fetcher: a keep-alive session and a bounded pool of request threads
+job_fetcher = ConcurrentJobFetcher()
+
+def fetch_external_jobs(query, job_type, location):
+    """Fetch jobs from external API and format them properly.
+
+    Fans out per site and location; returns the jobs that arrived before the
+    fetcher's deadline, or None if every request failed.
+    """
+    try:
+        with span('external_fetch'):
+            return job_fetcher.fetch(query, job_type, location)
+    except Exception:
+        log.exception("Error fetching external jobs")
         return None
 
+def refresh_external_jobs(query, job_type, location):
+    """Fetch one external search and store the results; runs on a JobRefresher worker."""
+    external_jobs = fetch_external_jobs(query, job_type, location)
+    if external_jobs is None:
+        return False
+    if external_jobs:
+        store_fetched_jobs(external_jobs)
+    return True
+
+# External fetches are deduplicated per search and kept fresh for 15 minutes
+job_refresher = JobRefresher(refresh_external_jobs, ttl=900)
+
+def create_app(migrate_schema=True):
+    """Build the Flask app: `gunicorn 'app:create_app()' --workers 4 --preload`.
+
+    Startup only reads the schema version (see schema.py), so the job
+    catalog survives restarts and a new worker starts in milliseconds.
+    With --preload the app is built once and forked; reset_after_fork gives
+    each worker its own pools.
+    """
+    app = Flask(__name__)
+    app.secret_key = 'avellin'
+    app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+    CORS(app, supports_credentials=True, expose_headers=['X-Refresh-Pending', 'Server-Timing'])
+    configure_logging()
+    init_app(app)
+    app.session_interface = ServerSessionInterface(session_store)
+    ensure_schema('KoraQuest.db', migrate_schema)
+    app.register_blueprint(bp)
+    return app
+
+def reset_after_fork():
+    """Replace the threads, locks and processes a forked worker inherited but cannot use."""
+    global _transcript_pool, _transcript_pool_lock
+    _transcript_pool = None
+    _transcript_pool_lock = threading.Lock()
+    for resource in (password_hasher, session_store, response_cache, job_fetcher, job_refresher):
+        resource.reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
@@ -0,0 +1,223 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import bcrypt
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from database import Database
+from metrics import PASSWORD_REJECTIONS, SESSION_LOOKUPS
+from timing import span
+
+# Work factor for new hashes; stored hashes with another cost are rehashed at the next login
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+class Overloaded(Exception):
+    """The password pool is full; the caller should answer 503 and let the client retry."""
+
+class PasswordHasher:
+    """bcrypt on a small dedicated thread pool instead of the request threads.
+
+    bcrypt releases the GIL while it works, so the pool hashes in parallel
+    with request handling but never uses more than max_workers cores. At
+    most max_workers + max_queued calls are admitted at once; beyond that,
+    and for calls that wait longer than timeout, Overloaded is raised right
+    away, so a burst of logins is shed instead of starving other traffic.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, max_workers=2, max_queued=32, timeout=10.0):
+        self.rounds = rounds
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """New pool threads and slots; a forked child inherits neither working threads nor free slots."""
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queued)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+
+    def hash(self, password):
+        return self._run(self._hash, password.encode('utf-8'))
+
+    def verify(self, password, hashed):
+        """Return (matches, new_hash); new_hash is set when the stored hash used another work factor."""
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return self._run(self._verify, password.encode('utf-8'), hashed)
+
+    def needs_rehash(self, hashed):
+        try:
+            return int(hashed.split(b'$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password, bcrypt.gensalt(self.rounds))
+
+    def _verify(self, password, hashed):
+        if not bcrypt.checkpw(password, hashed):
+            return False, None
+        return True, self._hash(password) if self.needs_rehash(hashed) else None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_REJECTIONS.labels('full').inc()
+            raise Overloaded()
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            with span('password_hash'):
+                return future.result(self.timeout)
+        except FuturesTimeout:
+            PASSWORD_REJECTIONS.labels('timeout').inc()
+            raise Overloaded()
+
+class SessionStore:
+    """Server-side session data: an LRU of recent sessions in front of the Sessions table.
+
+    Writes go through to SQLite, so sessions survive restarts and are
+    shared between processes, and every save bumps the row's version. A
+    cached copy is served without a query for revalidate_after seconds;
+    after that one primary-key query returns the data only when the version
+    differs from the cached copy's, so a session saved, or deleted at
+    logout, by another worker is served stale for at most that long, and a
+    current one skips reading and decoding its JSON. The identity stored in
+    a session (email, organization name) saves authenticated requests
+    further lookups.
+    """
+
+    def __init__(self, db_file, max_entries=10000, purge_every=1000, revalidate_after=2.0):
+        self.db_file = db_file
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self.revalidate_after = revalidate_after
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(sid)
+            if cached is not None:
+                self._cache.move_to_end(sid)
+        if cached is not None and now < cached[3] + self.revalidate_after:
+            SESSION_LOOKUPS.labels('hit').inc()
+            return self._live(sid, cached, now)
+        with Database(self.db_file) as db:
+            row = db.fetchone(
+                'SELECT version, expires_at, CASE WHEN version = ? THEN NULL ELSE data END AS data '
+                'FROM Sessions WHERE id = ?',
+                (-1 if cached is None else cached[2], sid)
+            )
+        if row is None:
+            if cached is not None:
+                with self._lock:
+                    self._cache.pop(sid, None)
+            return None
+        if row['data'] is None:
+            SESSION_LOOKUPS.labels('revalidated').inc()
+            cached = (*cached[:3], now)
+        else:
+            SESSION_LOOKUPS.labels('miss' if cached is None else 'stale').inc()
+            cached = (json.loads(row['data']), row['expires_at'], row['version'], now)
+        self._remember(sid, cached)
+        return self._live(sid, cached, now)
+
+    def _live(self, sid, entry, now):
+        data, expires_at = entry[:2]
+        if expires_at <= now:
+            self.delete(sid)
+            return None
+        return dict(data)
+
+    def save(self, sid, data, expires_at):
+        with Database(self.db_file) as db:
+            version = db.fetchall(
+                'INSERT INTO Sessions (id, data, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at, '
+                'version = Sessions.version + 1 RETURNING version',
+                (sid, json.dumps(data), expires_at)
+            )[0]['version']
+            self._saves += 1
+            if self._saves % self.purge_every == 0:
+                db.execute('DELETE FROM Sessions WHERE expires_at <= ?', (time.time(),))
+        self._remember(sid, (dict(data), expires_at, version, time.time()))
+
+    def delete(self, sid):
+        with self._lock:
+            self._cache.pop(sid, None)
+        with Database(self.db_file) as db:
+            db.execute('DELETE FROM Sessions WHERE id = ?', (sid,))
+
+    def _remember(self, sid, entry):
+        with self._lock:
+            self._cache[sid] = entry
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.previous_sid = None
+
+    def rotate(self):
+        """Move the session to a fresh id and drop the old one; call at login so an id known before it is worthless."""
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+class ServerSessionInterface(SessionInterface):
+    """Flask sessions kept in a SessionStore; the cookie only carries a random session id.
+
+    Unknown or expired ids are never adopted: the client gets a fresh id.
+    Logins also rotate the id (ServerSession.rotate), so an id a client
+    held, or was handed, before logging in is worthless afterwards.
+    """
+
+    def __init__(self, store, lifetime=31 * 24 * 3600):
+        self.store = store
+        self.lifetime = lifetime
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSession(data, sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if session.modified:
+            lifetime = app.permanent_session_lifetime.total_seconds() if session.permanent else self.lifetime
+            self.store.save(session.sid, dict(session), time.time() + lifetime)
+        if session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, session.sid, expires=self.get_expiration_time(app, session),
+                domain=domain, path=path, httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app)
+            )
@@ -0,0 +1,84 @@
+"""Benchmark the transcript grade parser over synthetic transcripts.
+
+    python bench_transcript_grades.py --pages 10 100 500
+
+Each synthetic page mixes headers, term summaries and course rows printed in
+several layouts (course codes, dotted leaders, pipes, credits, +/- grades,
+alias and misspelled course names). Reports throughput and checks the parsed
+grades against the ground truth used to generate the transcript.
+"""
+import argparse
+import random
+import time
+from transcript_grades import CANONICAL_COURSES, COURSE_ALIASES, parse_transcript_grades
+from transcripts import clean_transcript_text
+
+GRADES = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'E', 'F']
+ALIASES_BY_COURSE = {}
+for alias, course in COURSE_ALIASES.items():
+    ALIASES_BY_COURSE.setdefault(course, []).append(alias.title())
+
+def misspell(name, rng):
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1:] if name[i].isalpha() else name
+
+def course_row(course, grade, rng):
+    shown = rng.choice([course, course, course] + ALIASES_BY_COURSE.get(course, []))
+    if len(shown) > 12 and rng.random() < 0.1:
+        shown = misspell(shown, rng)
+    code = f'{rng.choice(["CS", "CSE", "SE", "IT"])}{rng.choice(["", " "])}{rng.randint(100, 499)}'
+    credits = rng.choice(['3.0', '4', '2.5'])
+    return rng.choice([
+        f'{code} {shown} {credits} {grade}',
+        f'{shown} ........ {grade}',
+        f'{shown} | {grade}',
+        f'{code}   {shown}   {credits}   {grade}   {rng.uniform(0, 12):.1f}',
+    ])
+
+def make_transcript(pages, rows_per_page=40, seed=0):
+    """Return (raw transcript text, expected course -> grade dict)."""
+    rng = random.Random(seed)
+    expected = {}
+    lines = []
+    for page in range(pages):
+        lines.append(f'UNIVERSITY OFFICIAL TRANSCRIPT        Page {page + 1} of {pages}')
+        lines.append(f'Student: Jane Doe    ID: 20{rng.randint(100000, 999999)}')
+        lines.append(f'Term {2015 + page // 2} {"Fall" if page % 2 else "Spring"}')
+        for _ in range(rows_per_page):
+            if rng.random() < 0.25:
+                lines.append(rng.choice([
+                    f'Term GPA {rng.uniform(2, 4):.2f}   Cumulative GPA {rng.uniform(2, 4):.2f}',
+                    f'MATH {rng.randint(100, 499)} Linear Algebra 3.0 {rng.choice(GRADES)}',
+                    'Academic Standing: Good',
+                    '',
+                ]))
+                continue
+            course = rng.choice(CANONICAL_COURSES)
+            grade = rng.choice(GRADES)
+            lines.append(course_row(course, grade, rng))
+            expected[course] = 'F' if grade[0] == 'E' else grade[0]
+    return '\n'.join(lines), expected
+
+def run(pages_list, repeat):
+    print(f'{"pages":>6} {"lines":>8} {"MB":>7} {"parse ms":>9} {"lines/s":>11} {"accuracy":>9}')
+    for pages in pages_list:
+        raw, expected = make_transcript(pages, seed=pages)
+        cleaned = clean_transcript_text(raw)
+        lines = cleaned.splitlines()
+
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parsed = parse_transcript_grades(lines)
+            best = min(best, time.perf_counter() - start)
+
+        correct = sum(1 for course, grade in expected.items() if parsed.get(course) == grade)
+        print(f'{pages:>6} {len(lines):>8} {len(cleaned) / 1e6:>7.2f} {best * 1000:>9.1f} '
+              f'{len(lines) / best:>11,.0f} {correct / max(len(expected), 1):>9.1%}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.pages, args.repeat)
@@ -0,0 +1,189 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from timing import span
+
+# Applied once per pooled connection instead of once per query block
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',  # 256 MB
+    'PRAGMA cache_size=-65536',    # 64 MB
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+)
+
+class ConnectionPool:
+    """A bounded pool of long-lived SQLite connections to one database file.
+
+    A thread that already holds a connection gets the same one back, so nested
+    `with Database(...)` blocks inside one request share a connection (and its
+    transaction) instead of opening another.
+    """
+
+    def __init__(self, db_file, max_connections=8, timeout=10, cached_statements=256):
+        self.db_file = db_file
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self):
+        # isolation_level=None: statements autocommit unless Database.transaction() is open.
+        # cached_statements keeps prepared statements alive for the life of the connection.
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+        if self._closed:
+            raise sqlite3.OperationalError(f'Connection pool for {self.db_file} is closed')
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.max_connections
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(f'No free connection to {self.db_file} after {self.timeout}s')
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        """Close the pool: idle connections now, connections in use when they are released."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Pools inherited from a parent process; kept referenced so their connections are never closed here
+_inherited_pools = []
+
+def get_pool(db_file):
+    pool = _pools.get(db_file)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(db_file, ConnectionPool(db_file))
+    return pool
+
+def close_pool(db_file):
+    """Close a path's pool and forget it; the next get_pool for the path opens a new one."""
+    with _pools_lock:
+        pool = _pools.pop(db_file, None)
+    if pool is not None:
+        pool.close_all()
+
+def reset_pools_after_fork():
+    """Start a forked child with no connections; SQLite connections must not cross a fork."""
+    global _pools, _pools_lock
+    _inherited_pools.extend(_pools.values())
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_pools_after_fork)
+
+class Database:
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = get_pool(self.db_file).acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.conn:
+            get_pool(self.db_file).release(self.conn)
+            self.conn = None
+
+    @contextmanager
+    def transaction(self):
+        """Group statements into one transaction (one commit) instead of autocommitting each.
+
+        Nested calls join the outermost transaction.
+        """
+        if self.conn.in_transaction:
+            yield self
+            return
+        # IMMEDIATE takes the write lock up front so concurrent writers wait on
+        # busy_timeout instead of failing with "database is locked" on upgrade
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self
+        except BaseException:
+            # SQLite may already have rolled back (a full disk, an interrupt); don't mask the error
+            if self.conn.in_transaction:
+                self.conn.execute('ROLLBACK')
+            raise
+        else:
+            self.conn.execute('COMMIT')
+
+    def execute(self, query, params=()):
+        with span('db_query'):
+            return self.conn.execute(query, params)
+
+    def executemany(self, query, seq_of_params):
+        with span('db_query'):
+            return self.conn.executemany(query, seq_of_params)
+
+    def fetchone(self, query, params=()):
+        with span('db_query'):
+            return self.conn.execute(query, params).fetchone()
+
+    def fetchall(self, query, params=()):
+        with span('db_query'):
+            return self.conn.execute(query, params).fetchall()
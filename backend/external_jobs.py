@@ -0,0 +1,178 @@
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import EXTERNAL_REQUESTS, get_logger
+
+log = get_logger('external_jobs')
+
+JOBS_API_URL = os.environ.get('JOBS_API_URL', 'https://jobs-search-api.p.rapidapi.com/getjobs')
+# Never commit a key: without RAPIDAPI_KEY external fetching is disabled and searches use stored jobs only
+JOBS_API_KEY = os.environ.get('RAPIDAPI_KEY', '')
+
+def job_dedupe_key(title, location, company):
+    """Normalized title|location|company key used to spot re-fetched jobs."""
+    return '|'.join(' '.join((value or '').lower().split()) for value in (title, location, company))
+
+def normalize_job(job):
+    """Format one job from the external API for our database, or None if it is unusable."""
+    if not job.get('title') or not job.get('company'):
+        return None
+    return {
+        'title': job.get('title', '').strip(),
+        'description': (job.get('description') or '').strip(),
+        'location': (job.get('location') or '').strip(),
+        'company': job.get('company', '').strip(),
+        'job_type': (job.get('job_type') or 'Full Time').strip(),
+        'is_remote': bool(job.get('is_remote', False)),
+        'external_job_id': job.get('job_id') or str(uuid.uuid4()),
+        'job_url': job.get('url') or job.get('job_url', ''),
+        'source': 'external_api'
+    }
+
+class ConcurrentJobFetcher:
+    """Fans one search out to the jobs API per site, location and page.
+
+    Requests run on a bounded thread pool over one keep-alive session. Results
+    are normalized and merged as each request completes, and the whole fetch
+    is bounded by a deadline: whatever has arrived by then is returned.
+    """
+
+    def __init__(self, base_url=JOBS_API_URL, api_key=JOBS_API_KEY, sites=('indeed', 'linkedin'),
+                 default_locations=('mumbai',), results_per_request=10, pages=1, max_workers=8,
+                 deadline=12.0, request_timeout=10.0, max_retries=3, backoff=0.5):
+        self.base_url = base_url
+        self.sites = tuple(sites)
+        self.default_locations = tuple(default_locations)
+        self.results_per_request = results_per_request
+        self.pages = pages
+        self.deadline = deadline
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.api_key = api_key
+        self.max_workers = max_workers
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """New request threads and session; a forked child must not reuse the parent's keep-alive sockets."""
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'x-rapidapi-key': self.api_key,
+            'x-rapidapi-host': 'jobs-search-api.p.rapidapi.com',
+            'Content-Type': 'application/json'
+        })
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job-fetch')
+
+    def shutdown(self, wait=True):
+        """Stop the request threads and close the keep-alive connections."""
+        self._executor.shutdown(wait=wait)
+        self.session.close()
+
+    def build_requests(self, query, job_type, location):
+        """One request body per (site, location, page); ';' separates several locations."""
+        locations = [loc.strip() for loc in (location or '').split(';') if loc.strip()] or self.default_locations
+        bodies = []
+        for site in self.sites:
+            for loc in locations:
+                for page in range(self.pages):
+                    body = {
+                        'search_term': query or 'software',
+                        'location': loc,
+                        'results_wanted': self.results_per_request,
+                        'site_name': [site],
+                        'distance': 25,
+                        'job_type': job_type.lower().replace(' ', '') if job_type else 'fulltime',
+                        'is_remote': False,
+                        'linkedin_fetch_description': True,
+                        'hours_old': 168  # Last 7 days
+                    }
+                    if page:
+                        body['offset'] = page * self.results_per_request
+                    bodies.append(body)
+        return bodies
+
+    def fetch(self, query, job_type, location, deadline=None):
+        """Return merged, normalized jobs, or None if every request failed or no API key is set."""
+        if not self.api_key:
+            log.warning("RAPIDAPI_KEY is not set; external job fetching is disabled")
+            return None
+        deadline_at = time.monotonic() + (self.deadline if deadline is None else deadline)
+        futures = [
+            self._executor.submit(self._fetch_one, body, deadline_at)
+            for body in self.build_requests(query, job_type, location)
+        ]
+
+        merged = {}
+        seen_ids = set()
+        succeeded = 0
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline_at - time.monotonic())):
+                jobs = future.result()
+                if jobs is None:
+                    continue
+                succeeded += 1
+                for job in jobs:
+                    key = job_dedupe_key(job['title'], job['location'], job['company'])
+                    if key in merged or job['external_job_id'] in seen_ids:
+                        continue
+                    merged[key] = job
+                    seen_ids.add(job['external_job_id'])
+        except FuturesTimeout:
+            for future in futures:
+                future.cancel()
+            log.warning("Job fetch deadline reached",
+                        extra={'answered': succeeded, 'requests': len(futures), 'jobs': len(merged)})
+
+        return list(merged.values()) if succeeded else None
+
+    def _fetch_one(self, body, deadline_at):
+        site = body['site_name'][0]
+        for attempt in range(self.max_retries):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                response = self.session.post(self.base_url, json=body, timeout=min(self.request_timeout, remaining))
+            except requests.exceptions.RequestException as e:
+                EXTERNAL_REQUESTS.labels(site, 'error').inc()
+                log.warning("Jobs API request failed",
+                            extra={'site': site, 'attempt': attempt + 1, 'max_retries': self.max_retries, 'error': str(e)})
+                self._sleep(self.backoff * (2 ** attempt), deadline_at)
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                EXTERNAL_REQUESTS.labels(site, 'rate_limited' if response.status_code == 429 else 'http_error').inc()
+                retry_after = response.headers.get('Retry-After')
+                try:
+                    delay = float(retry_after) if retry_after else self.backoff * (2 ** attempt)
+                except ValueError:
+                    delay = self.backoff * (2 ** attempt)
+                self._sleep(delay, deadline_at)
+                continue
+            if not response.ok:
+                # Any other 4xx (bad key, bad request) fails the same way on every retry
+                EXTERNAL_REQUESTS.labels(site, 'rejected').inc()
+                log.error("Jobs API rejected the request",
+                          extra={'site': site, 'status': response.status_code, 'response': response.text[:200]})
+                return None
+
+            try:
+                data = response.json()
+            except ValueError:
+                EXTERNAL_REQUESTS.labels(site, 'invalid_json').inc()
+                self._sleep(self.backoff * (2 ** attempt), deadline_at)
+                continue
+
+            EXTERNAL_REQUESTS.labels(site, 'ok').inc()
+            return [job for job in map(normalize_job, (data or {}).get('jobs') or []) if job]
+        return None
+
+    @staticmethod
+    def _sleep(delay, deadline_at):
+        time.sleep(max(0.0, min(delay, deadline_at - time.monotonic())))
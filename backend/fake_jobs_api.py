@@ -0,0 +1,112 @@
+"""Local stand-in for the RapidAPI jobs search endpoint.
+
+Simulates per-request latency and rate limiting so the external fetcher can
+be exercised without network access; tests can also script the replies to
+the first requests (start_server's script):
+
+    python fake_jobs_api.py --port 8765 --latency 0.5 --rate-limit 0.2
+    RAPIDAPI_KEY=dev JOBS_API_URL=http://127.0.0.1:8765/getjobs python app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROLES = ['Engineer', 'Developer', 'Analyst', 'Architect', 'Consultant', 'Intern']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries']
+
+def make_jobs(body):
+    """Deterministic jobs for one request; the same posting appears on every site."""
+    term = (body.get('search_term') or 'software').title()
+    location = body.get('location') or 'Remote'
+    site = (body.get('site_name') or ['indeed'])[0]
+    offset = int(body.get('offset') or 0)
+    jobs = []
+    for i in range(offset, offset + int(body.get('results_wanted') or 10)):
+        company = COMPANIES[(i // len(ROLES)) % len(COMPANIES)]
+        jobs.append({
+            'job_id': f'{site}-{location}-{i}',
+            'title': f'{term} {ROLES[i % len(ROLES)]}',
+            'company': company,
+            'location': location.title(),
+            'description': f'{term} role number {i} at {company}.',
+            'job_type': 'Full Time',
+            'is_remote': i % 3 == 0,
+            'job_url': f'https://jobs.example.com/{site}/{i}'
+        })
+    return jobs
+
+class FakeJobsHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    jitter = 0.0
+    rate_limit = 0.0
+    script = deque()  # (status, headers) replies given, in order, before any regular one
+    received = []     # Bodies of the requests answered so far
+    lock = threading.Lock()
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        with self.lock:
+            self.received.append(body)
+            scripted = self.script.popleft() if self.script else None
+
+        if scripted:
+            status, headers = scripted
+            self._reply(status, {'message': f'Scripted {status}'}, headers)
+        elif random.random() < self.rate_limit:
+            self._reply(429, {'message': 'Too many requests'}, {'Retry-After': '0.1'})
+        else:
+            self._reply(200, {'jobs': make_jobs(body)})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (deadline reached)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(port=0, latency=0.0, jitter=0.0, rate_limit=0.0, script=()):
+    """Start the stand-in on a background thread; returns (server, base_url).
+
+    script lists (status, headers) replies for the first requests, e.g.
+    [(503, {}), (429, {'Retry-After': '1'})]; server.RequestHandlerClass.received
+    collects the request bodies.
+    """
+    handler = type('ConfiguredFakeJobsHandler', (FakeJobsHandler,), {
+        'latency': latency, 'jitter': jitter, 'rate_limit': rate_limit,
+        'script': deque(script), 'received': [], 'lock': threading.Lock(),
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/getjobs'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.5, help='extra random latency, in seconds')
+    parser.add_argument('--rate-limit', type=float, default=0.2, help='fraction of requests answered with 429')
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency, args.jitter, args.rate_limit)
+    print(f'Fake jobs API listening on {url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from metrics import get_logger
+
+log = get_logger('job_refresh')
+
+def normalize_search_key(query, job_type, location):
+    """Case- and whitespace-insensitive key for one external search."""
+    return tuple(' '.join((value or '').lower().split()) for value in (query, job_type, location))
+
+class JobRefresher:
+    """Runs external job refreshes on background workers, off the request path.
+
+    Refreshes are deduplicated per normalized (query, job_type, location) key:
+    concurrent identical searches share the one in-flight refresh, and a key
+    that refreshed successfully is not fetched again until its TTL expires.
+    """
+
+    def __init__(self, refresh, ttl=900, failure_ttl=60, max_workers=2, max_keys=10000):
+        self._refresh = refresh
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_keys = max_keys
+        self.max_workers = max_workers
+        self._fresh_until = {}
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """New workers and lock; refreshes in flight in a parent process never finish in the child."""
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job-refresh')
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def schedule(self, query, job_type, location):
+        """Queue a refresh for this search unless one is running or still fresh.
+
+        Returns True while a refresh for the key is pending, i.e. when newer
+        results may appear if the caller searches again.
+        """
+        key = normalize_search_key(query, job_type, location)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._in_flight:
+                return True
+            if self._fresh_until.get(key, 0) > now:
+                return False
+            if len(self._fresh_until) > self.max_keys:
+                self._prune(now)
+            self._in_flight[key] = self._executor.submit(self._run, key, query, job_type, location)
+        return True
+
+    def wait(self, query, job_type, location, timeout=None):
+        """Block until the in-flight refresh for this search (if any) finishes."""
+        with self._lock:
+            future = self._in_flight.get(normalize_search_key(query, job_type, location))
+        if future is not None:
+            future.result(timeout)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, key, query, job_type, location):
+        ok = False
+        try:
+            ok = self._refresh(query, job_type, location)
+        except Exception:
+            log.exception("Background refresh failed", extra={'key': '|'.join(key)})
+        finally:
+            # Failed fetches get a short TTL so they are retried, but not on every keystroke
+            ttl = self.ttl if ok else self.failure_ttl
+            with self._lock:
+                self._in_flight.pop(key, None)
+                self._fresh_until[key] = time.monotonic() + ttl
+
+    def _prune(self, now):
+        for key in [k for k, until in self._fresh_until.items() if until <= now]:
+            del self._fresh_until[key]
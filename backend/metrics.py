@@ -0,0 +1,138 @@
+"""Request timing, Prometheus metrics and rate-limited logging for the Flask app.
+
+Stages (external fetch, DB queries, PDF extraction, serialization) are timed
+with `span(stage)` from timing.py. Every span feeds a histogram; spans inside
+a request are also summed per request and returned in the Server-Timing
+header. The metrics are served in Prometheus text format on /metrics.
+"""
+import logging
+import os
+import threading
+import time
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from timing import request_spans, span
+
+REQUEST_SECONDS = Histogram(
+    'flask_request_duration_seconds', 'Time spent handling a request', ['method', 'endpoint', 'status']
+)
+FETCHED_JOBS = Counter('flask_fetched_jobs_total', 'External jobs passed to the store, by outcome', ['outcome'])
+EXTERNAL_REQUESTS = Counter('flask_external_requests_total', 'Requests to the jobs API, by outcome', ['site', 'outcome'])
+RESPONSE_CACHE = Counter('flask_response_cache_total', 'Cached endpoint requests, by result', ['endpoint', 'result'])
+RESPONSE_CACHE_BYTES = Gauge('flask_response_cache_bytes', 'Size of the response bodies held in the response cache')
+PASSWORD_REJECTIONS = Counter('flask_password_pool_rejections_total', 'Password hash/verify calls shed by the pool', ['reason'])
+SESSION_LOOKUPS = Counter('flask_session_lookups_total', 'Server-side session loads, by cache result', ['result'])
+LOG_SUPPRESSED = Counter('flask_log_messages_suppressed_total', 'Log records dropped by rate limiting', ['logger'])
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify() with its encoding recorded as the 'serialize' stage."""
+
+    def response(self, *args, **kwargs):
+        with span('serialize'):
+            return super().response(*args, **kwargs)
+
+def init_app(app):
+    """Time every request, record its spans and serve /metrics."""
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_timer():
+        request.environ['metrics.start'] = time.perf_counter()
+        request.environ['metrics.token'] = request_spans.set({})
+
+    @app.after_request
+    def record_request(response):
+        start = request.environ.get('metrics.start')
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.labels(request.method, endpoint, response.status_code).observe(elapsed)
+        timings = [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in (request_spans.get() or {}).items()]
+        response.headers['Server-Timing'] = ', '.join(timings + [f'total;dur={elapsed * 1000:.2f}'])
+        return response
+
+    @app.teardown_request
+    def clear_request_spans(exc):
+        token = request.environ.pop('metrics.token', None)
+        if token is not None:
+            request_spans.reset(token)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+# Attributes every LogRecord has; anything else was passed in `extra` and is logged as a field
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+class LogfmtFormatter(logging.Formatter):
+    """One line per record: time, level, logger, message, then the `extra` fields as key=value."""
+
+    def format(self, record):
+        fields = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        line = ' '.join(f'{key}={_logfmt_value(value)}' for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+def _logfmt_value(value):
+    text = str(value)
+    if not text or any(c in text for c in ' ="'):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `burst` records per message template through each `interval` seconds.
+
+    Warnings and errors in a failure loop (one per retried request, say) would
+    otherwise flood the log. The next record let through after a quiet
+    interval carries a `suppressed` count of what was dropped.
+    """
+
+    def __init__(self, burst=10, interval=60.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - window_start >= self.interval:
+                window_start, count = now, 0
+            if count >= self.burst:
+                self._windows[key] = (window_start, count, suppressed + 1)
+                LOG_SUPPRESSED.labels(record.name).inc()
+                return False
+            self._windows[key] = (window_start, count + 1, 0)
+            if len(self._windows) > 10000:
+                self._windows = {k: v for k, v in self._windows.items() if now - v[0] < self.interval}
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+def configure_logging(level=None):
+    """Send the app's loggers to stderr as rate-limited logfmt; LOG_LEVEL sets the level (default INFO)."""
+    logger = logging.getLogger('koraquest')
+    if logger.handlers:
+        return logger
+    handler = logging.StreamHandler()
+    handler.setFormatter(LogfmtFormatter())
+    handler.addFilter(RateLimitFilter())
+    logger.addHandler(handler)
+    logger.setLevel(level or os.environ.get('LOG_LEVEL', 'INFO').upper())
+    logger.propagate = False
+    return logger
+
+def get_logger(name):
+    return logging.getLogger(f'koraquest.{name}')
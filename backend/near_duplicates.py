@@ -0,0 +1,197 @@
+"""Near-duplicate detection for jobs: MinHash signatures and an LSH band index.
+
+The same posting syndicated through several sites arrives with small
+differences in its title or description, which the exact dedupe keys miss.
+A job's title, company and description are cut into word shingles, and a
+MinHash signature of NUM_PERM values estimates the Jaccard similarity of two
+shingle sets as the fraction of positions where their signatures agree.
+
+Signatures are split into BANDS bands of ROWS values, and each band is
+hashed to a bucket in JobBands. Jobs that share any bucket are candidates,
+so finding a job's near-duplicates costs BANDS index lookups however large
+the catalog is. Candidates are then checked against THRESHOLD using the
+full signatures stored in JobSignatures. The same role offered in two
+cities is two jobs, so a candidate must also have the same normalized
+location.
+"""
+import re
+import zlib
+from collections import namedtuple
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated similarity at or above which two jobs are one posting. With 16
+# bands of 8 rows, a pair at 0.8 shares a bucket 95% of the time; a pair at 0.5, 6%
+THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+_TOKEN_RE = re.compile(r'\w+')
+_SHIFT = np.uint64(32)
+_SIGNATURE_DTYPE = np.dtype('<u4')
+_FNV_PRIME = np.uint64(0x100000001b3)
+# The permutations must never change, or stored signatures stop being comparable;
+# RandomState streams are stable across numpy releases
+_rng = np.random.RandomState(1)
+_A = _rng.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # odd multipliers
+_B = _rng.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2)
+_SHINGLE_MULTIPLIERS = _rng.randint(0, 1 << 63, SHINGLE_SIZE - 1, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+# A new job's nearest match: a stored job (job_id) or an earlier job of the same batch (index)
+Match = namedtuple('Match', ['job_id', 'index', 'similarity'])
+
+def token_hashes(title, company, description):
+    """crc32 of each lowercased word of the job text, padded with zeros to at least one shingle."""
+    tokens = _TOKEN_RE.findall(' '.join(text or '' for text in (title, company, description)).lower())
+    hashes = [zlib.crc32(token.encode('utf-8')) for token in tokens]
+    return hashes + [0] * (SHINGLE_SIZE - len(hashes))
+
+def signatures(jobs, chunk_size=64):
+    """MinHash signatures of (title, company, description) texts: one row of NUM_PERM uint32 values per job.
+
+    A shingle is hashed from the hashes of its SHINGLE_SIZE words, so each
+    word is hashed once; a repeated shingle leaves the minimums unchanged,
+    so the multiset of shingles stands in for the set. The shingles of
+    chunk_size jobs are permuted together and each job's minimums taken over
+    its slice; chunks keep the working array in cache.
+    """
+    jobs = list(jobs)
+    result = np.empty((len(jobs), NUM_PERM), dtype=_SIGNATURE_DTYPE)
+    for chunk in range(0, len(jobs), chunk_size):
+        lengths, hashes = [], []
+        for title, company, description in jobs[chunk:chunk + chunk_size]:
+            words = token_hashes(title, company, description)
+            lengths.append(len(words))
+            hashes.extend(words)
+        words = np.array(hashes, dtype=np.uint64)
+        ends = np.cumsum(lengths)
+        with np.errstate(over='ignore'):
+            shingles = words[SHINGLE_SIZE - 1:].copy()
+            for offset in range(SHINGLE_SIZE - 1):
+                shingles += words[offset:len(words) - SHINGLE_SIZE + 1 + offset] * _SHINGLE_MULTIPLIERS[offset]
+            # Drop the shingles that run from one job into the next
+            shingles = np.delete(shingles, (ends[:-1, None] - np.arange(SHINGLE_SIZE - 1, 0, -1)).ravel())
+            starts = ends - np.array(lengths) - (SHINGLE_SIZE - 1) * np.arange(len(lengths))
+            # Multiply-add-shift hashing: the high 32 bits of a * x + b, which wraps modulo 2**64
+            permuted = np.outer(_A, shingles)
+            permuted += _B[:, None]
+        permuted >>= _SHIFT
+        result[chunk:chunk + len(lengths)] = np.minimum.reduceat(permuted, starts, axis=1).T
+    return result
+
+def normalize_location(location):
+    """Lowercased location with runs of whitespace collapsed, as in the dedupe keys."""
+    return ' '.join((location or '').lower().split())
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return np.count_nonzero(a == b) / NUM_PERM
+
+def buckets(sigs):
+    """One bucket per band of each signature: a signed 64-bit hash of the band number and its values.
+
+    Returns lists of BANDS integers, as SQLite stores them; the arithmetic
+    wraps modulo 2**64 on purpose.
+    """
+    bands = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    hashed = np.broadcast_to(np.arange(BANDS, dtype=np.uint64), bands.shape[:2]).copy()
+    with np.errstate(over='ignore'):
+        for row in range(ROWS):
+            hashed = (hashed ^ bands[:, :, row]) * _FNV_PRIME
+        hashed ^= hashed >> np.uint64(29)
+    return hashed.view(np.int64).tolist()
+
+def index_jobs(db, signed, batch_size=500):
+    """Store the signatures and band buckets of (job_id, signature) pairs, replacing earlier ones."""
+    if not signed:
+        return
+    job_ids = [job_id for job_id, _ in signed]
+    sigs = np.array([sig for _, sig in signed], dtype=_SIGNATURE_DTYPE)
+    for i in range(0, len(job_ids), batch_size):
+        batch = job_ids[i:i + batch_size]
+        db.execute(f"DELETE FROM JobBands WHERE job_id IN ({', '.join('?' * len(batch))})", batch)
+    db.executemany(
+        'INSERT OR REPLACE INTO JobSignatures (job_id, signature) VALUES (?, ?)',
+        [(job_id, sig.tobytes()) for job_id, sig in signed]
+    )
+    # In bucket order, consecutive inserts land on neighbouring pages of the index
+    db.executemany(
+        'INSERT OR IGNORE INTO JobBands (bucket, job_id) VALUES (?, ?)',
+        sorted((bucket, job_id) for job_id, bucket_list in zip(job_ids, buckets(sigs)) for bucket in bucket_list)
+    )
+
+def index_unsigned_jobs(db, batch_size=1000):
+    """Sign the Jobs rows added since the newest signed one; returns how many were signed.
+
+    Fetched jobs are signed as they are stored. Org posts, rows synced from
+    Django and generated fixtures are written elsewhere and caught up here:
+    ids only grow, so this is one index seek when nothing is missing.
+    """
+    last_id = db.fetchone('SELECT COALESCE(MAX(job_id), 0) FROM JobSignatures')[0]
+    signed = 0
+    while True:
+        rows = db.fetchall(
+            'SELECT id, job_title, org_name, job_description FROM Jobs WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, batch_size)
+        )
+        if not rows:
+            return signed
+        sigs = signatures((row['job_title'], row['org_name'], row['job_description']) for row in rows)
+        index_jobs(db, list(zip((row['id'] for row in rows), sigs)))
+        signed += len(rows)
+        last_id = rows[-1]['id']
+
+def cluster(db, signatures, locations, threshold=THRESHOLD, batch_size=500):
+    """Find the near-duplicate, if any, of each new job's signature (rows of signatures()).
+
+    A job matches the most similar stored job, or else an earlier job in
+    the list that had no match itself, when the estimated similarity reaches
+    threshold and the two jobs share a location. Returns a Match or None per
+    signature; None marks a new canonical job.
+    """
+    locations = [normalize_location(location) for location in locations]
+    job_buckets = buckets(signatures)
+    wanted = sorted({bucket for bucket_list in job_buckets for bucket in bucket_list})
+    stored = {}
+    for i in range(0, len(wanted), batch_size):
+        batch = wanted[i:i + batch_size]
+        for row in db.fetchall(
+            f"SELECT bucket, job_id FROM JobBands WHERE bucket IN ({', '.join('?' * len(batch))})", batch
+        ):
+            stored.setdefault(row['bucket'], []).append(row['job_id'])
+
+    candidate_ids = list({job_id for job_ids in stored.values() for job_id in job_ids})
+    stored_signatures, stored_locations = {}, {}
+    for i in range(0, len(candidate_ids), batch_size):
+        batch = candidate_ids[i:i + batch_size]
+        for row in db.fetchall(f'''
+            SELECT JobSignatures.job_id, JobSignatures.signature, Jobs.job_location
+            FROM JobSignatures JOIN Jobs ON Jobs.id = JobSignatures.job_id
+            WHERE JobSignatures.job_id IN ({', '.join('?' * len(batch))})
+        ''', batch):
+            stored_signatures[row['job_id']] = np.frombuffer(row['signature'], dtype=_SIGNATURE_DTYPE)
+            stored_locations[row['job_id']] = normalize_location(row['job_location'])
+
+    matches = []
+    canonical = {}  # bucket -> indexes of earlier new jobs without a match
+    for index, (sig, bucket_list) in enumerate(zip(signatures, job_buckets)):
+        best = None
+        for job_id in {job_id for bucket in bucket_list for job_id in stored.get(bucket, ())}:
+            if stored_locations.get(job_id) != locations[index]:
+                continue
+            score = similarity(sig, stored_signatures[job_id])
+            if score >= threshold and (best is None or score > best.similarity):
+                best = Match(job_id, None, score)
+        if best is None:
+            for earlier in {earlier for bucket in bucket_list for earlier in canonical.get(bucket, ())}:
+                if locations[earlier] != locations[index]:
+                    continue
+                score = similarity(sig, signatures[earlier])
+                if score >= threshold and (best is None or score > best.similarity):
+                    best = Match(None, earlier, score)
+        if best is None:
+            for bucket in bucket_list:
+                canonical.setdefault(bucket, []).append(index)
+        matches.append(best)
+    return matches
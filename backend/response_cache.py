@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+CachedResponse = namedtuple('CachedResponse', 'generation body mimetype')
+
+def response_etag(generation, key):
+    """ETag for a cached endpoint: the same catalog generation and parameters give the same body."""
+    digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).hexdigest()
+    return f'{generation}-{digest}'
+
+class ResponseCache:
+    """In-memory LRU of serialized responses, bounded by the total size of their bodies.
+
+    Entries are tagged with the catalog generation they were built from; a
+    lookup under a newer generation misses and drops the stale entry, so a
+    write to the catalog invalidates every cached listing at once. Bodies
+    larger than max_entry_bytes are not cached at all.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.generation != generation:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, generation, body, mimetype):
+        if len(body) > self.max_entry_bytes:
+            return None
+        entry = CachedResponse(generation, body, mimetype)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        self.size -= len(self._entries.pop(key).body)
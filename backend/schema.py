@@ -0,0 +1,334 @@
+"""Versioned schema for KoraQuest.db.
+
+Migrations are numbered and forward-only: each runs once, inside the
+transaction that records it in SchemaVersion. App startup only reads the
+current version, so restarts and new workers keep the stored job catalog.
+
+    python schema.py [KoraQuest.db]
+"""
+import sys
+from sqlite3 import OperationalError
+from database import Database
+from external_jobs import job_dedupe_key
+from near_duplicates import index_unsigned_jobs
+from metrics import configure_logging, get_logger
+
+log = get_logger('schema')
+
+def _baseline(db):
+    """The tables the app created at startup before versioning; a no-op on databases that have them."""
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS Talent (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        phone TEXT NOT NULL,
+        resume TEXT NOT NULL,
+        grades TEXT  -- JSON course -> grade dict parsed from the transcript
+    )
+    ''')
+    talent_columns = [column['name'] for column in db.fetchall('PRAGMA table_info(Talent)')]
+    if 'grades' not in talent_columns:
+        db.execute('ALTER TABLE Talent ADD COLUMN grades TEXT')
+
+    # Background transcript processing jobs
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS TranscriptJobs (
+        id TEXT PRIMARY KEY,
+        email TEXT NOT NULL,
+        status TEXT NOT NULL,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    ''')
+
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS Organization (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        org_names TEXT NOT NULL UNIQUE,
+        org_password TEXT NOT NULL,
+        org_email TEXT NOT NULL UNIQUE
+    )
+    ''')
+
+    # Server-side session data, keyed by the random id in the session cookie
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS Sessions (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0  -- bumped by every save, so cached copies can tell they are stale
+    )
+    ''')
+
+    # Catalog generation: bumped by every write to Jobs, it versions the cached job listings
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS CatalogState (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL,
+        modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    db.execute('INSERT OR IGNORE INTO CatalogState (id, generation) VALUES (1, 0)')
+
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS Jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        org_email TEXT,
+        job_title TEXT NOT NULL,
+        job_description TEXT,
+        job_location TEXT,
+        job_type TEXT,
+        is_remote INTEGER,
+        org_name TEXT,
+        source TEXT DEFAULT 'created',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        external_job_id TEXT UNIQUE,
+        job_url TEXT,
+        dedupe_key TEXT  -- normalized title|location|company of fetched jobs
+    )
+    ''')
+    jobs_columns = [column['name'] for column in db.fetchall('PRAGMA table_info(Jobs)')]
+    if 'dedupe_key' not in jobs_columns:
+        db.execute('ALTER TABLE Jobs ADD COLUMN dedupe_key TEXT')
+    _backfill_dedupe_keys(db)
+    db.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe_key ON Jobs (dedupe_key)')
+    # Serves newest-first listing and keyset pagination on (created_at, id)
+    db.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created_at_id ON Jobs (created_at, id)')
+
+    # Full-text index over the searchable Jobs columns
+    db.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS Jobs_fts USING fts5(
+        job_title,
+        job_description,
+        job_location,
+        org_name,
+        content='Jobs',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''')
+
+    # Keep Jobs_fts in sync with every write to Jobs
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Jobs_fts_insert AFTER INSERT ON Jobs BEGIN
+        INSERT INTO Jobs_fts (rowid, job_title, job_description, job_location, org_name)
+        VALUES (new.id, new.job_title, new.job_description, new.job_location, new.org_name);
+    END
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Jobs_fts_delete AFTER DELETE ON Jobs BEGIN
+        INSERT INTO Jobs_fts (Jobs_fts, rowid, job_title, job_description, job_location, org_name)
+        VALUES ('delete', old.id, old.job_title, old.job_description, old.job_location, old.org_name);
+    END
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Jobs_fts_update AFTER UPDATE ON Jobs BEGIN
+        INSERT INTO Jobs_fts (Jobs_fts, rowid, job_title, job_description, job_location, org_name)
+        VALUES ('delete', old.id, old.job_title, old.job_description, old.job_location, old.org_name);
+        INSERT INTO Jobs_fts (rowid, job_title, job_description, job_location, org_name)
+        VALUES (new.id, new.job_title, new.job_description, new.job_location, new.org_name);
+    END
+    ''')
+    # Index any rows written before the triggers existed
+    db.execute("INSERT INTO Jobs_fts (Jobs_fts) VALUES ('rebuild')")
+
+def _backfill_dedupe_keys(db):
+    """Key fetched jobs stored before dedupe_key, so re-fetches upsert them; the first row of each key is kept."""
+    rows = db.fetchall(
+        "SELECT id, job_title, job_location, org_name FROM Jobs "
+        "WHERE source = 'external_api' AND dedupe_key IS NULL ORDER BY id"
+    )
+    if not rows:
+        return
+    kept = {row['dedupe_key'] for row in db.fetchall('SELECT dedupe_key FROM Jobs WHERE dedupe_key IS NOT NULL')}
+    keys, duplicates = [], []
+    for row in rows:
+        key = job_dedupe_key(row['job_title'], row['job_location'], row['org_name'])
+        if key in kept:
+            duplicates.append((row['id'],))
+        else:
+            kept.add(key)
+            keys.append((key, row['id']))
+    db.executemany('DELETE FROM Jobs WHERE id = ?', duplicates)
+    db.executemany('UPDATE Jobs SET dedupe_key = ? WHERE id = ?', keys)
+    log.info("Backfilled job dedupe keys", extra={'keyed': len(keys), 'merged': len(duplicates)})
+
+def _query_indexes(db):
+    """Indexes for lookups that scanned their table."""
+    # /organization/applications: one organization's jobs in id order
+    db.execute('CREATE INDEX IF NOT EXISTS idx_jobs_org_email_id ON Jobs (org_email, id)')
+    # SessionStore's periodic purge of expired sessions
+    db.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON Sessions (expires_at)')
+    # Transcript jobs are always looked up for one user
+    db.execute('CREATE INDEX IF NOT EXISTS idx_transcript_jobs_email ON TranscriptJobs (email)')
+
+def _job_change_log(db):
+    """JobChanges: one row per write to Jobs, in commit order; the feed the Django job sync reads."""
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS JobChanges (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL,
+        source TEXT,  -- Jobs.source of the row, so readers can skip rows they wrote themselves
+        op TEXT NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Jobs_changes_insert AFTER INSERT ON Jobs BEGIN
+        INSERT INTO JobChanges (job_id, source, op) VALUES (new.id, new.source, 'insert');
+    END
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Jobs_changes_update AFTER UPDATE ON Jobs BEGIN
+        INSERT INTO JobChanges (job_id, source, op) VALUES (new.id, new.source, 'update');
+    END
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Jobs_changes_delete AFTER DELETE ON Jobs BEGIN
+        INSERT INTO JobChanges (job_id, source, op) VALUES (old.id, old.source, 'delete');
+    END
+    ''')
+    # Rows that predate the log enter it once, so a first sync copies them
+    db.execute("INSERT INTO JobChanges (job_id, source, op) SELECT id, source, 'insert' FROM Jobs ORDER BY id")
+
+def _talent_grade_log(db):
+    """TalentGradeChanges: one row per change to a talent's parsed grades; the Django grade sync reads it."""
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS TalentGradeChanges (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        talent_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Talent_grades_insert AFTER INSERT ON Talent WHEN new.grades IS NOT NULL BEGIN
+        INSERT INTO TalentGradeChanges (talent_id, op) VALUES (new.id, 'insert');
+    END
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Talent_grades_update AFTER UPDATE OF grades, name ON Talent
+    WHEN new.grades IS NOT old.grades OR (new.grades IS NOT NULL AND new.name IS NOT old.name) BEGIN
+        INSERT INTO TalentGradeChanges (talent_id, op) VALUES (new.id, 'update');
+    END
+    ''')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Talent_grades_delete AFTER DELETE ON Talent WHEN old.grades IS NOT NULL BEGIN
+        INSERT INTO TalentGradeChanges (talent_id, op) VALUES (old.id, 'delete');
+    END
+    ''')
+    # Grades parsed before the log existed enter it once
+    db.execute(
+        "INSERT INTO TalentGradeChanges (talent_id, op) "
+        "SELECT id, 'insert' FROM Talent WHERE grades IS NOT NULL ORDER BY id"
+    )
+
+def _near_duplicate_index(db):
+    """MinHash signatures and LSH buckets of Jobs rows, and the alternates folded into them (near_duplicates.py)."""
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS JobSignatures (
+        job_id INTEGER PRIMARY KEY,
+        signature BLOB NOT NULL  -- NUM_PERM little-endian uint32 minimums
+    )
+    ''')
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS JobBands (
+        bucket INTEGER NOT NULL,
+        job_id INTEGER NOT NULL,
+        PRIMARY KEY (bucket, job_id)
+    ) WITHOUT ROWID
+    ''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_job_bands_job_id ON JobBands (job_id)')
+    # Fetched postings that nearly duplicate a stored job: kept as links, not as Jobs rows
+    db.execute('''
+    CREATE TABLE IF NOT EXISTS JobAlternates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        canonical_id INTEGER NOT NULL,
+        external_job_id TEXT NOT NULL UNIQUE,
+        job_title TEXT,
+        org_name TEXT,
+        job_location TEXT,
+        job_url TEXT,
+        similarity REAL NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_job_alternates_canonical_id ON JobAlternates (canonical_id)')
+    db.execute('''
+    CREATE TRIGGER IF NOT EXISTS Jobs_near_duplicates_delete AFTER DELETE ON Jobs BEGIN
+        DELETE FROM JobSignatures WHERE job_id = old.id;
+        DELETE FROM JobBands WHERE job_id = old.id;
+        DELETE FROM JobAlternates WHERE canonical_id = old.id;
+    END
+    ''')
+    index_unsigned_jobs(db)
+
+# (version, description, apply); append only, never edit or reorder an applied migration
+MIGRATIONS = [
+    (1, 'baseline schema', _baseline),
+    (2, 'query indexes', _query_indexes),
+    (3, 'job change log', _job_change_log),
+    (4, 'talent grade change log', _talent_grade_log),
+    (5, 'near-duplicate index', _near_duplicate_index),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(db):
+    """Highest applied migration, 0 for a database that predates versioning."""
+    try:
+        return db.fetchone('SELECT MAX(version) FROM SchemaVersion')[0] or 0
+    except OperationalError:
+        return 0
+
+def migrate(db_file):
+    """Apply any pending migrations; returns the (old, new) schema version.
+
+    Workers starting together may all find the database behind: the first
+    to take the write lock migrates, the rest re-read the version under the
+    lock and find nothing left to do.
+    """
+    with Database(db_file) as db:
+        current = schema_version(db)
+        if current >= SCHEMA_VERSION:
+            return current, current
+        with db.transaction():
+            db.execute('''
+            CREATE TABLE IF NOT EXISTS SchemaVersion (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            current = schema_version(db)
+            for version, description, apply in MIGRATIONS:
+                if version <= current:
+                    continue
+                log.info("Applying migration", extra={'version': version, 'description': description})
+                apply(db)
+                db.execute('INSERT INTO SchemaVersion (version, description) VALUES (?, ?)', (version, description))
+    return current, SCHEMA_VERSION
+
+def ensure_schema(db_file, migrate_schema=True):
+    """Startup check: one query when the schema is current.
+
+    A database behind this code is migrated, or rejected when migrate_schema
+    is false (run `python schema.py` before starting the workers). One ahead
+    of it, from a newer deploy, is used as is: migrations only add.
+    """
+    with Database(db_file) as db:
+        current = schema_version(db)
+    if current < SCHEMA_VERSION:
+        if not migrate_schema:
+            raise RuntimeError(f"{db_file} is at schema version {current}, {SCHEMA_VERSION} is required; "
+                               f"run `python schema.py {db_file}`")
+        migrate(db_file)
+    elif current > SCHEMA_VERSION:
+        log.warning("Database schema is newer than the app", extra={'version': current, 'app_version': SCHEMA_VERSION})
+
+if __name__ == '__main__':
+    configure_logging()
+    old, new = migrate(sys.argv[1] if len(sys.argv) > 1 else 'KoraQuest.db')
+    print(f"Schema version {old} -> {new}" if new != old else f"Schema is current (version {new})")
@@ -0,0 +1,232 @@
+"""Flask API behaviour: python -m unittest test_app (from backend/)."""
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import app
+from database import close_pool
+
+PASSWORD = 'Secret123'
+
+class AppTestCase(unittest.TestCase):
+    """Runs against a fresh KoraQuest.db in a temporary directory shared by the class's tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        cls._tmp = tempfile.TemporaryDirectory()
+        os.chdir(cls._tmp.name)
+        cls.app = app.create_app()
+        cls.client = cls.app.test_client()
+        cls._schedule = app.job_refresher.schedule
+        app.job_refresher.schedule = lambda *args, **kwargs: False
+        # Cached listings are tagged by catalog generation, which every fresh database restarts
+        app.response_cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        app.response_cache.clear()
+        app.job_refresher.schedule = cls._schedule
+        close_pool('KoraQuest.db')
+        os.chdir(cls._cwd)
+        cls._tmp.cleanup()
+
+    @staticmethod
+    def add_job(title, description='', location='Pune', org='Acme', created_at=None):
+        with app.Database('KoraQuest.db') as db:
+            with db.transaction():
+                job_id = db.execute(
+                    "INSERT INTO Jobs (job_title, job_description, job_location, org_name, job_type, created_at) "
+                    "VALUES (?, ?, ?, ?, 'Full Time', COALESCE(?, CURRENT_TIMESTAMP))",
+                    (title, description, location, org, created_at)
+                ).lastrowid
+                app.bump_catalog(db)
+        return job_id
+
+    def search(self, **params):
+        response = self.client.get('/search/jobs', query_string=params)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        return response.get_json()
+
+    def logged_in_talent(self, email):
+        client = self.app.test_client()
+        client.post('/register/talent', json={
+            'name': 'Asha', 'password': PASSWORD, 'email': email, 'phone': '555', 'resume': 'https://example.com/cv'
+        })
+        self.assertEqual(client.post('/login/talent', json={'email': email, 'password': PASSWORD}).status_code, 200)
+        return client
+
+class SearchTests(AppTestCase):
+    """/search/jobs through the Jobs_fts index."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.in_title = cls.add_job('Python Developer', 'Build internal APIs')
+        cls.in_description = cls.add_job('Office Manager', 'Some Python scripting helps')
+        cls.c_plus_plus = cls.add_job('C++ Engineer', 'Low latency trading systems', location='Mumbai')
+        cls.unrelated = cls.add_job('Data Analyst', 'Spreadsheets and reporting')
+
+    def ids(self, **params):
+        return [job['id'] for job in self.search(**params)['jobs']]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.ids(q='python'), [self.in_title, self.in_description])
+        # Terms match as prefixes
+        self.assertEqual(self.ids(q='pyth'), [self.in_title, self.in_description])
+        self.assertEqual(self.ids(q='python office'), [self.in_description])
+
+    def test_location_filter_only_matches_the_location_column(self):
+        self.assertEqual(self.ids(q='engineer', location='mumbai'), [self.c_plus_plus])
+        self.assertCountEqual(self.ids(location='pune'), [self.in_title, self.in_description, self.unrelated])
+
+    def test_fts_syntax_in_the_query_is_plain_text(self):
+        self.assertEqual(self.ids(q='C++'), [self.c_plus_plus])
+        for query in ('"python', 'python OR office', 'NOT python', 'python*)', 'job_title:python', 'NEAR(python'):
+            self.assertEqual(self.client.get('/search/jobs', query_string={'q': query}).status_code, 200, query)
+        self.assertEqual(self.ids(q='python AND'), [])  # 'and' is just another term
+        # Nothing left to match on: the newest-first listing
+        self.assertEqual(self.ids(q='"*:()'), [self.unrelated, self.c_plus_plus, self.in_description, self.in_title])
+
+class PaginationTests(AppTestCase):
+    """Cursor paging of /search/jobs: keyset for the newest-first listing, offset over a snapshot when ranked."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Ties on created_at are broken by id
+        days = ['2024-01-01', '2024-01-01', '2024-01-03', '2024-01-02', '2024-01-03', '2024-01-01', '2024-01-02']
+        cls.job_ids = [cls.add_job(f'Engineer {i}', created_at=f'{day} 09:00:00') for i, day in enumerate(days)]
+        cls.newest_first = [job_id for _, job_id in sorted(zip(days, cls.job_ids), reverse=True)]
+
+    @staticmethod
+    def ids_of(page):
+        return [job['id'] for job in page['jobs']]
+
+    @staticmethod
+    def delete_job(job_id):
+        with app.Database('KoraQuest.db') as db:
+            with db.transaction():
+                db.execute('DELETE FROM Jobs WHERE id = ?', (job_id,))
+                app.bump_catalog(db)
+
+    def pages(self, cursor_field, **params):
+        """Follow cursor_field from the first page; returns the id lists of every page."""
+        pages = []
+        cursor = params.pop('cursor', None)
+        while True:
+            page = self.search(**params, **({'cursor': cursor} if cursor else {}))
+            pages.append(self.ids_of(page))
+            cursor = page[cursor_field]
+            if cursor is None:
+                return pages, page
+
+    def test_keyset_pages_cover_every_job_once(self):
+        pages, last = self.pages('next_cursor', per_page=2, count='exact')
+        self.assertEqual(last['total_count'], 7)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual([job_id for page in pages for job_id in page], self.newest_first)
+
+        # And back again from the last page
+        back, _ = self.pages('prev_cursor', per_page=2, cursor=last['prev_cursor'])
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_ranked_pages_ignore_jobs_added_after_the_first(self):
+        first = self.search(q='engineer', per_page=4)
+        new_job = self.add_job('Engineer 7')
+        self.addCleanup(self.delete_job, new_job)
+
+        pages, _ = self.pages('next_cursor', q='engineer', per_page=4, cursor=first['next_cursor'])
+        ranked = self.ids_of(first) + [job_id for page in pages for job_id in page]
+        self.assertCountEqual(ranked, self.job_ids)
+        # A fresh search sees it
+        self.assertIn(new_job, self.ids_of(self.search(q='engineer', per_page=100)))
+
+    def test_cursor_from_another_listing_is_rejected(self):
+        ranked = self.search(q='engineer', per_page=2)['next_cursor']
+        for cursor in (ranked, 'not-a-cursor'):
+            self.assertEqual(self.client.get('/search/jobs', query_string={'cursor': cursor}).status_code, 400)
+
+class ListingCacheTests(AppTestCase):
+    """ETags and the response cache of /jobs, versioned by the catalog generation."""
+
+    def test_unchanged_listing_is_not_modified(self):
+        self.add_job('Backend Engineer')
+        first = self.client.get('/jobs')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['Cache-Control'], 'no-cache')
+
+        for headers in ({'If-None-Match': first.headers['ETag']},
+                        {'If-Modified-Since': first.headers['Last-Modified']}):
+            response = self.client.get('/jobs', headers=headers)
+            self.assertEqual(response.status_code, 304, headers)
+            self.assertEqual(response.get_data(), b'')
+        # Other parameters, other ETag
+        self.assertNotEqual(self.client.get('/jobs?fields=id').headers['ETag'], first.headers['ETag'])
+
+    def test_catalog_write_changes_the_etag(self):
+        self.add_job('Data Analyst')
+        first = self.client.get('/jobs')
+        self.assertEqual(self.client.get('/jobs').get_data(), first.get_data())  # From the response cache
+
+        job_id = self.add_job('QA Engineer')
+        response = self.client.get('/jobs', headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], first.headers['ETag'])
+        self.assertIn(job_id, [job['id'] for job in response.get_json()])
+
+class StreamingTests(AppTestCase):
+    """/jobs streamed as a JSON array or NDJSON, with ?fields= projection."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.job_ids = [cls.add_job(f'Engineer {i}', f'Role {i}') for i in range(5)]
+
+    def test_ndjson_is_one_job_per_line(self):
+        response = self.client.get('/jobs?format=ndjson&fields=id,job_title')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'id': job_id, 'job_title': f'Engineer {i}'} for i, job_id in enumerate(self.job_ids)]
+        )
+
+    def test_fields_pick_the_columns(self):
+        jobs = self.client.get('/jobs?fields=job_title, id').get_json()
+        self.assertEqual([list(job) for job in jobs], [['id', 'job_title']] * 5)
+        self.assertEqual(len(self.client.get('/jobs').get_json()[0]), len(app.JOB_LIST_FIELDS))
+
+        response = self.client.get('/jobs?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'Unknown fields: password'})
+
+    def test_body_is_sent_in_batches(self):
+        app.response_cache.clear()
+        with mock.patch.object(app, 'STREAM_BATCH_SIZE', 2):
+            response = self.client.get('/jobs?fields=id', buffered=False)
+            self.assertTrue(response.is_streamed)
+            chunks = [chunk.decode('utf-8') for chunk in response.response]
+            response.close()
+        self.assertEqual(chunks[0], '[')
+        self.assertEqual(chunks[-1], ']')
+        self.assertEqual(len(chunks), 2 + 3)
+        self.assertEqual(json.loads(''.join(chunks)), [{'id': job_id} for job_id in self.job_ids])
+
+class TranscriptUploadTests(AppTestCase):
+
+    def test_file_that_is_not_a_pdf_is_rejected(self):
+        client = self.logged_in_talent('upload@example.com')
+        response = client.post('/upload/transcript', content_type='multipart/form-data', data={
+            'transcript': (io.BytesIO(b'PK\x03\x04 not a pdf'), 'transcript.pdf', 'application/pdf')
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'File is not a PDF'})
+        with app.Database('KoraQuest.db') as db:
+            self.assertIsNone(db.fetchone('SELECT id FROM TranscriptJobs'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Registration, login and server-side sessions: python -m unittest test_auth (from backend/)."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import app
+from auth import SessionStore
+from database import close_pool
+
+PASSWORD = 'Secret123'
+
+class AuthTests(unittest.TestCase):
+    """Runs against a fresh KoraQuest.db in a temporary directory; each test registers its own accounts."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        cls._tmp = tempfile.TemporaryDirectory()
+        os.chdir(cls._tmp.name)
+        cls.app = app.create_app()
+        cls._schedule = app.job_refresher.schedule
+        app.job_refresher.schedule = lambda *args, **kwargs: False
+
+    @classmethod
+    def tearDownClass(cls):
+        app.job_refresher.schedule = cls._schedule
+        close_pool('KoraQuest.db')
+        os.chdir(cls._cwd)
+        cls._tmp.cleanup()
+
+    def register_talent(self, client, email):
+        return client.post('/register/talent', json={
+            'name': 'Asha', 'password': PASSWORD, 'email': email, 'phone': '555', 'resume': 'https://example.com/cv'
+        })
+
+    def stored_sessions(self):
+        with app.Database('KoraQuest.db') as db:
+            return {row['id'] for row in db.fetchall('SELECT id FROM Sessions')}
+
+    def test_login_rotates_the_session_id(self):
+        client = self.app.test_client()
+        self.assertEqual(self.register_talent(client, 'rotate@example.com').status_code, 201)
+        login = {'email': 'rotate@example.com', 'password': PASSWORD}
+        self.assertEqual(client.post('/login/talent', json=login).status_code, 200)
+        first_sid = client.get_cookie('session').value
+        self.assertIn(first_sid, self.stored_sessions())
+
+        # Whoever knew the id before this login gets nothing from it
+        self.assertEqual(client.post('/login/talent', json=login).status_code, 200)
+        second_sid = client.get_cookie('session').value
+        self.assertNotEqual(second_sid, first_sid)
+        self.assertNotIn(first_sid, self.stored_sessions())
+        self.assertIn(second_sid, self.stored_sessions())
+
+    def test_registration_losing_a_race_is_a_conflict(self):
+        client = self.app.test_client()
+        hash_password = app.password_hasher.hash
+
+        def register_concurrently(password):
+            # Another request registers the same email between the pre-check and the insert
+            with app.Database('KoraQuest.db') as db:
+                db.execute(
+                    "INSERT INTO Talent (name, password, email, phone, resume) VALUES ('Ravi', 'x', ?, '555', '')",
+                    ('race@example.com',)
+                )
+            return hash_password(password)
+
+        with mock.patch.object(app.password_hasher, 'hash', side_effect=register_concurrently):
+            response = self.register_talent(client, 'race@example.com')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json(), {'error': 'Email already exists'})
+
+    def test_cached_session_is_revalidated_after_its_ttl(self):
+        store = SessionStore('KoraQuest.db', revalidate_after=60)
+        store.save('sid-ttl', {'email': 'ttl@example.com'}, expires_at=4102444800)
+        # Logged out through another worker
+        with app.Database('KoraQuest.db') as db:
+            db.execute("DELETE FROM Sessions WHERE id = 'sid-ttl'")
+        self.assertEqual(store.get('sid-ttl'), {'email': 'ttl@example.com'})
+
+        store.revalidate_after = 0
+        self.assertIsNone(store.get('sid-ttl'))
+
+if __name__ == '__main__':
+    unittest.main()
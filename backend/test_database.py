@@ -0,0 +1,71 @@
+"""Connection pool and transactions: python -m unittest test_database (from backend/)."""
+import os
+import tempfile
+import threading
+import unittest
+
+from database import Database, close_pool, get_pool
+
+class PoolTests(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_file = os.path.join(tmp.name, 'pool.db')
+        self.addCleanup(close_pool, self.db_file)
+        with Database(self.db_file) as db:
+            db.execute('CREATE TABLE Items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)')
+
+    def names(self):
+        with Database(self.db_file) as db:
+            return [row['name'] for row in db.fetchall('SELECT name FROM Items ORDER BY id')]
+
+    def test_connections_are_reused(self):
+        self.assertIs(get_pool(self.db_file), get_pool(self.db_file))
+        with Database(self.db_file) as db:
+            first = db.conn
+            # A nested block on the same thread shares the connection
+            with Database(self.db_file) as nested:
+                self.assertIs(nested.conn, first)
+        with Database(self.db_file) as db:
+            self.assertIs(db.conn, first)
+
+        other = []
+        def use_pool():
+            with Database(self.db_file) as db:
+                other.append(db.conn)
+        with Database(self.db_file) as db:
+            thread = threading.Thread(target=use_pool)
+            thread.start()
+            thread.join()
+            self.assertIsNot(other[0], db.conn)
+
+    def test_transaction_rolls_back_on_error(self):
+        with Database(self.db_file) as db:
+            with self.assertRaises(ValueError):
+                with db.transaction():
+                    db.execute("INSERT INTO Items (name) VALUES ('first')")
+                    # A nested transaction joins the outer one and goes down with it
+                    with db.transaction():
+                        db.execute("INSERT INTO Items (name) VALUES ('second')")
+                    raise ValueError('abort')
+            self.assertFalse(db.conn.in_transaction)
+        self.assertEqual(self.names(), [])
+
+        with Database(self.db_file) as db:
+            with db.transaction():
+                db.execute("INSERT INTO Items (name) VALUES ('kept')")
+        self.assertEqual(self.names(), ['kept'])
+
+    def test_error_after_sqlite_rolled_back_is_not_masked(self):
+        with Database(self.db_file) as db:
+            with self.assertRaises(ValueError):
+                with db.transaction():
+                    db.execute("INSERT INTO Items (name) VALUES ('lost')")
+                    # As SQLite does by itself on a full disk or an interrupt
+                    db.execute('ROLLBACK')
+                    raise ValueError('original error')
+        self.assertEqual(self.names(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Retries of the external jobs API against fake_jobs_api.py: python -m unittest test_external_jobs (from backend/)."""
+import time
+import unittest
+
+from external_jobs import ConcurrentJobFetcher
+from fake_jobs_api import start_server
+
+class RetryTests(unittest.TestCase):
+    """One site and location, so each fetch is a single request and its retries."""
+
+    def fetch(self, script):
+        server, url = start_server(script=script)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        fetcher = ConcurrentJobFetcher(base_url=url, api_key='dev', sites=('indeed',), backoff=0.01, deadline=5.0)
+        self.addCleanup(fetcher.shutdown)
+        jobs = fetcher.fetch('python', 'Full Time', 'pune')
+        return jobs, len(server.RequestHandlerClass.received)
+
+    def test_rate_limit_waits_for_retry_after(self):
+        started = time.monotonic()
+        jobs, requests = self.fetch([(429, {'Retry-After': '0.3'})])
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual((len(jobs), requests), (10, 2))
+
+    def test_server_error_is_retried(self):
+        jobs, requests = self.fetch([(503, {})])
+        self.assertEqual((len(jobs), requests), (10, 2))
+
+    def test_client_error_is_not_retried(self):
+        with self.assertLogs('koraquest.external_jobs', 'ERROR'):
+            jobs, requests = self.fetch([(401, {})])
+        self.assertEqual((jobs, requests), (None, 1))
+
+if __name__ == '__main__':
+    unittest.main()
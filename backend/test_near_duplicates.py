@@ -0,0 +1,73 @@
+"""Near-duplicate folding of fetched jobs: python -m unittest test_near_duplicates (from backend/)."""
+import os
+import tempfile
+import unittest
+
+import app
+from database import close_pool
+
+DESCRIPTION = (
+    'Build and operate the services behind our payments platform. You will design APIs, '
+    'own their reliability in production and work closely with product and data teams.'
+)
+
+def fetched_job(external_id, location, title='Backend Engineer', company='Acme Payments'):
+    return {
+        'external_job_id': external_id,
+        'title': title,
+        'company': company,
+        'location': location,
+        'description': DESCRIPTION,
+        'job_type': 'Full Time',
+        'job_url': f'https://jobs.example.com/{external_id}',
+    }
+
+class NearDuplicateTests(unittest.TestCase):
+    """Runs against a fresh KoraQuest.db in a temporary directory; each test uses its own company."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._cwd = os.getcwd()
+        cls._tmp = tempfile.TemporaryDirectory()
+        os.chdir(cls._tmp.name)
+        cls.client = app.create_app().test_client()
+        cls._schedule = app.job_refresher.schedule
+        app.job_refresher.schedule = lambda *args, **kwargs: False
+
+    @classmethod
+    def tearDownClass(cls):
+        app.job_refresher.schedule = cls._schedule
+        close_pool('KoraQuest.db')
+        os.chdir(cls._cwd)
+        cls._tmp.cleanup()
+
+    def job_locations(self, company):
+        with app.Database('KoraQuest.db') as db:
+            rows = db.fetchall('SELECT job_location FROM Jobs WHERE org_name = ? ORDER BY id', (company,))
+        return [row['job_location'] for row in rows]
+
+    def test_syndicated_copy_is_folded(self):
+        stats = app.store_fetched_jobs([
+            fetched_job('indeed-1', 'Bangalore', company='Globex'),
+            fetched_job('linkedin-1', ' bangalore', title='Backend Engineer II', company='Globex'),
+        ])
+        self.assertEqual((stats['inserted'], stats['duplicates']), (1, 1))
+        self.assertEqual(self.job_locations('Globex'), ['Bangalore'])
+
+    def test_postings_differing_only_by_city_stay_separate(self):
+        stats = app.store_fetched_jobs([fetched_job('indeed-2', 'Mumbai'), fetched_job('indeed-3', 'Bangalore')])
+        self.assertEqual((stats['inserted'], stats['duplicates']), (2, 0))
+        # Against the stored jobs as well as within a batch
+        stats = app.store_fetched_jobs([fetched_job('indeed-4', 'Pune')])
+        self.assertEqual((stats['inserted'], stats['duplicates']), (1, 0))
+        self.assertEqual(self.job_locations('Acme Payments'), ['Mumbai', 'Bangalore', 'Pune'])
+
+        response = self.client.get('/search/jobs?q=engineer&location=Bangalore')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(job['org_name'], job['job_location']) for job in response.get_json()['jobs']],
+            [('Acme Payments', 'Bangalore')]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Schema migrations of KoraQuest.db: python -m unittest test_schema (from backend/)."""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from database import get_pool
+from schema import SCHEMA_VERSION, migrate
+
+class BaselineTests(unittest.TestCase):
+    """Databases written by the app before schema versioning."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_file = os.path.join(tmp.name, 'KoraQuest.db')
+        self.addCleanup(lambda: get_pool(self.db_file).close_all())
+
+    def test_fetched_jobs_are_keyed_and_merged(self):
+        conn = sqlite3.connect(self.db_file)
+        conn.execute('''
+        CREATE TABLE Jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, org_email TEXT, job_title TEXT NOT NULL, job_description TEXT,
+            job_location TEXT, job_type TEXT, is_remote INTEGER, org_name TEXT, source TEXT DEFAULT 'created',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, external_job_id TEXT UNIQUE, job_url TEXT
+        )
+        ''')
+        conn.executemany(
+            'INSERT INTO Jobs (job_title, job_location, org_name, source, external_job_id) VALUES (?, ?, ?, ?, ?)',
+            [
+                ('Backend Engineer', 'Pune', 'Acme', 'external_api', 'a-1'),
+                ('Data Analyst', 'Pune', 'Acme', 'external_api', 'a-2'),
+                # Re-fetched under a new id before the key existed
+                (' backend  engineer', 'pune', 'ACME', 'external_api', 'a-3'),
+                # Posted by the organization itself: never keyed
+                ('Backend Engineer', 'Pune', 'Acme', 'created', None),
+            ]
+        )
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(migrate(self.db_file), (0, SCHEMA_VERSION))
+        conn = sqlite3.connect(self.db_file)
+        self.addCleanup(conn.close)
+        self.assertEqual(
+            conn.execute('SELECT id, source, dedupe_key FROM Jobs ORDER BY id').fetchall(),
+            [
+                (1, 'external_api', 'backend engineer|pune|acme'),
+                (2, 'external_api', 'data analyst|pune|acme'),
+                (4, 'created', None),
+            ]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
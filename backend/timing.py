@@ -0,0 +1,35 @@
+"""Stage timing shared by the Flask app and the modules it uses outside a request.
+
+`span(stage)` times a block into the flask_stage_duration_seconds
+histogram. While a request is being handled, metrics.init_app puts a dict
+in `request_spans` and the spans are also summed there for its
+Server-Timing header. Nothing here imports Flask, so the database layer and
+command-line tools can be timed without it.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from prometheus_client import Histogram
+
+STAGE_SECONDS = Histogram(
+    'flask_stage_duration_seconds', 'Time spent in one stage of a request or background job', ['stage'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+
+# stage -> seconds for the request being handled, or None outside a request
+request_spans = contextvars.ContextVar('request_spans', default=None)
+
+@contextmanager
+def span(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def observe_stage(stage, seconds):
+    """Record a stage duration measured elsewhere, e.g. in a worker process."""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    spans = request_spans.get()
+    if spans is not None:
+        spans[stage] = spans.get(stage, 0.0) + seconds
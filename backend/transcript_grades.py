@@ -0,0 +1,88 @@
+import difflib
+import json
+import os
+import re
+from functools import lru_cache
+
+# Canonical course names: the Django app's course list, so parsed grades key
+# on the same names as its job matching criteria
+COURSES_FILE = os.environ.get('COURSES_FILE') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, 'job_recommendation', 'recommendations', 'courses.json'
+)
+with open(COURSES_FILE) as f:
+    CANONICAL_COURSES = json.load(f)
+
+# Common transcript spellings that do not normalize to a canonical name
+COURSE_ALIASES = {
+    'introduction to programming': 'Programming Fundamentals',
+    'intro to programming': 'Programming Fundamentals',
+    'fundamentals of programming': 'Programming Fundamentals',
+    'data structures and algorithms': 'Data Structures',
+    'design and analysis of algorithms': 'Algorithms',
+    'database management systems': 'Database Systems',
+    'databases': 'Database Systems',
+    'networking': 'Computer Networks',
+    'ai': 'Artificial Intelligence',
+    'ml': 'Machine Learning',
+    'cyber security': 'Cybersecurity',
+    'information security': 'Cybersecurity',
+    'mobile application development': 'Mobile App Development',
+    'web programming': 'Web Development',
+    'blockchain': 'Blockchain Technology',
+    'big data': 'Big Data Analytics',
+    'internet of things': 'Internet of Things (IoT)',
+    'iot': 'Internet of Things (IoT)',
+    'hci': 'Human-Computer Interaction',
+    'distributed computing': 'Distributed Systems',
+}
+
+# "CS 201  Data Structures ..... 3.0  B+  9.9" style rows: an optional course
+# code, the course name, optional separators/credits, the letter grade and
+# optional trailing grade points
+GRADE_LINE_RE = re.compile(
+    r'^\s*(?:[A-Z]{2,5}\s?-?\d{3,4}[A-Z]?\s+)?'
+    r'(?P<course>[A-Za-z][A-Za-z&(),/\'\- ]*?[A-Za-z)])'
+    r'[\s|:.\-]+(?:\d+(?:\.\d+)?\s+)*'
+    r'(?P<grade>[A-F][+-]?)'
+    r'(?:\s+\d+(?:\.\d+)?)*\s*$'
+)
+NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+def normalize_course_name(name):
+    return NON_WORD_RE.sub(' ', name.lower().replace('&', ' and ')).strip()
+
+_CANONICAL_BY_KEY = {normalize_course_name(course): course for course in CANONICAL_COURSES}
+_CANONICAL_BY_KEY.update({normalize_course_name(alias): course for alias, course in COURSE_ALIASES.items()})
+_CANONICAL_KEYS = list(_CANONICAL_BY_KEY)
+
+@lru_cache(maxsize=4096)
+def canonical_course(name):
+    """Map a course name as printed on a transcript to a canonical course, or None."""
+    key = normalize_course_name(name)
+    course = _CANONICAL_BY_KEY.get(key)
+    if course is None:
+        match = difflib.get_close_matches(key, _CANONICAL_KEYS, n=1, cutoff=0.85)
+        course = _CANONICAL_BY_KEY[match[0]] if match else None
+    return course
+
+def normalize_grade(grade):
+    """Collapse +/- variants to the A/B/C/D/F scale the recommender uses."""
+    letter = grade[0].upper()
+    return 'F' if letter == 'E' else letter
+
+def parse_transcript_grades(lines):
+    """Extract a canonical course -> grade dict from cleaned transcript lines.
+
+    `lines` can be any iterable (a list, a file or a generator over pages), and
+    is consumed in one pass. A course listed more than once keeps its latest
+    grade, so retakes replace earlier attempts.
+    """
+    grades = {}
+    for line in lines:
+        match = GRADE_LINE_RE.match(line)
+        if not match:
+            continue
+        course = canonical_course(match.group('course').strip())
+        if course:
+            grades[course] = normalize_grade(match.group('grade'))
+    return grades
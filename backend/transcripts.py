@@ -0,0 +1,76 @@
+import time
+from PyPDF2 import PdfReader
+from transcript_grades import parse_transcript_grades
+
+# Kept free of Flask and database imports: this module is what the
+# transcript process pool imports in its worker processes.
+
+MAX_TRANSCRIPT_CHARS = 1000000
+
+def extract_pages_from_pdf(pdf_file):
+    """Yield the text of each page of a PDF given as a file path or binary file object."""
+    for page in PdfReader(pdf_file).pages:
+        yield page.extract_text() or ''
+
+def extract_text_from_pdf(pdf_file):
+    """Extract text from a PDF given as a file path or binary file object."""
+    return '\n'.join(extract_pages_from_pdf(pdf_file))
+
+def clean_transcript_text(text):
+    """Clean and validate transcript text content."""
+    if not text or not isinstance(text, str):
+        return ""
+
+    # Remove any null bytes
+    text = text.replace('\x00', '')
+
+    # Remove excessive whitespace while preserving paragraphs
+    paragraphs = text.split('\n')
+    cleaned_paragraphs = [' '.join(p.split()) for p in paragraphs if p.strip()]
+    text = '\n'.join(cleaned_paragraphs)
+
+    # Remove any non-printable characters
+    text = ''.join(char for char in text if char.isprintable() or char in ['\n', '\t'])
+
+    # Limit the text length
+    if len(text) > MAX_TRANSCRIPT_CHARS:
+        text = text[:MAX_TRANSCRIPT_CHARS]
+
+    return text
+
+def process_transcript(path):
+    """Extract, clean and parse an uploaded transcript; runs in a worker process.
+
+    Returns the cleaned text, the canonical course -> grade dict parsed
+    from it (so nothing downstream has to re-read the raw text) and the
+    seconds spent per stage, for the parent process to record.
+
+    Pages are extracted, cleaned and parsed one at a time: the parser
+    reads the lines of each page as it is extracted, and the cleaned pages
+    are only joined into the stored text at the end.
+    """
+    timings = {'pdf_extract': 0.0}
+    cleaned_pages = []
+
+    def cleaned_lines():
+        pages = extract_pages_from_pdf(path)
+        length = 0
+        while length < MAX_TRANSCRIPT_CHARS:
+            start = time.perf_counter()
+            page = next(pages, None)
+            timings['pdf_extract'] += time.perf_counter() - start
+            if page is None:
+                return
+            cleaned = clean_transcript_text(page)
+            if cleaned:
+                cleaned_pages.append(cleaned)
+                length += len(cleaned) + 1
+                yield from cleaned.split('\n')
+
+    start = time.perf_counter()
+    grades = parse_transcript_grades(cleaned_lines())
+    cleaned_text = '\n'.join(cleaned_pages)[:MAX_TRANSCRIPT_CHARS]
+    if not cleaned_text:
+        raise ValueError('Could not extract text from PDF')
+    timings['transcript_parse'] = time.perf_counter() - start - timings['pdf_extract']
+    return cleaned_text, grades, timings
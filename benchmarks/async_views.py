@@ -0,0 +1,176 @@
+"""Concurrency comparison of the Django recommendation and ingest APIs under WSGI and ASGI.
+
+    python benchmarks/async_views.py --size 10k --concurrency 1 8 32 --requests 400
+
+Three stacks serve the same requests against one fixture database:
+
+    wsgi        WSGIHandler, sync views, one thread per in-flight request
+    asgi-sync   ASGIHandler, sync views (Django runs each in a worker thread)
+    asgi-async  ASGIHandler, the async views under /async/
+
+The handlers are called in process, without an HTTP server, so the numbers
+compare Django's request handling and the views rather than a server. Each
+scenario reports requests per second with p50 and p99 latency, and the
+count of non-2xx responses (SQLite lock timeouts show up there). The
+recommendations cache is cleared before every run.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fixtures
+
+STACKS = ('wsgi', 'asgi-sync', 'asgi-async')
+SCENARIOS = ('recommendations', 'bulk_recommendations', 'ingest_jobs')
+BULK_SIZE = 100
+INGEST_SIZE = 50
+
+
+def make_requests(scenario, stack, count, size, rng):
+    """ (method, path, content type, body) per request; async stacks use the /async/ routes """
+    prefix = '/async' if stack == 'asgi-async' else ''
+    students = fixtures.SIZES[size]
+    requests = []
+    for n in range(count):
+        if scenario == 'recommendations':
+            requests.append(('GET', f"{prefix}/recommendations/S{rng.randrange(students):08d}/", '', b''))
+        elif scenario == 'bulk_recommendations':
+            ids = [f"S{rng.randrange(students):08d}" for _ in range(BULK_SIZE)]
+            body = json.dumps({'student_ids': ids}).encode()
+            requests.append(('POST', f"{prefix}/recommendations/bulk/", 'application/json', body))
+        else:
+            path = '/async/store-jobs/bulk/' if stack == 'asgi-async' else '/api/store-jobs/bulk/'
+            jobs = [
+                {'title': 'Engineer', 'company': 'Bench', 'location': 'Remote', 'source': stack,
+                 'job_url': f"https://jobs.example.com/{stack}/{rng.getrandbits(64):x}/{n}/{i}"}
+                for i in range(INGEST_SIZE)
+            ]
+            body = '\n'.join(json.dumps(job) for job in jobs).encode()
+            requests.append(('POST', path, 'application/x-ndjson', body))
+    return requests
+
+
+def wsgi_environ(method, path, content_type, body):
+    return {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'CONTENT_TYPE': content_type, 'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+
+
+def run_wsgi(handler, requests, concurrency):
+    def call(request):
+        start = time.perf_counter()
+        status = []
+        body = handler(wsgi_environ(*request), lambda s, headers, exc_info=None: status.append(s))
+        b''.join(body)
+        body.close()
+        return time.perf_counter() - start, int(status[0].split()[0])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(call, requests))
+
+
+async def run_asgi(handler, requests, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call(method, path, content_type, body):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'content-type', content_type.encode()),
+                        (b'content-length', str(len(body)).encode())],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        status = []
+        finished = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Django watches for the client going away; only disconnect once the response is sent
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                finished.set()
+
+        async with slots:
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            return time.perf_counter() - start, status[0]
+
+    return await asyncio.gather(*(call(*request) for request in requests))
+
+
+def summarize(results, elapsed):
+    latencies = sorted(seconds for seconds, _ in results)
+    return {
+        'rps': len(results) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'errors': sum(1 for _, status in results if status >= 300),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--size', default='10k', choices=list(fixtures.SIZES))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=400, help="Requests per scenario, stack and concurrency")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument('--stacks', nargs='+', default=list(STACKS), choices=STACKS)
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    with contextlib.redirect_stdout(sys.stderr):
+        fixtures.setup_django(args.size, os.cpu_count() or 1)
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.core.handlers.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+    settings.ALLOWED_HOSTS = ['localhost']
+    settings.DEBUG = False
+    wsgi, asgi = WSGIHandler(), ASGIHandler()
+
+    rng = random.Random(1)
+    results = []
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            for stack in args.stacks:
+                requests = make_requests(scenario, stack, args.requests, args.size, rng)
+                caches['recommendations'].clear()
+                start = time.perf_counter()
+                if stack == 'wsgi':
+                    timings = run_wsgi(wsgi, requests, concurrency)
+                else:
+                    timings = asyncio.run(run_asgi(asgi, requests, concurrency))
+                row = {'scenario': scenario, 'stack': stack, 'concurrency': concurrency,
+                       **summarize(timings, time.perf_counter() - start)}
+                results.append(row)
+                if not args.json:
+                    print(f"{scenario:22} {stack:11} c={concurrency:<4} {row['rps']:9.1f} req/s "
+                          f"p50 {row['p50_ms']:8.2f} ms  p99 {row['p99_ms']:8.2f} ms  errors {row['errors']}")
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Fixture databases and documents for the benchmark suite.
+
+Each size gets its own directory under benchmarks/.fixtures/ holding a
+Django db.sqlite3 and a Flask KoraQuest.db. Both are filled with the
+generate_data management command, so fixtures match what load tests use.
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+DJANGO_DIR = os.path.join(ROOT, 'job_recommendation')
+FIXTURES_DIR = os.path.join(ROOT, 'benchmarks', '.fixtures')
+
+SIZES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+
+
+def fixture_dir(size):
+    path = os.path.join(FIXTURES_DIR, size)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def row_count(db_path, table):
+    if not os.path.exists(db_path):
+        return 0
+    try:
+        with contextlib.closing(sqlite3.connect(db_path)) as db:
+            return db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def setup_django(size, workers):
+    """Point Django at the size's fixture database, creating and filling it if needed."""
+    sys.path.insert(0, DJANGO_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'job_recommendation.settings')
+    import django
+    from django.conf import settings
+    db_path = os.path.join(fixture_dir(size), 'db.sqlite3')
+    settings.DATABASES['default']['NAME'] = db_path
+    django.setup()
+
+    from django.core.management import call_command
+    rows = SIZES[size]
+    if row_count(db_path, 'recommendations_student') < rows:
+        call_command('migrate', verbosity=0)
+        call_command('generate_data', students=rows, jobs=min(rows, 100000), seed=1, workers=workers)
+    return db_path
+
+
+def setup_flask(size, workers):
+    """Build the Flask app against the size's fixture KoraQuest.db, filling its Jobs table if needed.
+
+    app.py opens 'KoraQuest.db' relative to the working directory, so this
+    changes into the fixture directory first. create_app() creates the
+    schema; generated jobs persist between runs. Returns (module, app).
+    """
+    path = fixture_dir(size)
+    os.chdir(path)
+    sys.path.insert(0, BACKEND_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as flask_app
+        app = flask_app.create_app()
+
+    db_path = os.path.join(path, 'KoraQuest.db')
+    if row_count(db_path, 'Jobs') < SIZES[size]:
+        from django.core.management import call_command
+        call_command('generate_data', jobs=SIZES[size], jobs_target='flask', organizations=min(SIZES[size], 1000),
+                     seed=1, workers=workers, flask_db=db_path)
+    return flask_app, app
+
+
+def make_pdf(pages):
+    """A minimal PDF with one text line per list entry on each page (Helvetica, no compression)."""
+    objects = {
+        1: '<< /Type /Catalog /Pages 2 0 R >>',
+        3: '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    }
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f'{page_id} 0 R')
+        text = ' '.join('(%s) Tj T*' % line.replace('(', '').replace(')', '') for line in lines)
+        stream = f'BT /F1 9 Tf 40 780 Td 11 TL {text} ET'
+        objects[page_id] = (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>')
+        objects[content_id] = f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream'
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(pages)} >>'
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f'{number} 0 obj\n{objects[number]}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    count = max(objects) + 1
+    out += f'xref\n0 {count}\n0000000000 65535 f \n'.encode()
+    for number in range(1, count):
+        out += f'{offsets[number]:010d} 00000 n \n'.encode()
+    out += f'trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return bytes(out)
+
+
+def transcript_pdf(path, pages=20, rows_per_page=60):
+    """Write a synthetic transcript PDF (same generator as bench_transcript_grades) and return its path."""
+    if not os.path.exists(path):
+        sys.path.insert(0, BACKEND_DIR)
+        from bench_transcript_grades import make_transcript
+        raw, _ = make_transcript(pages, rows_per_page, seed=pages)
+        lines = raw.splitlines()
+        per_page = rows_per_page + 3
+        with open(path, 'wb') as f:
+            f.write(make_pdf([lines[i:i + per_page] for i in range(0, len(lines), per_page)]))
+    return path
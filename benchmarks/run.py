@@ -0,0 +1,225 @@
+"""Microbenchmarks for the recommendation and search hot paths.
+
+    python benchmarks/run.py --sizes 1k 100k 1m
+    python benchmarks/run.py --sizes 1k --update-baseline
+    python benchmarks/run.py --sizes 100k --only search_jobs --threshold 0.3
+
+Each size runs in its own process against fixture databases under
+benchmarks/.fixtures/<size>/ (built on first use with generate_data, then
+reused). The external jobs API is stubbed with canned jobs, so nothing
+leaves the machine. Every hot path is timed over --repeat samples (median and
+best; fast paths are looped within a sample), then run once more under
+tracemalloc for its peak Python memory.
+
+Results are compared against the baseline JSON; the exit status is 1 when
+any median time or peak memory exceeds its baseline by more than
+--threshold (0.2 = 20% slower or larger). Baselines are machine specific:
+record them with --update-baseline on the machine that runs the comparison.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fixtures
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+SEARCH_QUERIES = [
+    {'q': 'engineer'},
+    {'q': 'machine learning', 'type': 'Full Time'},
+    {'q': 'security analyst', 'count': 'exact'},
+    {'q': 'developer', 'location': 'remote'},
+    {},
+]
+MIN_SAMPLE_TIME = 0.2  # Seconds; fast paths are looped so each sample is long enough to time
+
+
+def measure(fn, repeat):
+    """Time fn over repeat samples (seconds per call), then run it once more for its peak traced memory."""
+    start = time.perf_counter()
+    fn()
+    loops = max(1, int(MIN_SAMPLE_TIME / max(time.perf_counter() - start, 1e-6)))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - start) / loops)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'peak_bytes': peak}
+
+
+def django_benches(size):
+    from recommendations.job_matching import JobMatchIndex, recommend_postings
+    from recommendations.job_recommendation import BatchRecommender, recommend_jobs, recommend_jobs_bulk
+    from recommendations.models import Student
+    from recommendations.strong_courses import qualifying_students
+
+    rows = fixtures.SIZES[size]
+    rng = random.Random(size)
+    sample = [f"S{rng.randrange(rows):08d}" for _ in range(100)]
+    bulk = [f"S{index:08d}" for index in rng.sample(range(rows), min(rows, 10000))]
+    recommender = BatchRecommender()
+    index = JobMatchIndex()
+    index.sync()
+    qualifying_students(['Machine Learning'])  # Builds the strong-course index outside the timings
+    assert Student.objects.filter(student_id=sample[0]).exists(), 'fixture database is missing students'
+
+    return {
+        'recommend_jobs': lambda: [recommend_jobs(student_id) for student_id in sample],
+        'recommend_jobs_bulk': lambda: recommend_jobs_bulk(bulk, recommender),
+        'recommend_postings': lambda: recommend_postings(sample, k=10, index=index),
+        'qualifying_students': lambda: qualifying_students(
+            ['Machine Learning', 'Artificial Intelligence', 'Big Data Analytics'], min_count=2, limit=50),
+    }
+
+
+def flask_benches(size):
+    module, app = fixtures.setup_flask(size, workers=os.cpu_count() or 1)
+    from fake_jobs_api import make_jobs
+    from external_jobs import normalize_job
+
+    # Stub the external API: no background refreshes, and each fetch returns 500 new canned jobs
+    module.job_refresher.schedule = lambda *args, **kwargs: False
+    fetches = iter(range(10 ** 9))
+
+    def fetch(query, job_type, location):
+        batch = next(fetches)
+        jobs = [normalize_job(job) for job in make_jobs({'search_term': query, 'location': location,
+                                                         'offset': batch * 500, 'results_wanted': 500})]
+        for i, job in enumerate(jobs):
+            job['title'] = f"{job['title']} {batch}-{i}"  # fake_jobs_api repeats titles; keep every job new
+        return jobs
+
+    module.job_fetcher.fetch = fetch
+    client = app.test_client()
+
+    def search():
+        for params in SEARCH_QUERIES:
+            response = client.get('/search/jobs', query_string=params)
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+    first_page = client.get('/search/jobs', query_string={'q': 'engineer', 'count': 'none'}).get_json()
+    next_page = {'q': 'engineer', 'count': 'none', 'cursor': first_page['next_cursor'] or ''}
+
+    return {
+        'search_jobs': search,
+        'search_jobs_next_page': lambda: client.get('/search/jobs', query_string=next_page),
+        'refresh_external_jobs': lambda: module.refresh_external_jobs('software', 'Full Time', 'mumbai'),
+    }
+
+
+def transcript_benches():
+    from transcripts import clean_transcript_text, extract_text_from_pdf
+    pdf = fixtures.transcript_pdf(os.path.join(fixtures.FIXTURES_DIR, 'transcript.pdf'))
+    text = extract_text_from_pdf(pdf)
+    return {
+        'extract_text_from_pdf': lambda: extract_text_from_pdf(pdf),
+        'clean_transcript_text': lambda: clean_transcript_text(text),
+    }
+
+
+def run_size(size, repeat, only, with_transcripts):
+    """Benchmark one fixture size in this process; returns {"name[size]": result}."""
+    workers = os.cpu_count() or 1
+    with contextlib.redirect_stdout(sys.stderr):
+        fixtures.setup_django(size, workers)
+        benches = {**django_benches(size), **flask_benches(size)}
+        keys = {name: f"{name}[{size}]" for name in benches}
+        if with_transcripts:
+            transcript = transcript_benches()
+            benches.update(transcript)
+            keys.update({name: name for name in transcript})
+
+    results = {}
+    # Keep any output from the code under test out of the results on stdout
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for name, fn in benches.items():
+            if only and name not in only:
+                continue
+            results[keys[name]] = measure(fn, repeat)
+            print(f"{keys[name]:40} {results[keys[name]]['median_s'] * 1000:10.2f} ms "
+                  f"{results[keys[name]]['peak_bytes'] / 2 ** 20:8.1f} MiB", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the regressions as printable lines."""
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if not base:
+            print(f"{key:40} no baseline")
+            continue
+        for metric in ('median_s', 'peak_bytes'):
+            ratio = result[metric] / base[metric] if base[metric] else 1.0
+            status = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+            print(f"{key:40} {metric:10} {ratio:6.2f}x baseline  {status}")
+            if status != 'ok':
+                regressions.append(f"{key} {metric}: {base[metric]:.6g} -> {result[metric]:.6g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', nargs='+', default=['1k'], choices=list(fixtures.SIZES))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown or growth, 0.2 = 20%%")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', help="Benchmark names to run (without the [size] suffix)")
+    parser.add_argument('--run-size', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size:
+        # Worker mode: one size, results as JSON on stdout; the app's info logs would only add noise
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+        results = run_size(args.run_size, args.repeat, args.only, args.run_size == args.sizes[0])
+        json.dump(results, sys.stdout)
+        return 0
+
+    # Every size gets a fresh process: Django settings and the app's connection pools are per process
+    results = {}
+    for size in args.sizes:
+        command = [sys.executable, os.path.abspath(__file__), '--run-size', size,
+                   '--sizes', args.sizes[0], '--repeat', str(args.repeat)]
+        if args.only:
+            command += ['--only', *args.only]
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True, text=True).stdout
+        results.update(json.loads(output))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Wrote {len(results)} baselines to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
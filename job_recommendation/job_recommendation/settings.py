@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recommendations.metrics.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,10 +81,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Concurrent requests (threads under WSGI, sync_to_async workers under
+        # ASGI) write at once: WAL lets reads continue during a write, and
+        # IMMEDIATE transactions queue writers on the busy timeout instead of
+        # failing with "database is locked" when a read lock cannot be upgraded.
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache
+# 'recommendations' holds ranked recommendations per student. Its backend
+# answers async lookups inline; with several server processes swap it for
+# django.core.cache.backends.redis.RedisCache so they share one cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recommendations': {
+        'BACKEND': 'recommendations.cache.LocMemCache',
+        'LOCATION': 'recommendations',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -124,3 +152,11 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Directory the build_job_index command saves the job matching index to
+JOB_INDEX_DIR = BASE_DIR / 'job_index'
+
+# Memory-mapped job vectors written by build_vector_index, and the encoder
+# that produces them (a dotted path; defaults to the local HashingEncoder)
+JOB_VECTOR_INDEX_DIR = BASE_DIR / 'job_vectors'
+JOB_ENCODER = None
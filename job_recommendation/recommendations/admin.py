@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student, Job
+from .models import Student, Job, Recommendation
 import json
 
 class StudentAdmin(admin.ModelAdmin):
@@ -28,12 +28,12 @@ class JobAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
-# class RecommendationAdmin(admin.ModelAdmin):
-#     list_display = ('student', 'job', 'score')
-#     search_fields = ('student__name', 'job__title')
-#     list_filter = ('score',)
-#     ordering = ('-score',)
+class RecommendationAdmin(admin.ModelAdmin):
+    list_display = ('student', 'job_title', 'score', 'computed_at')
+    search_fields = ('student__name', 'job_title')
+    list_filter = ('job_title', 'score')
+    ordering = ('-score',)
 
 admin.site.register(Student, StudentAdmin)
 
-# admin.site.register(Recommendation, RecommendationAdmin)
+admin.site.register(Recommendation, RecommendationAdmin)
@@ -0,0 +1,26 @@
+from django.core.cache.backends import locmem
+
+
+class LocMemCache(locmem.LocMemCache):
+    """
+    LocMemCache whose async methods run inline on the event loop.
+
+    Django's default async cache methods hand every call to a worker thread.
+    This cache never does I/O and only holds its lock for a dict operation,
+    so async views can use it directly without that thread hop.
+    """
+
+    async def aget(self, key, default=None, version=None):
+        return self.get(key, default, version)
+
+    async def aset(self, key, value, timeout=locmem.DEFAULT_TIMEOUT, version=None):
+        self.set(key, value, timeout, version)
+
+    async def aadd(self, key, value, timeout=locmem.DEFAULT_TIMEOUT, version=None):
+        return self.add(key, value, timeout, version)
+
+    async def adelete(self, key, version=None):
+        return self.delete(key, version)
+
+    async def aget_many(self, keys, version=None):
+        return self.get_many(keys, version)
@@ -0,0 +1,98 @@
+import json
+from django.db import transaction
+from django.utils import timezone
+from .models import Job
+from .serializers import JobSerializer
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def make_external_id(job_data):
+    """ Unique identifier used to avoid storing the same posting twice """
+    return f"{job_data.get('source')}_{job_data.get('job_url')}"
+
+
+def iter_ndjson(lines):
+    """ Yield one decoded job (or the decode error) per non-blank NDJSON line """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield e
+
+
+def _batches(items, batch_size):
+    """ Yield (offset of first item, batch) pairs without materializing `items` """
+    offset = 0
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield offset, batch
+            offset += len(batch)
+            batch = []
+    if batch:
+        yield offset, batch
+
+
+def ingest_jobs(jobs, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create or update many jobs in one atomic transaction.
+
+    `jobs` may be any iterable (including a stream of NDJSON lines decoded by
+    iter_ndjson), and is consumed one batch at a time: each batch costs one
+    IN query for existing external ids plus a bulk_create and a bulk_update.
+    Invalid items are reported by their position instead of failing the batch.
+    """
+    created = updated = 0
+    errors = []
+
+    with transaction.atomic():
+        for offset, batch in _batches(jobs, batch_size):
+            items = []
+            for index, job_data in enumerate(batch, start=offset):
+                if not isinstance(job_data, dict):
+                    errors.append({'index': index, 'errors': {'non_field_errors': [f'Invalid job: {job_data}']}})
+                    continue
+                items.append((index, make_external_id(job_data), job_data))
+
+            external_ids = [external_id for _, external_id, _ in items]
+            existing = {job.external_id: job for job in Job.objects.filter(external_id__in=external_ids)}
+            to_create = {}
+            to_update = {}
+            update_fields = set()
+
+            for index, external_id, job_data in items:
+                instance = to_create.get(external_id) or existing.get(external_id)
+                serializer = JobSerializer(instance, data=job_data, partial=instance is not None)
+                if not serializer.is_valid():
+                    errors.append({'index': index, 'errors': serializer.errors})
+                    continue
+
+                if instance is None:
+                    to_create[external_id] = Job(**{**serializer.validated_data, 'external_id': external_id})
+                    continue
+
+                for field, value in serializer.validated_data.items():
+                    setattr(instance, field, value)
+                    update_fields.add(field)
+                if instance.pk is not None:
+                    to_update[external_id] = instance
+
+            Job.objects.bulk_create(to_create.values(), batch_size=batch_size)
+            if to_update:
+                # bulk_update skips auto_now, so stamp updated_at ourselves
+                now = timezone.now()
+                for instance in to_update.values():
+                    instance.updated_at = now
+                Job.objects.bulk_update(to_update.values(), sorted(update_fields | {'updated_at'}), batch_size=batch_size)
+
+            created += len(to_create)
+            updated += len(to_update)
+
+    return {'created': created, 'updated': updated, 'errors': errors}
@@ -0,0 +1,391 @@
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+import numpy as np
+import scipy.sparse as sp
+from django.conf import settings
+from django.db.models import Max
+from .models import Job, JobChange, JobSyncState, Student
+from .job_sync import TO_FLASK
+from .job_recommendation import GRADE_WEIGHTS, parse_grades
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOP_WORDS = frozenset("""
+a about an and are as at be by for from has have in is it its of on or our that the this to we will with
+you your who all any can may not more than into other such their they them which while work working
+""".split())
+TITLE_WEIGHT = 3  # Title terms count as often as three mentions in the description
+# How stale get_job_index() may serve the index before catching it up with the Job table
+SYNC_INTERVAL = 5
+INDEX_FILES = ('counts_data', 'counts_indices', 'counts_indptr', 'weights_data', 'weights_indices',
+               'weights_indptr', 'doc_freq', 'job_ids')
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def job_terms(title, description):
+    counts = Counter(tokenize(description))
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def student_terms(skills, interests, grades):
+    """ Query terms for a student: skills, interests and courses weighted by grade points """
+    counts = Counter(tokenize(skills))
+    counts.update(tokenize(interests))
+    for course, grade in parse_grades(grades).items():
+        points = GRADE_WEIGHTS.get(grade)
+        if points:
+            for token in tokenize(course):
+                counts[token] += points
+    return counts
+
+
+class JobMatchIndex:
+    """
+    Sparse TF-IDF index over Job titles and descriptions.
+
+    Raw term counts are kept per job so new or updated jobs are appended
+    without re-tokenizing the rest; the sublinear TF-IDF matrix with unit
+    rows is rebuilt from those counts only when a query follows a change.
+    Students are scored in batches with one sparse matrix product against
+    the job matrix, so cosine similarity is just the dot product.
+
+    save() writes plain .npy arrays that load() maps back into memory, so
+    a worker can start scoring without rebuilding anything.
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.counts = sp.csr_matrix((0, 0), dtype=np.float32)
+        self.last_seq = 0  # JobChange.seq the index is caught up to
+        self._row_by_job = {}
+        self._weights = sp.csr_matrix((0, 0), dtype=np.float32)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._row_by_job)
+
+    def add_jobs(self, jobs):
+        """
+        Index (pk, title, description) tuples; a pk that is already indexed
+        is replaced by its new text.
+        """
+        # Keep the last version of a job listed twice in one call
+        latest = {pk: (title, description) for pk, title, description in jobs}
+        if not latest:
+            return 0
+
+        with self._lock:
+            rows, cols, values = [], [], []
+            dead = [self._row_by_job[pk] for pk in latest if pk in self._row_by_job]
+            for i, (pk, (title, description)) in enumerate(latest.items()):
+                self._row_by_job[pk] = len(self.job_ids) + i
+                for term, count in job_terms(title, description).items():
+                    rows.append(i)
+                    cols.append(self.vocab.setdefault(term, len(self.vocab)))
+                    values.append(count)
+
+            added = sp.csr_matrix(
+                (np.array(values, dtype=np.float32), (rows, cols)), shape=(len(latest), len(self.vocab))
+            )
+            counts = sp.csr_matrix(
+                (self.counts.data, self.counts.indices, self.counts.indptr),
+                shape=(self.counts.shape[0], len(self.vocab))
+            )
+            doc_freq = np.zeros(len(self.vocab), dtype=np.int64)
+            doc_freq[:len(self.doc_freq)] = self.doc_freq
+            doc_freq += np.bincount(cols, minlength=len(self.vocab))
+            if dead:
+                counts, doc_freq = self._blank_rows(counts, doc_freq, dead)
+
+            self.counts = sp.vstack([counts, added], format='csr')
+            self.job_ids = np.concatenate([self.job_ids, np.fromiter(latest, dtype=np.int64, count=len(latest))])
+            self.doc_freq = doc_freq
+            self._dirty = True
+        return len(latest)
+
+    def remove_jobs(self, pks):
+        """ Drop deleted jobs from the index; returns how many of them were indexed """
+        with self._lock:
+            dead = [self._row_by_job.pop(pk) for pk in set(pks) if pk in self._row_by_job]
+            if dead:
+                self.counts, self.doc_freq = self._blank_rows(self.counts, self.doc_freq, dead)
+                self._dirty = True
+        return len(dead)
+
+    @staticmethod
+    def _blank_rows(counts, doc_freq, dead):
+        """ Take rows out of the document frequencies and blank them; compact() drops them later """
+        doc_freq = doc_freq - np.asarray((counts[dead] > 0).sum(axis=0), dtype=np.int64).ravel()
+        keep = np.ones(counts.shape[0], dtype=np.float32)
+        keep[dead] = 0
+        counts = sp.csr_matrix(sp.diags(keep) @ counts)
+        counts.eliminate_zeros()
+        return counts, doc_freq
+
+    def _matrix(self):
+        with self._lock:
+            if self._dirty:
+                n_docs = len(self._row_by_job)
+                self._idf = (np.log((1 + n_docs) / (1 + self.doc_freq)) + 1).astype(np.float32)
+                weights = self.counts.copy()
+                weights.data = (1 + np.log(weights.data)) * self._idf[weights.indices]
+                norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+                norms[norms == 0] = 1
+                self._weights = sp.csr_matrix(sp.diags(1 / norms) @ weights, dtype=np.float32)
+                self._dirty = False
+            return self._weights, self._idf
+
+    def query_matrix(self, term_counts, matrix=None):
+        """ Unit-length TF-IDF rows for a list of term Counters; unknown terms are dropped """
+        weights, idf = matrix or self._matrix()
+        rows, cols, values = [], [], []
+        for i, terms in enumerate(term_counts):
+            for term, count in terms.items():
+                col = self.vocab.get(term)
+                if col is not None and col < weights.shape[1]:
+                    rows.append(i)
+                    cols.append(col)
+                    values.append((1 + math.log(count)) * idf[col])
+        query = sp.csr_matrix((np.array(values, dtype=np.float32), (rows, cols)),
+                              shape=(len(term_counts), weights.shape[1]))
+        norms = np.sqrt(np.asarray(query.multiply(query).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sp.csr_matrix(sp.diags(1 / norms) @ query, dtype=np.float32)
+
+    def top_k(self, term_counts, k=10, batch_size=1000):
+        """ Return, per query, up to k (job pk, cosine similarity) pairs, best first """
+        matrix = self._matrix()
+        weights = matrix[0]
+        results = []
+        for start in range(0, len(term_counts), batch_size):
+            query = self.query_matrix(term_counts[start:start + batch_size], matrix)
+            similarities = (query @ weights.T).tocsr()
+            for i in range(similarities.shape[0]):
+                start_at, end_at = similarities.indptr[i], similarities.indptr[i + 1]
+                data = similarities.data[start_at:end_at]
+                columns = similarities.indices[start_at:end_at]
+                best = np.argpartition(-data, k - 1)[:k] if len(data) > k else np.arange(len(data))
+                best = best[np.argsort(-data[best], kind='stable')]
+                results.append([(int(self.job_ids[columns[j]]), float(data[j])) for j in best if data[j] > 0])
+        return results
+
+    def compact(self):
+        """ Drop rows of replaced jobs so saved files only hold live postings """
+        with self._lock:
+            live = np.array(sorted(self._row_by_job.values()), dtype=np.int64)
+            if len(live) == len(self.job_ids):
+                return
+            self.counts = self.counts[live]
+            self.job_ids = self.job_ids[live]
+            self._row_by_job = {int(pk): row for row, pk in enumerate(self.job_ids)}
+            self._dirty = True
+
+    def save(self, path):
+        """ Write the index to a directory of .npy files, replacing any previous copy atomically """
+        with self._lock:
+            self.compact()
+            weights, _ = self._matrix()
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            arrays = {
+                'counts_data': self.counts.data, 'counts_indices': self.counts.indices,
+                'counts_indptr': self.counts.indptr, 'weights_data': weights.data,
+                'weights_indices': weights.indices, 'weights_indptr': weights.indptr,
+                'doc_freq': self.doc_freq, 'job_ids': self.job_ids,
+            }
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+            with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+                json.dump({'vocab': self.vocab, 'last_seq': self.last_seq}, f)
+
+            old_path = f"{path}.old-{os.getpid()}"
+            if os.path.exists(path):
+                os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """ Load a saved index; with mmap the arrays stay on disk until pages are touched """
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in INDEX_FILES}
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        index = cls()
+        index.vocab = meta['vocab']
+        index.last_seq = meta.get('last_seq', 0)  # Indexes saved before the change log replay it from the start
+        shape = (len(arrays['job_ids']), len(index.vocab))
+        index.job_ids = arrays['job_ids']
+        index.doc_freq = np.array(arrays['doc_freq'])
+        index.counts = sp.csr_matrix(
+            (arrays['counts_data'], arrays['counts_indices'], arrays['counts_indptr']), shape=shape, copy=False
+        )
+        index._weights = sp.csr_matrix(
+            (arrays['weights_data'], arrays['weights_indices'], arrays['weights_indptr']), shape=shape, copy=False
+        )
+        index._idf = (np.log((1 + shape[0]) / (1 + index.doc_freq)) + 1).astype(np.float32)
+        index._row_by_job = {int(pk): row for row, pk in enumerate(index.job_ids)}
+        return index
+
+    def sync(self, batch_size=2000):
+        """ Index jobs changed since last_seq and drop deleted ones; returns how many were added """
+        total = 0
+        for batch, deleted, last_seq in changed_job_batches(self.last_seq, batch_size):
+            total += self.add_jobs(batch)
+            self.remove_jobs(deleted)
+            self.last_seq = last_seq
+        # A rescan of a pruned log reports no deletes; the index then outnumbers the table
+        if Job.objects.count() < len(self):
+            live = set(Job.objects.values_list('pk', flat=True).iterator(chunk_size=batch_size))
+            with self._lock:
+                indexed = list(self._row_by_job)
+            self.remove_jobs([pk for pk in indexed if pk not in live])
+        return total
+
+
+def changed_job_batches(after_seq=0, batch_size=2000):
+    """
+    Yield ([(pk, title, description), ...], [deleted pk, ...], seq) batches of
+    the jobs logged in JobChange after after_seq, oldest first; seq is the
+    log position a consumer has caught up to once it applies the batch.
+
+    The log is read rather than Job.updated_at because an updated_at
+    watermark skips rows whose transaction commits after a newer one.
+    sync_to_flask prunes the log, so when it no longer reaches back to
+    after_seq every job is yielded instead and deletes are left to the
+    caller.
+    """
+    if not _log_reaches(after_seq):
+        yield from _all_job_batches(batch_size)
+        return
+    while True:
+        changes = list(
+            JobChange.objects.filter(seq__gt=after_seq).order_by('seq').values_list('seq', 'job_id')[:batch_size]
+        )
+        if not changes:
+            return
+        after_seq = changes[-1][0]
+        job_ids = list(dict.fromkeys(job_id for _, job_id in changes))
+        jobs = {
+            pk: (pk, title, description)
+            for pk, title, description in Job.objects.filter(pk__in=job_ids).values_list('pk', 'title', 'description')
+        }
+        yield [jobs[pk] for pk in job_ids if pk in jobs], [pk for pk in job_ids if pk not in jobs], after_seq
+
+
+def _log_reaches(after_seq):
+    """ Whether every change after after_seq is still in the JobChange log """
+    pruned_seq = JobSyncState.objects.filter(direction=TO_FLASK).values_list('last_seq', flat=True).first() or 0
+    if after_seq >= pruned_seq:
+        return True
+    oldest_seq = JobChange.objects.order_by('seq').values_list('seq', flat=True).first()
+    return oldest_seq is not None and oldest_seq <= after_seq + 1
+
+
+def _all_job_batches(batch_size):
+    # Taken before the scan, so changes made during it are replayed by the next sync
+    last_seq = max(JobChange.objects.aggregate(seq=Max('seq'))['seq'] or 0,
+                   JobSyncState.objects.filter(direction=TO_FLASK).values_list('last_seq', flat=True).first() or 0)
+    batch = []
+    for job in Job.objects.order_by('pk').values_list('pk', 'title', 'description').iterator(chunk_size=batch_size):
+        batch.append(job)
+        if len(batch) >= batch_size:
+            yield batch, [], last_seq
+            batch = []
+    yield batch, [], last_seq
+
+
+def job_index_path():
+    return str(getattr(settings, 'JOB_INDEX_DIR', settings.BASE_DIR / 'job_index'))
+
+
+_job_index = None
+_job_index_lock = threading.Lock()
+_next_sync_at = 0.0
+
+
+def get_job_index():
+    """
+    The process-wide index: loaded from JOB_INDEX_DIR if saved there, then
+    caught up with the Job table at most every SYNC_INTERVAL seconds.
+
+    Requests inside the interval, and those arriving while another thread
+    syncs, get the current index without querying or waiting for the lock.
+    """
+    global _job_index, _next_sync_at
+    index = _job_index
+    if index is not None and time.monotonic() < _next_sync_at:
+        return index
+    if not _job_index_lock.acquire(blocking=index is None):
+        return index
+    try:
+        if _job_index is None:
+            path = job_index_path()
+            _job_index = JobMatchIndex.load(path) if os.path.exists(os.path.join(path, 'meta.json')) \
+                else JobMatchIndex()
+        if time.monotonic() >= _next_sync_at:
+            _job_index.sync()
+            _next_sync_at = time.monotonic() + SYNC_INTERVAL
+        return _job_index
+    finally:
+        _job_index_lock.release()
+
+
+def recommend_postings(student_ids, k=10, index=None):
+    """ Map each student_id to its k most similar Job postings, or None if the student does not exist """
+    index = get_job_index() if index is None else index
+    student_ids = [str(student_id) for student_id in student_ids]
+    rows = Student.objects.filter(student_id__in=student_ids).values_list('student_id', 'skills', 'interests', 'grades')
+    terms_by_id = {student_id: student_terms(skills, interests, grades) for student_id, skills, interests, grades in rows}
+
+    found_ids = [student_id for student_id in student_ids if student_id in terms_by_id]
+    queries = [terms_by_id[student_id] for student_id in found_ids]
+    matches = dict(zip(found_ids, index.top_k(queries, k)))
+    jobs = matched_jobs(matches)
+    deleted = {pk for pairs in matches.values() for pk, _ in pairs if pk not in jobs}
+    if deleted:
+        # Deleted since the last sync: drop them and score again, so every student still gets k postings
+        index.remove_jobs(deleted)
+        matches = dict(zip(found_ids, index.top_k(queries, k)))
+        jobs = matched_jobs(matches)
+    return postings_for_matches(student_ids, matches, jobs)
+
+
+def matched_jobs(matches):
+    """ pk -> Job for every job in student_id -> [(job pk, score)] matches that still exists """
+    return Job.objects.filter(pk__in={pk for pairs in matches.values() for pk, _ in pairs}).in_bulk()
+
+
+def postings_for_matches(student_ids, matches, jobs=None):
+    """ Turn student_id -> [(job pk, score)] matches into posting dicts; students without matches map to None """
+    jobs = matched_jobs(matches) if jobs is None else jobs
+    return {
+        student_id: [
+            {
+                "id": pk,
+                "title": jobs[pk].title,
+                "company": jobs[pk].company,
+                "location": jobs[pk].location,
+                "job_url": jobs[pk].job_url,
+                "score": round(score, 4),
+            }
+            for pk, score in matches[student_id] if pk in jobs
+        ] if student_id in matches else None
+        for student_id in student_ids
+    }
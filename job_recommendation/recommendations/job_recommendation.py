@@ -1,4 +1,9 @@
+import hashlib
+import heapq
 import json
+import threading
+import numpy as np
+from asgiref.sync import sync_to_async
 from recommendations.models import Student
 
 # Define job categories with relevant subjects
@@ -11,20 +16,275 @@ JOB_MATCHING_CRITERIA = {
     "Blockchain Developer": ["Blockchain Technology", "Cryptography", "Distributed Systems"]
 }
 
-def recommend_jobs(student_id):
-    """ Recommend jobs based on student's grades """
-    try:
-        student = Student.objects.get(student_id=student_id)
-        grades = json.loads(student.grades)  # Convert JSON string to dictionary
-        recommended_jobs = []
+# Grades are stored as small integer codes so a whole cohort fits in one int8 matrix
+GRADE_CODES = {"A": 0, "B": 1, "C": 2, "D": 3, "F": 4}
+MISSING_GRADE = -1
 
-        for job, required_courses in JOB_MATCHING_CRITERIA.items():
-            score = sum(1 for course in required_courses if grades.get(course) in ["A", "B"])
-            
-            if score >= 2:  # If the student has at least 2 strong grades
-                recommended_jobs.append(job)
+# Points a grade earns in each required course; D, F and missing grades earn nothing
+GRADE_WEIGHTS = {"A": 3, "B": 2, "C": 1}
+DEFAULT_JOB_THRESHOLD = 2 * GRADE_WEIGHTS["B"]  # Two B's, or an A and a C
 
-        return recommended_jobs if recommended_jobs else ["No strong matches found"]
+# Per-job overrides of DEFAULT_JOB_THRESHOLD, e.g. {"AI Engineer": 6} to ask for three B's
+JOB_THRESHOLDS = {}
 
+
+def recommend_jobs(student_id, top_k=None):
+    """ Recommend jobs based on student's grades, best matches first """
+    try:
+        student = Student.objects.get(student_id=student_id)
     except Student.DoesNotExist:
         return ["Student not found"]
+    return recommend_for_grades(student.grades, top_k)
+
+
+def recommend_for_grades(grades, top_k=None):
+    """ Recommend jobs for a grades dict or JSON string, best matches first """
+    matches = default_course_index().top_k(parse_grades(grades), top_k)
+    recommended_jobs = [job for job, _ in matches]
+    return recommended_jobs if recommended_jobs else ["No strong matches found"]
+
+
+def parse_grades(grades):
+    """ Return a course -> grade dict whether grades were stored as a dict or a JSON string """
+    if isinstance(grades, str):
+        try:
+            grades = json.loads(grades)
+        except json.JSONDecodeError:
+            return {}
+    return grades if isinstance(grades, dict) else {}
+
+
+def course_weights(courses):
+    """ Required courses as a course -> weight dict; a plain list weighs every course 1 """
+    return dict(courses) if isinstance(courses, dict) else dict.fromkeys(courses, 1)
+
+
+def job_threshold(job, thresholds=None):
+    thresholds = JOB_THRESHOLDS if thresholds is None else thresholds
+    return thresholds.get(job, DEFAULT_JOB_THRESHOLD)
+
+
+class CourseIndex:
+    """
+    Inverted index from course to the job profiles that require it.
+
+    Scoring a student only walks the postings of courses they earned points
+    in, so the cost grows with the student's transcript rather than with the
+    number of profiles. Profiles can be added, changed or removed one at a
+    time; only the postings of the courses involved are rewritten.
+
+    Postings are replaced rather than mutated in place, so scoring from other
+    threads never sees a half-updated posting while a profile changes.
+    """
+
+    def __init__(self):
+        self.postings = {}   # course -> {job: course weight}
+        self.profiles = {}   # job -> (course -> weight, threshold)
+        self._rank = {}      # job -> insertion order, to break score ties stably
+        self._next_rank = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_criteria(cls, criteria=None, thresholds=None):
+        criteria = JOB_MATCHING_CRITERIA if criteria is None else criteria
+        index = cls()
+        for job, courses in criteria.items():
+            index.set_profile(job, courses, job_threshold(job, thresholds))
+        return index
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def set_profile(self, job, courses, threshold=DEFAULT_JOB_THRESHOLD):
+        """ Add a job profile, or replace its courses and threshold if it exists """
+        weights = course_weights(courses)
+        with self._lock:
+            old = self.profiles.get(job)
+            old_weights = old[0] if old else {}
+            for course in old_weights.keys() - weights.keys():
+                posting = {other: w for other, w in self.postings[course].items() if other != job}
+                if posting:
+                    self.postings[course] = posting
+                else:
+                    del self.postings[course]
+            for course, weight in weights.items():
+                if old_weights.get(course) != weight:
+                    self.postings[course] = {**self.postings.get(course, {}), job: weight}
+            self.profiles[job] = (weights, threshold)
+            if job not in self._rank:
+                self._rank[job] = self._next_rank
+                self._next_rank += 1
+
+    def remove_profile(self, job):
+        with self._lock:
+            profile = self.profiles.pop(job, None)
+            if profile is None:
+                return
+            del self._rank[job]
+            for course in profile[0]:
+                posting = {other: w for other, w in self.postings[course].items() if other != job}
+                if posting:
+                    self.postings[course] = posting
+                else:
+                    del self.postings[course]
+
+    def score(self, grades):
+        """ Return job -> weighted score for every profile sharing a graded course with the student """
+        scores = {}
+        for course, grade in grades.items():
+            points = GRADE_WEIGHTS.get(grade)
+            if not points:
+                continue
+            for job, weight in self.postings.get(course, {}).items():
+                scores[job] = scores.get(job, 0) + points * weight
+        return scores
+
+    def top_k(self, grades, k=None):
+        """ Return up to k (job, score) pairs that clear their job's threshold, highest score first """
+        profiles = self.profiles
+        rank = self._rank
+        candidates = (
+            (score, -rank.get(job, 0), job)
+            for job, score in self.score(grades).items()
+            if job in profiles and score >= profiles[job][1]
+        )
+        best = heapq.nlargest(k, candidates) if k else sorted(candidates, reverse=True)
+        return [(job, score) for score, _, job in best]
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def default_course_index():
+    """ The CourseIndex over JOB_MATCHING_CRITERIA, built on first use """
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = CourseIndex.from_criteria()
+    return _default_index
+
+
+def criteria_version(job, courses, thresholds=None):
+    """ Hash of a job's weighted courses and threshold; it only changes when that job's criteria do """
+    return hashlib.sha1(json.dumps(
+        [sorted(course_weights(courses).items()), job_threshold(job, thresholds), GRADE_WEIGHTS], sort_keys=True
+    ).encode('utf-8')).hexdigest()
+
+
+# criteria_version of every job profile, replaced as a whole whenever a profile changes
+_criteria_versions = {job: criteria_version(job, courses) for job, courses in JOB_MATCHING_CRITERIA.items()}
+
+
+def criteria_versions():
+    return _criteria_versions
+
+
+def set_job_profile(job, courses, threshold=None):
+    """ Add or change a job profile and update the default index in place """
+    global _criteria_versions
+    JOB_MATCHING_CRITERIA[job] = courses
+    if threshold is not None:
+        JOB_THRESHOLDS[job] = threshold
+    _criteria_versions = {**_criteria_versions, job: criteria_version(job, courses)}
+    default_course_index().set_profile(job, courses, job_threshold(job))
+
+
+def remove_job_profile(job):
+    global _criteria_versions
+    JOB_MATCHING_CRITERIA.pop(job, None)
+    JOB_THRESHOLDS.pop(job, None)
+    _criteria_versions = {name: version for name, version in _criteria_versions.items() if name != job}
+    default_course_index().remove_profile(job)
+
+
+class BatchRecommender:
+    """
+    Scores many students against every job category at once.
+
+    The criteria are compiled into a course x job weight matrix and each
+    batch of students into a student x course matrix of grade codes, so the
+    per-job weighted scores for the whole batch are a single matrix product.
+    """
+
+    def __init__(self, criteria=None, thresholds=None):
+        criteria = JOB_MATCHING_CRITERIA if criteria is None else criteria
+        self.jobs = list(criteria)
+        self.courses = sorted({course for courses in criteria.values() for course in courses})
+        self.course_index = {course: i for i, course in enumerate(self.courses)}
+        self.thresholds = np.array([job_threshold(job, thresholds) for job in self.jobs], dtype=np.int32)
+
+        self.incidence = np.zeros((len(self.courses), len(self.jobs)), dtype=np.int32)
+        for j, job in enumerate(self.jobs):
+            for course, weight in course_weights(criteria[job]).items():
+                self.incidence[self.course_index[course], j] = weight
+
+        # Points per grade code; the trailing entry is what MISSING_GRADE (-1) indexes
+        self.points = np.zeros(len(GRADE_CODES) + 1, dtype=np.int32)
+        for grade, code in GRADE_CODES.items():
+            self.points[code] = GRADE_WEIGHTS.get(grade, 0)
+
+    def encode(self, grade_dicts):
+        """ Encode a list of course -> grade dicts as a student x course int8 matrix """
+        codes = np.full((len(grade_dicts), len(self.courses)), MISSING_GRADE, dtype=np.int8)
+        for i, grades in enumerate(grade_dicts):
+            for course, grade in grades.items():
+                col = self.course_index.get(course)
+                if col is not None:
+                    codes[i, col] = GRADE_CODES.get(grade, MISSING_GRADE)
+        return codes
+
+    def score(self, codes):
+        """ Return the student x job matrix of weighted scores """
+        return self.points[codes] @ self.incidence
+
+    def recommend(self, grade_dicts):
+        """ Return one list of recommended job names per grade dict, best matches first """
+        if not grade_dicts:
+            return []
+        scores = self.score(self.encode(grade_dicts))
+        results = []
+        for row in scores:
+            matched = np.flatnonzero(row >= self.thresholds)
+            # Stable sort keeps criteria order among equal scores, as CourseIndex.top_k does
+            recommended = [self.jobs[j] for j in matched[np.argsort(-row[matched], kind='stable')]]
+            results.append(recommended if recommended else ["No strong matches found"])
+        return results
+
+
+def recommend_jobs_bulk(student_ids, recommender=None):
+    """ Recommend jobs for many students with one query and one matrix product """
+    recommender = recommender or BatchRecommender()
+    student_ids = [str(student_id) for student_id in student_ids]
+    rows = Student.objects.filter(student_id__in=student_ids).values_list('student_id', 'grades')
+    grades_by_id = {student_id: parse_grades(grades) for student_id, grades in rows}
+
+    found_ids = [student_id for student_id in student_ids if student_id in grades_by_id]
+    scored = recommender.recommend([grades_by_id[student_id] for student_id in found_ids])
+    results = dict(zip(found_ids, scored))
+
+    return {
+        student_id: results.get(student_id, ["Student not found"])
+        for student_id in student_ids
+    }
+
+
+async def arecommend_jobs_bulk(student_ids, recommender=None):
+    """ recommend_jobs_bulk for async views: the query runs on the async ORM, the scoring on a worker thread """
+    recommender = recommender or BatchRecommender()
+    student_ids = [str(student_id) for student_id in student_ids]
+    rows = Student.objects.filter(student_id__in=student_ids).values_list('student_id', 'grades')
+    grades_by_id = {student_id: parse_grades(grades) async for student_id, grades in rows}
+
+    found_ids = [student_id for student_id in student_ids if student_id in grades_by_id]
+    # NumPy releases the GIL, so large batches do not hold up the event loop
+    scored = await sync_to_async(recommender.recommend, thread_sensitive=False)(
+        [grades_by_id[student_id] for student_id in found_ids]
+    )
+    results = dict(zip(found_ids, scored))
+
+    return {
+        student_id: results.get(student_id, ["Student not found"])
+        for student_id in student_ids
+    }
@@ -0,0 +1,329 @@
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.db import transaction
+from django.utils import timezone
+from .metrics import JOB_SYNC_BATCH_SECONDS, JOB_SYNC_LAG, JOB_SYNC_ROWS
+from .job_recommendation import parse_grades
+from .models import Job, JobChange, JobSyncState, Student
+
+# Change-data-capture sync between the Flask app's Jobs table (KoraQuest.db)
+# and the Job model. Each store logs its writes to a change table from
+# triggers (Flask JobChanges, Django JobChange); each direction reads its
+# source's log past a high-water mark, in batches, and upserts the current
+# state of the changed rows into the other store.
+#
+# A row belongs to the store it was created in. Copies are tagged with a
+# source of the other side's name, and their changes are skipped when read
+# back, so nothing bounces between the stores.
+#
+# The transcript grades the Flask app parses at upload (Talent.grades) go
+# one way, through the same machinery: the TalentGradeChanges log feeds the
+# Student the recommender reads, student_id koraquest:<talent id>.
+
+TO_DJANGO = 'flask_to_django'
+TO_FLASK = 'django_to_flask'
+GRADES_TO_DJANGO = 'grades_to_django'
+FLASK_ORIGIN = 'koraquest'  # Job.source of rows copied from Flask
+DJANGO_ORIGIN = 'django'    # Jobs.source of rows copied from Django
+DEFAULT_BATCH_SIZE = 1000
+
+# Job field <- Flask Jobs column, for the fields the two stores share
+SYNCED_FIELDS = {
+    'title': 'job_title',
+    'company': 'org_name',
+    'location': 'job_location',
+    'description': 'job_description',
+    'is_remote': 'is_remote',
+    'job_url': 'job_url',
+}
+
+
+def open_flask_db(path):
+    """ Autocommit connection to KoraQuest.db; ValueError when it lacks the change log """
+    if not os.path.exists(path):
+        raise ValueError(f"{path} does not exist")
+    db = sqlite3.connect(path, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    tables = {name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = {'Jobs', 'JobChanges', 'CatalogState', 'TalentGradeChanges'} - tables
+    if missing:
+        db.close()
+        raise ValueError(f"{path} is missing tables {', '.join(sorted(missing))}; run backend/schema.py")
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA busy_timeout=5000')
+    return db
+
+
+def sync_to_django(flask_db, batch_size=DEFAULT_BATCH_SIZE, prune=True):
+    """
+    Apply Flask Jobs changes past the high-water mark to the Job model.
+
+    Each batch is written together with its new mark in one transaction, so
+    a crash repeats at most one batch, and repeating one changes nothing.
+    The consumed JobChanges rows are deleted afterwards unless prune is off.
+    """
+    state, _ = JobSyncState.objects.get_or_create(direction=TO_DJANGO)
+
+    def read(after):
+        rows = flask_db.execute(
+            'SELECT seq, job_id, source, changed_at FROM JobChanges WHERE seq > ? ORDER BY seq LIMIT ?',
+            (after, batch_size)
+        ).fetchall()
+        return [(seq, job_id, source, _flask_timestamp(changed_at)) for seq, job_id, source, changed_at in rows]
+
+    def apply(job_ids, last_seq):
+        rows = _fetch_flask_jobs(flask_db, job_ids) if job_ids else {}
+        with transaction.atomic():
+            counts = _write_django_jobs(rows, [job_id for job_id in job_ids if job_id not in rows])
+            state.last_seq = last_seq
+            state.save(update_fields=['last_seq'])
+        return counts
+
+    def prune_log(last_seq):
+        flask_db.execute('DELETE FROM JobChanges WHERE seq <= ?', (last_seq,))
+
+    return _run(state, read, apply, prune_log if prune else None, DJANGO_ORIGIN, batch_size)
+
+
+def sync_to_flask(flask_db, batch_size=DEFAULT_BATCH_SIZE, prune=True):
+    """
+    Apply Job model changes past the high-water mark to the Flask Jobs table.
+
+    The Flask writes and the catalog generation bump commit together; the
+    new mark is saved after that commit, so a crash in between repeats one
+    (idempotent) batch rather than losing it.
+    """
+    state, _ = JobSyncState.objects.get_or_create(direction=TO_FLASK)
+
+    def read(after):
+        return list(
+            JobChange.objects.filter(seq__gt=after).order_by('seq')
+            .values_list('seq', 'job_id', 'source', 'changed_at')[:batch_size]
+        )
+
+    def apply(job_ids, last_seq):
+        jobs = {job['id']: job for job in Job.objects.filter(id__in=job_ids).values('id', 'created_at', *SYNCED_FIELDS)}
+        counts = _write_flask_jobs(flask_db, list(jobs.values()), [job_id for job_id in job_ids if job_id not in jobs])
+        state.last_seq = last_seq
+        state.save(update_fields=['last_seq'])
+        return counts
+
+    def prune_log(last_seq):
+        JobChange.objects.filter(seq__lte=last_seq).delete()
+
+    return _run(state, read, apply, prune_log if prune else None, FLASK_ORIGIN, batch_size)
+
+
+def sync_grades_to_django(flask_db, batch_size=DEFAULT_BATCH_SIZE, prune=True):
+    """
+    Apply Flask Talent grade changes past the high-water mark to Student.
+
+    Each talent with parsed grades has a Student with student_id
+    koraquest:<talent id>. Students are saved one by one so the Student
+    signals re-derive their strong courses and recommendations; a batch
+    commits with its mark, as in sync_to_django.
+    """
+    state, _ = JobSyncState.objects.get_or_create(direction=GRADES_TO_DJANGO)
+
+    def read(after):
+        rows = flask_db.execute(
+            'SELECT seq, talent_id, changed_at FROM TalentGradeChanges WHERE seq > ? ORDER BY seq LIMIT ?',
+            (after, batch_size)
+        ).fetchall()
+        return [(seq, talent_id, None, _flask_timestamp(changed_at)) for seq, talent_id, changed_at in rows]
+
+    def apply(talent_ids, last_seq):
+        rows = _fetch_flask_grades(flask_db, talent_ids) if talent_ids else {}
+        with transaction.atomic():
+            counts = _write_django_students(rows, [talent_id for talent_id in talent_ids if talent_id not in rows])
+            state.last_seq = last_seq
+            state.save(update_fields=['last_seq'])
+        return counts
+
+    def prune_log(last_seq):
+        flask_db.execute('DELETE FROM TalentGradeChanges WHERE seq <= ?', (last_seq,))
+
+    return _run(state, read, apply, prune_log if prune else None, None, batch_size)
+
+
+def student_id_for_talent(talent_id):
+    return f"{FLASK_ORIGIN}:{talent_id}"
+
+
+def _run(state, read, apply, prune_log, skip_source, batch_size):
+    """
+    Feed batches of changes to apply() until the log is drained, pruning
+    each batch from the log once applied; record lag and throughput.
+    Changes to rows of skip_source (None: no source is skipped) are not applied.
+    """
+    started = time.perf_counter()
+    totals = {'changes': 0, 'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    lag = 0.0
+    if prune_log:
+        prune_log(state.last_seq)  # Applied in a run that kept the log, or before a crash
+    while True:
+        batch_started = time.perf_counter()
+        changes = read(state.last_seq)
+        if not changes:
+            break
+        # Many changes to one row collapse into one write of its current state
+        job_ids = list(dict.fromkeys(
+            job_id for _, job_id, source, _ in changes if skip_source is None or source != skip_source
+        ))
+        counts = apply(job_ids, changes[-1][0])
+        if prune_log:
+            prune_log(state.last_seq)
+
+        totals['changes'] += len(changes)
+        for outcome, count in counts.items():
+            totals[outcome] += count
+            JOB_SYNC_ROWS.labels(state.direction, outcome).inc(count)
+        JOB_SYNC_ROWS.labels(state.direction, 'skipped').inc(len(changes) - len(job_ids))
+        lag = (timezone.now() - changes[-1][3]).total_seconds()
+        JOB_SYNC_LAG.labels(state.direction).set(lag)
+        JOB_SYNC_BATCH_SECONDS.labels(state.direction).observe(time.perf_counter() - batch_started)
+        if len(changes) < batch_size:
+            break
+
+    elapsed = time.perf_counter() - started
+    state.synced_at = timezone.now()
+    state.lag_seconds = lag
+    state.rows_per_second = totals['changes'] / elapsed if totals['changes'] and elapsed else 0.0
+    state.rows_synced += totals['changes']
+    state.save()
+    if not totals['changes']:
+        JOB_SYNC_LAG.labels(state.direction).set(0)
+    return {**totals, 'seconds': elapsed, 'lag_seconds': lag, 'last_seq': state.last_seq}
+
+
+def _flask_timestamp(changed_at):
+    return datetime.strptime(changed_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=dt_timezone.utc)
+
+
+def _fetch_flask_jobs(flask_db, job_ids):
+    """ Current Flask rows of the given ids, skipping copies of Django jobs; {id: row} """
+    placeholders = ', '.join('?' * len(job_ids))
+    rows = flask_db.execute(
+        f"SELECT id, source, {', '.join(SYNCED_FIELDS.values())} FROM Jobs WHERE id IN ({placeholders})",
+        job_ids
+    ).fetchall()
+    return {row['id']: row for row in rows if row['source'] != DJANGO_ORIGIN}
+
+
+def _write_django_jobs(rows, deleted_ids):
+    """ Upsert Flask rows into Job by external_id, rewriting only jobs whose fields differ """
+    external_ids = {job_id: f"{FLASK_ORIGIN}:{job_id}" for job_id in rows}
+    existing = {job.external_id: job for job in Job.objects.filter(external_id__in=external_ids.values())}
+    to_create, to_update = [], []
+    now = timezone.now()
+    for job_id, row in rows.items():
+        values = {
+            'title': row['job_title'], 'company': row['org_name'] or '', 'location': row['job_location'] or '',
+            'description': row['job_description'], 'is_remote': bool(row['is_remote']), 'job_url': row['job_url'] or '',
+        }
+        job = existing.get(external_ids[job_id])
+        if job is None:
+            to_create.append(Job(external_id=external_ids[job_id], source=FLASK_ORIGIN, **values))
+        elif any(getattr(job, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(job, field, value)
+            job.updated_at = now  # bulk_update skips auto_now
+            to_update.append(job)
+
+    Job.objects.bulk_create(to_create)
+    Job.objects.bulk_update(to_update, [*SYNCED_FIELDS, 'updated_at'])
+    deleted, _ = Job.objects.filter(external_id__in=[f"{FLASK_ORIGIN}:{job_id}" for job_id in deleted_ids]).delete()
+    return {
+        'created': len(to_create), 'updated': len(to_update), 'deleted': deleted,
+        'unchanged': len(rows) - len(to_create) - len(to_update),
+    }
+
+
+def _fetch_flask_grades(flask_db, talent_ids):
+    """ Name and parsed grades of the given talents that have grades; {id: row} """
+    placeholders = ', '.join('?' * len(talent_ids))
+    rows = flask_db.execute(
+        f"SELECT id, name, grades FROM Talent WHERE id IN ({placeholders}) AND grades IS NOT NULL", talent_ids
+    ).fetchall()
+    return {row['id']: row for row in rows}
+
+
+def _write_django_students(rows, deleted_ids):
+    """ Upsert talents' grades into Student by student_id, saving only students whose name or grades differ """
+    student_ids = {talent_id: student_id_for_talent(talent_id) for talent_id in rows}
+    existing = Student.objects.in_bulk(list(student_ids.values()), field_name='student_id')
+    created = updated = 0
+    for talent_id, row in rows.items():
+        grades = parse_grades(row['grades'])
+        student = existing.get(student_ids[talent_id])
+        if student is None:
+            Student.objects.create(student_id=student_ids[talent_id], name=row['name'], grades=grades)
+            created += 1
+        elif student.name != row['name'] or parse_grades(student.grades) != grades:
+            student.name = row['name']
+            student.grades = grades
+            student.save()
+            updated += 1
+
+    deleted_student_ids = [student_id_for_talent(talent_id) for talent_id in deleted_ids]
+    _, deleted = Student.objects.filter(student_id__in=deleted_student_ids).delete()
+    return {
+        'created': created, 'updated': updated, 'deleted': deleted.get(Student._meta.label, 0),
+        'unchanged': len(rows) - created - updated,
+    }
+
+
+def _write_flask_jobs(flask_db, jobs, deleted_ids):
+    """ Upsert Job rows into Flask Jobs by external_job_id in one transaction, bumping the catalog on change """
+    columns = list(SYNCED_FIELDS.values())
+    upsert = f"""
+        INSERT INTO Jobs ({', '.join(columns)}, source, created_at, external_job_id)
+        VALUES ({', '.join('?' * len(columns))}, '{DJANGO_ORIGIN}', ?, ?)
+        ON CONFLICT (external_job_id) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in columns)}
+        WHERE {' OR '.join(f'Jobs.{column} IS NOT excluded.{column}' for column in columns)}
+    """
+    if not jobs and not deleted_ids:
+        return {}
+    external_ids = [f"{DJANGO_ORIGIN}:{job['id']}" for job in jobs]
+    params = [
+        (job['title'], job['company'], job['location'], job['description'], int(job['is_remote']), job['job_url'],
+         job['created_at'].astimezone(dt_timezone.utc).strftime('%Y-%m-%d %H:%M:%S'), external_id)
+        for job, external_id in zip(jobs, external_ids)
+    ]
+
+    flask_db.execute('BEGIN IMMEDIATE')
+    try:
+        existing = set()
+        if external_ids:
+            placeholders = ', '.join('?' * len(external_ids))
+            existing = {external_id for (external_id,) in flask_db.execute(
+                f"SELECT external_job_id FROM Jobs WHERE external_job_id IN ({placeholders})", external_ids
+            )}
+        written = flask_db.executemany(upsert, params).rowcount if params else 0
+        deleted = 0
+        if deleted_ids:
+            placeholders = ', '.join('?' * len(deleted_ids))
+            deleted = flask_db.execute(
+                f"DELETE FROM Jobs WHERE external_job_id IN ({placeholders})",
+                [f"{DJANGO_ORIGIN}:{job_id}" for job_id in deleted_ids]
+            ).rowcount
+        if written or deleted:
+            # Same bump as the Flask app's writes, so its cached job listings are dropped
+            flask_db.execute(
+                'UPDATE CatalogState SET generation = generation + 1, modified_at = CURRENT_TIMESTAMP WHERE id = 1'
+            )
+        flask_db.execute('COMMIT')
+    except Exception:
+        # SQLite may already have rolled back (a full disk, an interrupt); don't mask the error
+        if flask_db.in_transaction:
+            flask_db.execute('ROLLBACK')
+        raise
+
+    created = len(external_ids) - len(existing)
+    return {
+        'created': created, 'updated': written - created, 'deleted': deleted,
+        'unchanged': len(jobs) - written,
+    }
@@ -0,0 +1,68 @@
+import tempfile
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from recommendations.vector_store import HashingEncoder, JobVectorIndex
+
+
+def synthetic_postings(count, topics=200, vocab_size=20000, words_per_job=60, seed=0):
+    """ Job-like texts: each posting draws most of its words from one of `topics` word pools """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i}" for i in range(vocab_size)])
+    pools = [rng.choice(vocab_size, 150, replace=False) for _ in range(topics)]
+    texts = []
+    for topic in rng.integers(0, topics, count):
+        on_topic = vocab[rng.choice(pools[topic], int(words_per_job * 0.7))]
+        noise = vocab[rng.integers(0, vocab_size, words_per_job - len(on_topic))]
+        texts.append(' '.join(np.concatenate([on_topic, noise])))
+    return texts
+
+
+class Command(BaseCommand):
+    help = "Measure recall@k and QPS of the IVF job vector index against exact search on synthetic postings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--dim', type=int, default=512)
+        parser.add_argument('--nlist', type=int, default=None)
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+
+    def handle(self, *args, **options):
+        k = options['k']
+        encoder = HashingEncoder(dim=options['dim'])
+        texts = synthetic_postings(options['jobs'] + options['queries'])
+        query_texts = texts[options['jobs']:]
+
+        with tempfile.TemporaryDirectory() as path:
+            index = JobVectorIndex(path, encoder, writable=True)
+            start = time.perf_counter()
+            for offset in range(0, options['jobs'], 5000):
+                batch = texts[offset:min(offset + 5000, options['jobs'])]
+                index.add_jobs([(offset + i, text, '') for i, text in enumerate(batch)])
+            encoded = time.perf_counter()
+            index.train(options['nlist'])
+            index.save()
+            trained = time.perf_counter()
+            self.stdout.write(f"{options['jobs']} jobs x {encoder.dim} dims: encode {encoded - start:.1f}s, "
+                              f"train {index.ivf.nlist} lists {trained - encoded:.1f}s")
+
+            reader = JobVectorIndex(path, encoder)
+            queries = encoder.encode(query_texts)
+            start = time.perf_counter()
+            exact = reader.search_exact(queries, k)
+            exact_qps = len(queries) / (time.perf_counter() - start)
+            truth = [{pk for pk, _ in result} for result in exact]
+
+            self.stdout.write(f"{'nprobe':>7} {'recall@' + str(k):>10} {'QPS':>10} {'speedup':>8}")
+            self.stdout.write(f"{'exact':>7} {1.0:>10.3f} {exact_qps:>10,.0f} {1.0:>7.1f}x")
+            for nprobe in options['nprobe']:
+                start = time.perf_counter()
+                found = reader.search(queries, k, nprobe)
+                qps = len(queries) / (time.perf_counter() - start)
+                recall = np.mean([
+                    len(expected & {pk for pk, _ in result}) / max(len(expected), 1)
+                    for expected, result in zip(truth, found)
+                ])
+                self.stdout.write(f"{nprobe:>7} {recall:>10.3f} {qps:>10,.0f} {qps / exact_qps:>7.1f}x")
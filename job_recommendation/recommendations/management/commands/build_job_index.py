@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendations.job_matching import JobMatchIndex, job_index_path
+
+
+class Command(BaseCommand):
+    help = "Build or update the TF-IDF job matching index and save it for the web workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Index every job from scratch")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Jobs read and indexed per batch")
+        parser.add_argument('--path', type=str, default=None, help="Index directory (default: JOB_INDEX_DIR)")
+
+    def handle(self, *args, **options):
+        path = options['path'] or job_index_path()
+        start = time.perf_counter()
+        try:
+            index = JobMatchIndex() if options['rebuild'] else JobMatchIndex.load(path, mmap=False)
+        except FileNotFoundError:
+            index = JobMatchIndex()
+
+        added = index.sync(batch_size=options['batch_size'])
+        index.save(path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {added} new or updated jobs; {len(index)} jobs and {len(index.vocab)} terms "
+            f"saved to {path} in {time.perf_counter() - start:.1f}s"
+        ))
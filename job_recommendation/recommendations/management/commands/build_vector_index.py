@@ -0,0 +1,43 @@
+import os
+import shutil
+import time
+from django.core.management.base import BaseCommand
+from recommendations.vector_store import JobVectorIndex, get_encoder, vector_index_path
+
+
+class Command(BaseCommand):
+    help = "Encode new or updated jobs into the memory-mapped vector store and refresh its IVF index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Encode every job into a fresh store and swap it in when done")
+        parser.add_argument('--nlist', type=int, default=None,
+                            help="Number of IVF lists when (re)training (default: about 4 * sqrt(jobs))")
+        parser.add_argument('--retrain-growth', type=float, default=4.0,
+                            help="Retrain the IVF centroids once the catalog has grown this many times")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Jobs read and encoded per batch")
+
+    def handle(self, *args, **options):
+        path = vector_index_path()
+        build_path = f"{path}.rebuild-{os.getpid()}" if options['rebuild'] else path
+        start = time.perf_counter()
+
+        index = JobVectorIndex(build_path, get_encoder(), writable=True)
+        added = index.sync(batch_size=options['batch_size'])
+        retrained = index.needs_training(options['retrain_growth'])
+        if retrained:
+            index.train(options['nlist'])
+        index.save()
+
+        if options['rebuild']:
+            old_path = f"{path}.old-{os.getpid()}"
+            if os.path.exists(path):
+                os.replace(path, old_path)
+            os.replace(build_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+        lists = index.ivf.nlist if index.ivf is not None else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Encoded {added} jobs; {len(index)} vectors in {path}, {lists} IVF lists"
+            f"{' (retrained)' if retrained else ''} in {time.perf_counter() - start:.1f}s"
+        ))
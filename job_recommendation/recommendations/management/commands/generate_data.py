@@ -0,0 +1,205 @@
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+import multiprocessing
+import bcrypt
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from recommendations.models import Job, Student
+from recommendations.strong_courses import course_bits
+from recommendations import synthetic_data
+
+
+class Command(BaseCommand):
+    help = "Generate large, reproducible synthetic data sets for the Django and Flask databases"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=0, help="Django Student rows")
+        parser.add_argument('--jobs', type=int, default=0, help="Job postings")
+        parser.add_argument('--jobs-target', choices=['django', 'flask', 'both'], default='django',
+                            help="Write jobs to the Django Job table, the Flask Jobs table or both")
+        parser.add_argument('--talents', type=int, default=0, help="Flask Talent rows")
+        parser.add_argument('--organizations', type=int, default=0, help="Flask Organization rows")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Same seed and batch size give the same rows, whatever the worker count")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows generated and inserted per batch")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Processes generating rows; one process writes")
+        parser.add_argument('--flask-db', type=str, default=str(settings.BASE_DIR.parent / 'KoraQuest.db'),
+                            help="Path to the Flask app's SQLite database")
+
+    def handle(self, *args, **options):
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        self.workers = max(1, options['workers'])
+        if self.batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        flask_jobs = options['jobs'] if options['jobs_target'] in ('flask', 'both') else 0
+        django_jobs = options['jobs'] if options['jobs_target'] in ('django', 'both') else 0
+        flask_db = None
+        if options['talents'] or options['organizations'] or flask_jobs:
+            flask_db = self.open_flask_db(options['flask_db'])
+
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(self.workers, mp_context=ctx) if self.workers > 1 else InlinePool() as pool:
+            self.pool = pool
+            if options['students']:
+                bits = course_bits(synthetic_data.COURSES, create=True)
+                self.run('students', options['students'], partial(synthetic_data.make_students, course_bits=bits),
+                         self.write_students)
+            if options['organizations']:
+                org_password = bcrypt.hashpw(synthetic_data.FAKE_PASSWORD.encode('utf-8'), bcrypt.gensalt())
+                self.run('organizations', options['organizations'], synthetic_data.make_organizations,
+                         partial(self.write_organizations, flask_db, org_password))
+            if django_jobs or flask_jobs:
+                now = datetime.now(timezone.utc).replace(microsecond=0)
+                make = partial(synthetic_data.make_jobs, org_count=options['organizations'], now=now)
+                if django_jobs:
+                    self.run('django jobs', django_jobs, make, self.write_django_jobs)
+                if flask_jobs:
+                    self.run('flask jobs', flask_jobs, make, partial(self.write_flask_jobs, flask_db))
+            if options['talents']:
+                password = bcrypt.hashpw(synthetic_data.FAKE_PASSWORD.encode('utf-8'), bcrypt.gensalt())
+                self.run('talents', options['talents'], synthetic_data.make_talents,
+                         partial(self.write_talents, flask_db, password))
+
+        if flask_db is not None:
+            flask_db.close()
+        if options['students']:
+            self.stdout.write("Run refresh_recommendations to materialize recommendations for the new students")
+
+    def run(self, label, total, make, write):
+        """
+        Generate `total` rows in chunks on the worker pool and write them in
+        order. At most two chunks per worker are in flight, so memory stays
+        flat no matter how many rows are generated.
+        """
+        start_time = time.perf_counter()
+        chunks = ((chunk, start, min(self.batch_size, total - start))
+                  for chunk, start in enumerate(range(0, total, self.batch_size)))
+        pending = deque()
+        written = 0
+        for chunk, start, count in chunks:
+            pending.append(self.pool.submit(make, self.seed, chunk, start, count))
+            if len(pending) >= 2 * self.workers:
+                written += write(pending.popleft().result())
+        while pending:
+            written += write(pending.popleft().result())
+
+        elapsed = time.perf_counter() - start_time
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {written} new rows of {total} in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)"
+        ))
+
+    def write_students(self, rows):
+        students = [
+            Student(student_id=student_id, name=name, grades=grades, interests=interests, skills=skills,
+                    strong_courses=strong_courses)
+            for student_id, name, grades, interests, skills, strong_courses in rows
+        ]
+        existing = set(Student.objects.filter(student_id__in=[s.student_id for s in students])
+                       .values_list('student_id', flat=True))
+        with transaction.atomic():
+            Student.objects.bulk_create([s for s in students if s.student_id not in existing],
+                                        batch_size=self.batch_size)
+        reset_queries()  # DEBUG keeps every query's SQL otherwise
+        return len(students) - len(existing)
+
+    def write_django_jobs(self, rows):
+        jobs = [
+            Job(title=title, company=company, location=location, description=description, is_remote=is_remote,
+                job_url=f"https://jobs.example.com/synthetic/{index}", source='synthetic',
+                external_id=f"synthetic_{index}")
+            for index, title, company, _, location, description, _, is_remote, _ in rows
+        ]
+        # Job.external_id is not unique, so re-runs skip already generated postings here
+        existing = set(Job.objects.filter(external_id__in=[job.external_id for job in jobs])
+                       .values_list('external_id', flat=True))
+        with transaction.atomic():
+            Job.objects.bulk_create([job for job in jobs if job.external_id not in existing],
+                                    batch_size=self.batch_size)
+        reset_queries()
+        return len(jobs) - len(existing)
+
+    def open_flask_db(self, path):
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist; run backend/schema.py to create its schema")
+        db = sqlite3.connect(path, isolation_level=None)
+        tables = {name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = {'Talent', 'Organization', 'Jobs', 'CatalogState'} - tables
+        if missing:
+            db.close()
+            raise CommandError(f"{path} is missing tables {', '.join(sorted(missing))}; "
+                               f"run backend/schema.py to create its schema")
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('PRAGMA busy_timeout=5000')
+        return db
+
+    @staticmethod
+    def insert_many(db, sql, params):
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            # rowcount leaves out rows written by triggers, such as the Jobs_fts sync
+            inserted = db.executemany(sql, params).rowcount
+            db.execute('COMMIT')
+        except Exception:
+            # SQLite may already have rolled back (a full disk, an interrupt); don't mask the error
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        return inserted
+
+    def write_talents(self, db, password, rows):
+        return self.insert_many(db, '''
+            INSERT OR IGNORE INTO Talent (name, password, email, phone, resume, grades) VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(name, password, email, phone, resume, grades) for name, email, phone, resume, grades in rows])
+
+    def write_organizations(self, db, password, rows):
+        return self.insert_many(db, '''
+            INSERT OR IGNORE INTO Organization (org_names, org_password, org_email) VALUES (?, ?, ?)
+        ''', [(name, password, email) for name, email in rows])
+
+    def write_flask_jobs(self, db, rows):
+        inserted = self.insert_many(db, '''
+            INSERT OR IGNORE INTO Jobs (
+                org_email, job_title, job_description, job_location, job_type, is_remote,
+                org_name, source, created_at, external_job_id, job_url
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, 'synthetic', ?, ?, ?)
+        ''', [
+            (org_email, title, description, location, job_type, int(is_remote), company,
+             created_at.strftime('%Y-%m-%d %H:%M:%S'), f"synthetic_{index}",
+             f"https://jobs.example.com/synthetic/{index}")
+            for index, title, company, org_email, location, description, job_type, is_remote, created_at in rows
+        ])
+        if inserted:
+            # Bump the catalog generation so the Flask app drops its cached job listings
+            db.execute("UPDATE CatalogState SET generation = generation + 1, modified_at = CURRENT_TIMESTAMP WHERE id = 1")
+        return inserted
+
+
+class InlinePool:
+    """ Stand-in for the process pool with --workers 1: runs each chunk in this process """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        return _Result(fn(*args))
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
@@ -1,22 +1,14 @@
 import random
-import json
 from django.core.management.base import BaseCommand
 from faker import Faker
 from recommendations.models import Student  
+from recommendations.recommendation_store import store_recommendations
+from recommendations.strong_courses import strong_course_bitset
+from recommendations.synthetic_data import COURSES as courses
 
 # Initialize Faker
 fake = Faker()
 
-courses = [
-    'Programming Fundamentals', 'Data Structures', 'Algorithms', 'Database Systems', 
-    'Operating Systems', 'Computer Networks', 'Software Engineering', 
-    'Artificial Intelligence', 'Machine Learning', 'Computer Vision', 
-    'Cybersecurity', 'Cloud Computing', 'Mobile App Development', 
-    'Web Development', 'Blockchain Technology', 'Big Data Analytics', 
-    'Internet of Things (IoT)', 'Computer Graphics', 'Parallel Computing',
-    'Human-Computer Interaction'
-]
-
 
 # List of possible skills and career aspirations
 skills_list = ['Python', 'Java', 'C++', 'Data Analysis', 'Machine Learning', 'AI', 'Web Development', 'Software Engineering']
@@ -24,8 +16,7 @@ career_goals = ['Software Engineer', 'Data Scientist', 'Product Manager', 'Resea
 
 # Function to generate random grades
 def generate_grades():
-    grades = {course: random.choice(['A', 'B', 'C', 'D', 'F']) for course in courses}
-    return json.dumps(grades) 
+    return {course: random.choice(['A', 'B', 'C', 'D', 'F']) for course in courses}
 
 # Function to generate random extracurricular activities
 def generate_extracurricular_activities():
@@ -45,10 +36,12 @@ class Command(BaseCommand):
 
         students = []
         for _ in range(num_students):
+            grades = generate_grades()
             student = Student(
                 name=fake.name(),
                 student_id=fake.unique.random_number(digits=6),
-                grades=generate_grades(),
+                grades=grades,
+                strong_courses=strong_course_bitset(grades),
                 skills=', '.join(random.sample(skills_list, k=3)),  
                 interests=random.choice(['Software Development', 'Data Science', 'Engineering']),
             )
@@ -56,4 +49,6 @@ class Command(BaseCommand):
 
         # Bulk insert all students
         Student.objects.bulk_create(students)
+        # bulk_create skips post_save, so materialize their recommendations here
+        store_recommendations([(student.pk, student.grades) for student in students])
         self.stdout.write(self.style.SUCCESS(f"Successfully created {num_students} students!"))
@@ -0,0 +1,50 @@
+import json
+import sys
+from django.core.management.base import BaseCommand
+from recommendations.models import Student
+from recommendations.job_recommendation import BatchRecommender, parse_grades
+
+
+# Command class for Django management command
+class Command(BaseCommand):
+    help = "Score every student against every job category in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Number of students scored per matrix product")
+        parser.add_argument('--output', type=str, default=None,
+                            help="Write one JSON line per student to this file (default: stdout)")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        recommender = BatchRecommender()
+        out = open(options['output'], 'w') if options['output'] else sys.stdout
+
+        job_counts = dict.fromkeys(recommender.jobs, 0)
+        total = 0
+        try:
+            rows = Student.objects.order_by('pk').values_list('student_id', 'grades').iterator(chunk_size=chunk_size)
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    total += self.score_chunk(recommender, chunk, out, job_counts)
+                    chunk = []
+            if chunk:
+                total += self.score_chunk(recommender, chunk, out, job_counts)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        summary = ', '.join(f"{job}: {count}" for job, count in job_counts.items())
+        self.stderr.write(self.style.SUCCESS(f"Scored {total} students ({summary})"))
+
+    def score_chunk(self, recommender, chunk, out, job_counts):
+        student_ids = [student_id for student_id, _ in chunk]
+        results = recommender.recommend([parse_grades(grades) for _, grades in chunk])
+        for student_id, recommended in zip(student_ids, results):
+            out.write(json.dumps({"student_id": student_id, "recommended_jobs": recommended}) + '\n')
+            for job in recommended:
+                if job in job_counts:
+                    job_counts[job] += 1
+        return len(chunk)
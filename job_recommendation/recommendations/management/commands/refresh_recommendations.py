@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from recommendations.recommendation_store import refresh_stale
+
+
+class Command(BaseCommand):
+    help = "Backfill and recompute stale rows of the materialized Recommendation table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Students scored per batch")
+
+    def handle(self, *args, **options):
+        stats = refresh_stale(chunk_size=options['chunk_size'])
+        recomputed = ', '.join(stats['jobs_recomputed']) or 'none'
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {stats['students_backfilled']} students, "
+            f"recomputed jobs: {recomputed}, deleted {stats['rows_deleted']} obsolete rows"
+        ))
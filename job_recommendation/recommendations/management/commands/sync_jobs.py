@@ -0,0 +1,55 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from prometheus_client import start_http_server
+from recommendations.job_sync import (
+    DEFAULT_BATCH_SIZE, GRADES_TO_DJANGO, TO_DJANGO, TO_FLASK, open_flask_db, sync_grades_to_django, sync_to_django,
+    sync_to_flask
+)
+
+
+class Command(BaseCommand):
+    help = ("Copy new and changed jobs between the Flask Jobs table and the Django Job model, "
+            "and talents' transcript grades to Student")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flask-db', type=str, default=str(settings.BASE_DIR.parent / 'KoraQuest.db'),
+                            help="Path to the Flask app's SQLite database")
+        parser.add_argument('--direction', choices=['both', 'to-django', 'to-flask'], default='both')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Changes read per batch")
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Keep running, syncing every this many seconds (0: sync once and exit)")
+        parser.add_argument('--keep-log', action='store_true',
+                            help="Leave applied changes in the change logs, e.g. when another consumer reads them")
+        parser.add_argument('--metrics-port', type=int, help="Serve the sync's Prometheus metrics on this port")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        try:
+            flask_db = open_flask_db(options['flask_db'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['metrics_port']:
+            start_http_server(options['metrics_port'])
+
+        runs = []
+        if options['direction'] in ('both', 'to-flask'):
+            runs.append((TO_FLASK, sync_to_flask))
+        if options['direction'] in ('both', 'to-django'):
+            runs.append((TO_DJANGO, sync_to_django))
+            runs.append((GRADES_TO_DJANGO, sync_grades_to_django))
+
+        while True:
+            for direction, sync in runs:
+                stats = sync(flask_db, batch_size=options['batch_size'], prune=not options['keep_log'])
+                if stats['changes'] or not options['interval']:
+                    self.stdout.write(
+                        f"{direction}: {stats['changes']} changes in {stats['seconds']:.2f}s "
+                        f"({stats['changes'] / max(stats['seconds'], 1e-9):.0f}/s), created {stats['created']}, "
+                        f"updated {stats['updated']}, deleted {stats['deleted']}, unchanged {stats['unchanged']}, "
+                        f"lag {stats['lag_seconds']:.1f}s, at change {stats['last_seq']}"
+                    )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,132 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse as DjangoJsonResponse
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Request timing for the Django project, exposed in Prometheus text format on /metrics.
+# Stage names match the Flask app's (db_query, serialize), so both can share dashboards.
+
+REQUEST_SECONDS = Histogram(
+    'django_request_duration_seconds', 'Time spent handling a request', ['method', 'route', 'status']
+)
+STAGE_SECONDS = Histogram(
+    'django_stage_duration_seconds', 'Time spent in one stage of a request', ['stage'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+
+JOB_SYNC_ROWS = Counter(
+    'django_job_sync_rows_total', 'Job changes applied by the Flask <-> Django job sync', ['direction', 'outcome']
+)
+JOB_SYNC_LAG = Gauge(
+    'django_job_sync_lag_seconds', 'Age of the newest change applied by the job sync', ['direction']
+)
+JOB_SYNC_BATCH_SECONDS = Histogram(
+    'django_job_sync_batch_duration_seconds', 'Time spent reading and applying one job sync batch', ['direction']
+)
+
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+
+@contextmanager
+def span(stage):
+    """ Time a block as one stage; inside a request it also counts towards the Server-Timing totals """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans[stage] = spans.get(stage, 0.0) + elapsed
+
+
+class JsonResponse(DjangoJsonResponse):
+    """ JsonResponse with its encoding recorded as the 'serialize' stage """
+
+    def __init__(self, *args, **kwargs):
+        with span('serialize'):
+            super().__init__(*args, **kwargs)
+
+
+def time_query(execute, sql, params, many, context):
+    with span('db_query'):
+        return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def time_connection_queries(sender, connection, **kwargs):
+    """
+    Time every query on every connection. Async views run their queries on
+    worker threads with their own connections, so the wrapper is installed
+    per connection rather than around the request; the request's spans
+    reach those threads through the context sync_to_async copies.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class RequestTimingMiddleware:
+    """
+    Times each request and the database queries it runs, records both as
+    histograms and returns the per-stage totals in a Server-Timing header.
+    DRF responses are rendered after the view returns; that render is
+    timed as the 'serialize' stage. Runs natively under both WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_spans.set({})
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            spans = _request_spans.get()
+        finally:
+            _request_spans.reset(token)
+        return self.record(request, response, start, spans)
+
+    async def __acall__(self, request):
+        token = _request_spans.set({})
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            spans = _request_spans.get()
+        finally:
+            _request_spans.reset(token)
+        return self.record(request, response, start, spans)
+
+    def record(self, request, response, start, spans):
+        elapsed = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(elapsed)
+        timings = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in spans.items()]
+        response['Server-Timing'] = ', '.join(timings + [f"total;dur={elapsed * 1000:.2f}"])
+        return response
+
+    def process_template_response(self, request, response):
+        render = response.render
+
+        def timed_render():
+            with span('serialize'):
+                return render()
+
+        response.render = timed_render
+        return response
+
+
+def metrics(request):
+    """ Prometheus scrape endpoint """
+    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE_LATEST)
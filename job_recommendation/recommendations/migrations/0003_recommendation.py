@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_rename_job_type_job_source_job_external_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_title', models.CharField(max_length=255)),
+                ('score', models.PositiveSmallIntegerField()),
+                ('criteria_version', models.CharField(max_length=40)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='recommendations.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job_title', '-score'], name='recommendation_job_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'job_title'), name='unique_student_job_title')],
+            },
+        ),
+    ]
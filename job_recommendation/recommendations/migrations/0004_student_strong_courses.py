@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:27
+
+import json
+from django.db import migrations, models
+
+STRONG_GRADES = ('A', 'B')
+
+
+def normalize_grades(apps, schema_editor):
+    """
+    Decode grades saved as a JSON-encoded string inside the JSONField and
+    fill in the strong-course bitsets.
+    """
+    Student = apps.get_model('recommendations', 'Student')
+    Course = apps.get_model('recommendations', 'Course')
+    bits = dict(Course.objects.values_list('name', 'bit'))
+
+    batch = []
+    for student in Student.objects.order_by('pk').iterator(chunk_size=2000):
+        grades = student.grades
+        while isinstance(grades, str):
+            try:
+                grades = json.loads(grades)
+            except json.JSONDecodeError:
+                grades = {}
+        if not isinstance(grades, dict):
+            grades = {}
+
+        packed = bytearray()
+        for course, grade in grades.items():
+            if grade not in STRONG_GRADES:
+                continue
+            if course not in bits:
+                bits[course] = len(bits)
+                Course.objects.create(name=course, bit=bits[course])
+            bit = bits[course]
+            if len(packed) <= bit // 8:
+                packed.extend(b'\0' * (bit // 8 + 1 - len(packed)))
+            packed[bit // 8] |= 1 << (bit % 8)
+
+        student.grades = grades
+        student.strong_courses = bytes(packed)
+        batch.append(student)
+        if len(batch) >= 2000:
+            Student.objects.bulk_update(batch, ['grades', 'strong_courses'])
+            batch = []
+    if batch:
+        Student.objects.bulk_update(batch, ['grades', 'strong_courses'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('bit', models.PositiveIntegerField(unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='strong_courses',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(normalize_grades, migrations.RunPython.noop),
+    ]
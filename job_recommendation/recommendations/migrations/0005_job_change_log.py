@@ -0,0 +1,65 @@
+from django.db import migrations, models
+
+# Every write to recommendations_job is logged by these triggers, bulk_create and bulk_update included
+TRIGGERS = {
+    'insert': ('AFTER INSERT', 'new'),
+    'update': ('AFTER UPDATE', 'new'),
+    'delete': ('AFTER DELETE', 'old'),
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for op, (event, row) in TRIGGERS.items():
+        schema_editor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS recommendations_job_changes_{op} {event} ON recommendations_job BEGIN
+                INSERT INTO recommendations_jobchange (job_id, source, op, changed_at)
+                VALUES ({row}.id, {row}.source, '{op}', strftime('%Y-%m-%d %H:%M:%f', 'now'));
+            END
+        """)
+    # Jobs that predate the log enter it once, so a first sync copies them
+    schema_editor.execute("""
+        INSERT INTO recommendations_jobchange (job_id, source, op, changed_at)
+        SELECT id, source, 'insert', updated_at FROM recommendations_job ORDER BY id
+    """)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for op in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS recommendations_job_changes_{op}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0004_student_strong_courses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('job_id', models.BigIntegerField()),
+                ('source', models.CharField(blank=True, max_length=50, null=True)),
+                ('op', models.CharField(max_length=6)),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(max_length=20, unique=True)),
+                ('last_seq', models.BigIntegerField(default=0)),
+                ('synced_at', models.DateTimeField(null=True)),
+                ('lag_seconds', models.FloatField(default=0)),
+                ('rows_per_second', models.FloatField(default=0)),
+                ('rows_synced', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -6,6 +6,8 @@ class Student(models.Model):
     grades = models.JSONField(default=dict)  # Store subjects and grades as JSON
     interests = models.TextField(blank=True, null=True)
     skills = models.TextField(blank=True, null=True)
+    # Bitset of courses graded A or B, one bit per Course.bit; kept in step with grades
+    strong_courses = models.BinaryField(default=b'', editable=False)
 
     def __str__(self):
         return self.name
@@ -30,4 +32,58 @@ class Job(models.Model):
         ]
         
     def __str__(self):
-        return f"{self.title} at {self.company}"
\ No newline at end of file
+        return f"{self.title} at {self.company}"
+
+
+class JobChange(models.Model):
+    """
+    One write to Job, appended by database triggers (see migration 0005) so
+    bulk writes are captured too. seq is the change feed's order.
+    """
+    seq = models.BigAutoField(primary_key=True)
+    job_id = models.BigIntegerField()
+    source = models.CharField(max_length=50, blank=True, null=True)  # Job.source, to skip synced-in rows
+    op = models.CharField(max_length=6)  # insert, update or delete
+    changed_at = models.DateTimeField()
+
+
+class JobSyncState(models.Model):
+    """ High-water mark and last-run figures of one direction of the Flask <-> Django job sync """
+    direction = models.CharField(max_length=20, unique=True)
+    last_seq = models.BigIntegerField(default=0)  # Last change applied from the source's change log
+    synced_at = models.DateTimeField(null=True)
+    lag_seconds = models.FloatField(default=0)  # Age of the newest change applied in the last run
+    rows_per_second = models.FloatField(default=0)
+    rows_synced = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.direction} at {self.last_seq}"
+
+
+class Course(models.Model):
+    """ A course name and its fixed bit position in Student.strong_courses """
+    name = models.CharField(max_length=255, unique=True)
+    bit = models.PositiveIntegerField(unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Recommendation(models.Model):
+    """ Materialized score of one student against one job category """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='recommendations')
+    job_title = models.CharField(max_length=255)
+    score = models.PositiveSmallIntegerField()
+    criteria_version = models.CharField(max_length=40)  # Hash of the job's criteria when scored
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'job_title'], name='unique_student_job_title'),
+        ]
+        indexes = [
+            models.Index(fields=['job_title', '-score'], name='recommendation_job_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} -> {self.job_title} ({self.score})"
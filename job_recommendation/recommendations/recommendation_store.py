@@ -0,0 +1,178 @@
+import hashlib
+import json
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from .models import Recommendation, Student
+from .job_recommendation import (
+    JOB_MATCHING_CRITERIA, BatchRecommender, criteria_version, criteria_versions, job_threshold, parse_grades,
+    recommend_for_grades
+)
+
+# Grade changes saved in other processes reach this process's cache within this many seconds
+RECOMMENDATIONS_CACHE_TIMEOUT = 300
+
+
+def job_criteria_versions(criteria=None, thresholds=None):
+    """
+    criteria_version of each job; for the live profiles that is the dict
+    kept up to date by set_job_profile, so requests do not rehash them
+    """
+    if criteria is None and thresholds is None:
+        return criteria_versions()
+    criteria = JOB_MATCHING_CRITERIA if criteria is None else criteria
+    return {job: criteria_version(job, courses, thresholds) for job, courses in criteria.items()}
+
+
+def store_recommendations(students, jobs=None, recommender=None, batch_size=1000):
+    """
+    Score (student pk, grades) pairs and upsert their Recommendation rows.
+
+    Pass `jobs` to recompute only those job categories, e.g. after their criteria changed.
+    """
+    if not students:
+        return 0
+    recommender = recommender or BatchRecommender()
+    versions = job_criteria_versions()
+    scores = recommender.score(recommender.encode([parse_grades(grades) for _, grades in students]))
+    columns = [(j, job) for j, job in enumerate(recommender.jobs) if jobs is None or job in jobs]
+
+    rows = [
+        Recommendation(student_id=pk, job_title=job, score=int(scores[i, j]), criteria_version=versions[job])
+        for i, (pk, _) in enumerate(students)
+        for j, job in columns
+    ]
+    Recommendation.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['student', 'job_title'],
+        update_fields=['score', 'criteria_version', 'computed_at'],
+    )
+    return len(rows)
+
+
+def refresh_student(student):
+    """ Recompute one student's rows, e.g. after their grades changed """
+    stored = store_recommendations([(student.pk, student.grades)])
+    recommendations_cache().delete(recommendations_cache_key(student.student_id, job_criteria_versions()))
+    return stored
+
+
+def recommendations_cache():
+    return caches['recommendations']
+
+
+def recommendations_cache_key(student_id, versions):
+    """ The criteria versions are part of the key, so changed criteria never serve old rankings """
+    digest = hashlib.sha1(json.dumps(sorted(versions.items())).encode('utf-8')).hexdigest()[:12]
+    return f"recommendations:{digest}:{student_id}"
+
+
+def _student_chunks(queryset, chunk_size):
+    chunk = []
+    for row in queryset.order_by('pk').values_list('pk', 'grades').iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def refresh_stale(chunk_size=5000):
+    """
+    Bring the table up to date after changes that bypass model signals.
+
+    Students created with bulk_create get all their rows. Jobs whose criteria
+    changed (or are new) are recomputed across students, and rows of removed
+    jobs are dropped. Rows that are already current are left alone.
+    """
+    versions = job_criteria_versions()
+    stats = {'students_backfilled': 0, 'jobs_recomputed': [], 'rows_deleted': 0}
+
+    stats['rows_deleted'], _ = Recommendation.objects.exclude(job_title__in=list(versions)).delete()
+
+    for chunk in _student_chunks(Student.objects.filter(recommendations__isnull=True), chunk_size):
+        store_recommendations(chunk)
+        stats['students_backfilled'] += len(chunk)
+
+    stale_jobs = [
+        job for job, version in versions.items()
+        if Recommendation.objects.filter(job_title=job).exclude(criteria_version=version).exists()
+        or Student.objects.exclude(recommendations__job_title=job).exists()
+    ]
+    if stale_jobs:
+        for chunk in _student_chunks(Student.objects.all(), chunk_size):
+            store_recommendations(chunk, jobs=stale_jobs)
+        stats['jobs_recomputed'] = stale_jobs
+    return stats
+
+
+def get_stored_recommendations(student_id):
+    """
+    Read a student's recommendations from the cache or the materialized table.
+
+    Falls back to scoring (and storing) the student when no current rows
+    exist yet, e.g. right after the criteria changed.
+    """
+    versions = job_criteria_versions()
+    key = recommendations_cache_key(student_id, versions)
+    recommended = recommendations_cache().get(key)
+    if recommended is None:
+        rows = list(
+            Recommendation.objects.filter(student__student_id=student_id)
+            .values_list('job_title', 'score', 'criteria_version')
+        )
+        recommended = _rank_stored(rows, versions)
+        if recommended is None:
+            student = Student.objects.filter(student_id=student_id).first()
+            if student is None:
+                return ["Student not found"]
+            refresh_student(student)
+            recommended = recommend_for_grades(student.grades)
+        recommendations_cache().set(key, recommended, RECOMMENDATIONS_CACHE_TIMEOUT)
+    return recommended
+
+
+async def aget_stored_recommendations(student_id):
+    """ get_stored_recommendations for async views, on the async ORM and cache APIs """
+    versions = job_criteria_versions()
+    key = recommendations_cache_key(student_id, versions)
+    recommended = await recommendations_cache().aget(key)
+    if recommended is None:
+        rows = [
+            row async for row in Recommendation.objects.filter(student__student_id=student_id)
+            .values_list('job_title', 'score', 'criteria_version')
+        ]
+        recommended = _rank_stored(rows, versions)
+        if recommended is None:
+            student = await Student.objects.filter(student_id=student_id).afirst()
+            if student is None:
+                return ["Student not found"]
+            await sync_to_async(refresh_student)(student)
+            recommended = recommend_for_grades(student.grades)
+        await recommendations_cache().aset(key, recommended, RECOMMENDATIONS_CACHE_TIMEOUT)
+    return recommended
+
+
+def _rank_stored(rows, versions):
+    """ Recommendations from stored (job, score, version) rows, or None when they are missing or stale """
+    if len(rows) != len(versions) or any(versions.get(job) != version for job, _, version in rows):
+        return None
+
+    # Highest score first, ties in criteria order, matching recommend_jobs
+    scores = {job: score for job, score, _ in rows}
+    recommended = sorted(
+        (job for job in JOB_MATCHING_CRITERIA if scores[job] >= job_threshold(job)),
+        key=lambda job: -scores[job]
+    )
+    return recommended if recommended else ["No strong matches found"]
+
+
+def top_students_for_job(job_title, limit=20):
+    """ Highest-scoring matching students for one job category, straight from the (job_title, -score) index """
+    return list(
+        Recommendation.objects.filter(job_title=job_title, score__gte=job_threshold(job_title))
+        .order_by('-score', 'student_id')
+        .values('student__student_id', 'student__name', 'score')[:limit]
+    )
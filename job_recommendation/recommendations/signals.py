@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from .models import Student
+from .job_recommendation import parse_grades
+from .recommendation_store import refresh_student
+from .strong_courses import strong_course_bitset, student_saved
+
+
+@receiver(pre_save, sender=Student)
+def normalize_student_grades(sender, instance, raw=False, update_fields=None, **kwargs):
+    """ Store grades as a JSON object, never a JSON-encoded string, and derive the strong-course bitset """
+    if raw or (update_fields is not None and 'grades' not in update_fields):
+        return
+    instance.grades = parse_grades(instance.grades)
+    instance.strong_courses = strong_course_bitset(instance.grades)
+
+
+@receiver(post_save, sender=Student)
+def refresh_student_recommendations(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """ Keep a student's materialized recommendations in step with their grades """
+    if raw:
+        return
+    if created or update_fields is None or 'grades' in update_fields:
+        if update_fields is not None and 'strong_courses' not in update_fields:
+            Student.objects.filter(pk=instance.pk).update(strong_courses=instance.strong_courses)
+        student_saved(instance)
+        refresh_student(instance)
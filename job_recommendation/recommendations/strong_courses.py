@@ -0,0 +1,199 @@
+import threading
+import time
+import numpy as np
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from .models import Course, Student
+from .job_recommendation import parse_grades
+
+STRONG_GRADES = ("A", "B")
+INDEX_TTL = 300  # Seconds before an index picks up changes saved by other processes
+
+_course_bits = {}
+_course_bits_lock = threading.Lock()
+
+
+def course_bits(names, create=False):
+    """ Map course names to their bit positions; with create, unknown courses are registered """
+    missing = [name for name in names if name not in _course_bits]
+    if missing:
+        with _course_bits_lock:
+            _course_bits.update(Course.objects.filter(name__in=missing).values_list('name', 'bit'))
+            missing = [name for name in missing if name not in _course_bits]
+            if create and missing:
+                for name in missing:
+                    _course_bits[name] = _register_course(name)
+    return {name: _course_bits[name] for name in names if name in _course_bits}
+
+
+def _register_course(name):
+    # Another process may take the next bit first; retry with the new maximum
+    for _ in range(5):
+        try:
+            with transaction.atomic():
+                last_bit = Course.objects.aggregate(last=Max('bit'))['last']
+                next_bit = 0 if last_bit is None else last_bit + 1
+                course, _ = Course.objects.get_or_create(name=name, defaults={'bit': next_bit})
+                return course.bit
+        except IntegrityError:
+            continue
+    return Course.objects.get(name=name).bit
+
+
+def pack_bits(bits):
+    """ Little-endian bitset bytes with the given bit positions set """
+    if not bits:
+        return b''
+    packed = bytearray(max(bits) // 8 + 1)
+    for bit in bits:
+        packed[bit // 8] |= 1 << (bit % 8)
+    return bytes(packed)
+
+
+def strong_course_bitset(grades):
+    """ Bitset of the courses graded A or B in a grades dict or JSON string """
+    strong = [course for course, grade in parse_grades(grades).items() if grade in STRONG_GRADES]
+    return pack_bits(list(course_bits(strong, create=True).values()))
+
+
+def to_words(bitset, n_words):
+    """ A bitset as exactly n_words uint64 words, zero-padded or cut short """
+    padded = bytes(bitset)[:n_words * 8].ljust(n_words * 8, b'\0')
+    return np.frombuffer(padded, dtype='<u8').astype(np.uint64)
+
+
+def popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return _POPCOUNT_TABLE[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class StrongCourseIndex:
+    """
+    Every student's strong-course bitset in one uint64 matrix, so "A/B in at
+    least n of these courses" is an AND, a popcount and a comparison over
+    contiguous memory instead of a scan of the grades JSON.
+
+    The matrix is built from Student.strong_courses. Students saved in this
+    process are patched in right away; changes saved by other processes are
+    picked up when the index is older than INDEX_TTL. Only the first query
+    waits for a build: later rebuilds run on a background thread while
+    queries keep using the current matrix.
+    """
+
+    def __init__(self):
+        self.pks = np.zeros(0, dtype=np.int64)
+        self.words = np.zeros((0, 1), dtype=np.uint64)
+        self.built_at = 0.0
+        self._row_by_pk = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()  # One build at a time, so no build drops another's patches
+        self._rebuilding = False
+        self._patches = None  # pk -> bitset saved while a build reads the table
+
+    def build(self, chunk_size=50000):
+        with self._build_lock:
+            self._build(chunk_size)
+
+    def _build(self, chunk_size=50000):
+        with self._lock:
+            self._patches = {}
+        pks, bitsets = [], []
+        for pk, bitset in Student.objects.order_by('pk').values_list('pk', 'strong_courses').iterator(chunk_size=chunk_size):
+            pks.append(pk)
+            bitsets.append(bytes(bitset or b''))
+        n_words = max([(len(bitset) + 7) // 8 for bitset in bitsets] + [1])
+        width = n_words * 8
+        packed = b''.join(bitset.ljust(width, b'\0') for bitset in bitsets)
+        with self._lock:
+            self.pks = np.array(pks, dtype=np.int64)
+            self.words = np.frombuffer(packed, dtype='<u8').reshape(len(pks), n_words).astype(np.uint64)
+            self._row_by_pk = {pk: row for row, pk in enumerate(pks)}
+            self.built_at = time.monotonic()
+            # The table may have been read before these saves committed
+            patches, self._patches = self._patches, None
+            for pk, bitset in patches.items():
+                self._patch(pk, bitset)
+
+    def rebuild_in_background(self):
+        """ Start a build on a daemon thread unless one is already running """
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def rebuild():
+            try:
+                self.build()
+            finally:
+                self._rebuilding = False
+                connection.close()
+
+        threading.Thread(target=rebuild, name='strong-course-index', daemon=True).start()
+
+    def update(self, pk, bitset):
+        """ Patch one student's row after a save in this process; a no-op before the first build starts """
+        with self._lock:
+            if self._patches is not None:
+                self._patches[pk] = bitset
+            if self.built_at:
+                self._patch(pk, bitset)
+
+    def _patch(self, pk, bitset):
+        n_words = (len(bitset) + 7) // 8
+        if n_words > self.words.shape[1]:
+            self.words = np.pad(self.words, ((0, 0), (0, n_words - self.words.shape[1])))
+        row = to_words(bitset, self.words.shape[1])
+        if pk in self._row_by_pk:
+            self.words[self._row_by_pk[pk]] = row
+        else:
+            self._row_by_pk[pk] = len(self.pks)
+            self.pks = np.append(self.pks, np.int64(pk))
+            self.words = np.vstack([self.words, row])
+
+    def match(self, courses, min_count):
+        """ Return (student pks, strong-course counts) for students strong in at least min_count of courses """
+        if not self.built_at:
+            with self._build_lock:
+                if not self.built_at:
+                    self._build()
+        elif time.monotonic() - self.built_at > INDEX_TTL:
+            self.rebuild_in_background()
+        # Unregistered courses were never graded, so they cannot count towards min_count
+        bits = list(course_bits(courses).values())
+        with self._lock:
+            pks, words = self.pks, self.words
+        # Bits beyond the widest stored bitset match nobody, so they can be cut off
+        query = to_words(pack_bits(bits), words.shape[1])
+        counts = popcount(words & query).sum(axis=1, dtype=np.int32)
+        rows = np.flatnonzero(counts >= min_count)
+        return pks[rows], counts[rows]
+
+
+_strong_course_index = StrongCourseIndex()
+
+
+def qualifying_students(courses, min_count=2, limit=50):
+    """
+    Students with an A or B in at least min_count of the given courses,
+    most matching courses first. Returns (total, [student dicts]).
+    """
+    pks, counts = _strong_course_index.match(courses, min_count)
+    # One sortable key: more matching courses first, then lower pk
+    keys = counts.astype(np.int64) * (1 << 40) - pks
+    order = np.argpartition(-keys, limit - 1)[:limit] if len(keys) > limit else np.arange(len(keys))
+    order = order[np.argsort(-keys[order], kind='stable')]
+    top = {int(pks[i]): int(counts[i]) for i in order}
+    students = Student.objects.filter(pk__in=list(top)).in_bulk()
+    return len(pks), [
+        {"student_id": students[pk].student_id, "name": students[pk].name, "strong_courses": count}
+        for pk, count in top.items() if pk in students
+    ]
+
+
+def student_saved(student):
+    """ Keep this process's index current after a student's grades were saved """
+    _strong_course_index.update(student.pk, student.strong_courses)
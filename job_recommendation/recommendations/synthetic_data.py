@@ -0,0 +1,155 @@
+import json
+import random
+from datetime import timedelta
+from pathlib import Path
+from faker import Faker
+
+# Row factories for the generate_data command. They run in worker processes,
+# so this module must not import Django models: each factory takes plain
+# arguments and returns plain tuples for the parent process to write.
+
+# Every course JOB_MATCHING_CRITERIA names; courses.json is also what the Flask
+# transcript parser (backend/transcript_grades.py) canonicalizes grades to
+COURSES = json.loads(Path(__file__).with_name('courses.json').read_text())
+GRADES = ['A', 'B', 'C', 'D', 'F']
+SKILLS = ['Python', 'Java', 'C++', 'Data Analysis', 'Machine Learning', 'AI', 'Web Development',
+          'Software Engineering', 'SQL', 'Cloud', 'Kubernetes', 'React', 'Security', 'Networking']
+INTERESTS = ['Software Development', 'Data Science', 'Engineering', 'Security', 'Cloud Infrastructure']
+JOB_TYPES = ['Full Time', 'Part Time', 'Contract', 'Internship']
+SENIORITY = ['Junior', '', 'Senior', 'Lead', 'Principal']
+ROLES = {
+    'Software Engineer': ['Programming Fundamentals', 'Data Structures', 'Algorithms', 'Web Development'],
+    'Backend Developer': ['Database Systems', 'Computer Networks', 'Software Engineering'],
+    'Machine Learning Engineer': ['Machine Learning', 'Artificial Intelligence', 'Big Data Analytics'],
+    'Computer Vision Engineer': ['Computer Vision', 'Machine Learning', 'Computer Graphics'],
+    'Security Analyst': ['Cybersecurity', 'Computer Networks', 'Cryptography'],
+    'Cloud Engineer': ['Cloud Computing', 'Distributed Systems', 'Operating Systems'],
+    'Mobile Developer': ['Mobile App Development', 'Programming Fundamentals'],
+    'Blockchain Developer': ['Blockchain Technology', 'Cryptography', 'Distributed Systems'],
+    'Data Engineer': ['Big Data Analytics', 'Database Systems', 'Parallel Computing'],
+    'IoT Engineer': ['Internet of Things (IoT)', 'Computer Networks', 'Operating Systems'],
+}
+POOL_SIZE = 500
+FAKE_PASSWORD = 'password123'  # Every generated talent and organization logs in with this
+
+_pools = {}
+
+
+def pools(seed):
+    """ Name, company and city pools drawn once per process; Faker is too slow to call per row """
+    if seed not in _pools:
+        fake = Faker()
+        fake.seed_instance(seed)
+        _pools[seed] = {
+            'first': [fake.first_name() for _ in range(POOL_SIZE)],
+            'last': [fake.last_name() for _ in range(POOL_SIZE)],
+            'company': [fake.company() for _ in range(POOL_SIZE)],
+            'city': [fake.city() for _ in range(POOL_SIZE)],
+            'words': fake.words(nb=POOL_SIZE, unique=True),
+        }
+    return _pools[seed]
+
+
+def chunk_rng(seed, table, chunk):
+    """ Every (seed, table, chunk) gets its own stream, so output does not depend on the worker count """
+    return random.Random(f"{seed}:{table}:{chunk}")
+
+
+def _grades(rng):
+    return {course: rng.choice(GRADES) for course in rng.sample(COURSES, rng.randint(12, len(COURSES)))}
+
+
+def _pack_strong(grades, course_bits):
+    packed = bytearray(max(course_bits.values(), default=0) // 8 + 1)
+    for course, grade in grades.items():
+        if grade in ('A', 'B') and course in course_bits:
+            bit = course_bits[course]
+            packed[bit // 8] |= 1 << (bit % 8)
+    return bytes(packed.rstrip(b'\0'))
+
+
+def _description(rng, role, company, words):
+    courses = ', '.join(ROLES[role])
+    filler = ' '.join(rng.choices(words, k=rng.randint(20, 60)))
+    return f"{company} is hiring a {role}. You should be comfortable with {courses}. {filler}."
+
+
+def make_students(seed, chunk, start, count, course_bits):
+    """ (student_id, name, grades, interests, skills, strong_courses) rows """
+    rng = chunk_rng(seed, 'students', chunk)
+    pool = pools(seed)
+    rows = []
+    for index in range(start, start + count):
+        grades = _grades(rng)
+        rows.append((
+            f"S{index:08d}",
+            f"{rng.choice(pool['first'])} {rng.choice(pool['last'])}",
+            grades,
+            rng.choice(INTERESTS),
+            ', '.join(rng.sample(SKILLS, 3)),
+            _pack_strong(grades, course_bits),
+        ))
+    return rows
+
+
+def make_jobs(seed, chunk, start, count, org_count, now):
+    """
+    (index, title, company, org_email, location, description, job_type, is_remote, created_at) rows,
+    posted over the 90 days before `now`
+    """
+    rng = chunk_rng(seed, 'jobs', chunk)
+    pool = pools(seed)
+    rows = []
+    for index in range(start, start + count):
+        role = rng.choice(list(ROLES))
+        if org_count:
+            org = rng.randrange(org_count)
+            company, org_email = org_name(pool, org), org_email_address(org)
+        else:
+            company, org_email = rng.choice(pool['company']), None
+        rows.append((
+            index,
+            ' '.join(filter(None, [rng.choice(SENIORITY), role])),
+            company,
+            org_email,
+            rng.choice(pool['city']),
+            _description(rng, role, company, pool['words']),
+            rng.choice(JOB_TYPES),
+            rng.random() < 0.3,
+            now - timedelta(seconds=rng.randrange(90 * 24 * 3600)),
+        ))
+    return rows
+
+
+def make_talents(seed, chunk, start, count):
+    """ (name, email, phone, resume, grades JSON) rows """
+    rng = chunk_rng(seed, 'talents', chunk)
+    pool = pools(seed)
+    rows = []
+    for index in range(start, start + count):
+        first, last = rng.choice(pool['first']), rng.choice(pool['last'])
+        grades = _grades(rng)
+        resume = '\n'.join(f"{course} {grade}" for course, grade in grades.items())
+        rows.append((
+            f"{first} {last}",
+            f"talent{index}@example.com",
+            f"+1555{rng.randrange(10 ** 7):07d}",
+            resume,
+            json.dumps(grades),
+        ))
+    return rows
+
+
+def org_name(pool, index):
+    # Organization names are unique in the Flask schema, so the index is part of the name
+    return f"{pool['company'][index % len(pool['company'])]} #{index}"
+
+
+def org_email_address(index):
+    return f"org{index}@example.com"
+
+
+def make_organizations(seed, chunk, start, count):
+    """ (org_names, org_email) rows """
+    pool = pools(seed)
+    return [(org_name(pool, index), org_email_address(index)) for index in range(start, start + count)]
@@ -1,3 +1,407 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
 from django.test import TestCase
+from . import job_sync
+from .job_sync import (
+    DJANGO_ORIGIN, FLASK_ORIGIN, GRADES_TO_DJANGO, TO_DJANGO, TO_FLASK, open_flask_db, sync_grades_to_django,
+    sync_to_django, sync_to_flask
+)
+from .job_ingest import ingest_jobs, iter_ndjson
+from .job_matching import JobMatchIndex
+from .job_recommendation import (
+    JOB_MATCHING_CRITERIA, BatchRecommender, course_weights, parse_grades, recommend_for_grades, recommend_jobs,
+    recommend_jobs_bulk, remove_job_profile, set_job_profile
+)
+from .models import Job, JobChange, JobSyncState, Recommendation, Student
+from .recommendation_store import (
+    get_stored_recommendations, job_criteria_versions, recommendations_cache, refresh_student
+)
+from .synthetic_data import COURSES
+from .vector_store import JobVectorIndex, recommend_postings_ann
 
-# Create your tests here.
+
+CRITERIA_COURSES = sorted({course for courses in JOB_MATCHING_CRITERIA.values() for course in courses})
+
+
+def random_grades(seed, count):
+    """ Grade dicts over a few of the criteria courses each, so some students match nothing """
+    rng = random.Random(seed)
+    return [
+        {course: rng.choice('ABCDF') for course in rng.sample(CRITERIA_COURSES, rng.randint(0, 8))}
+        for _ in range(count)
+    ]
+
+
+class RecommenderTests(TestCase):
+    """ BatchRecommender and recommend_jobs_bulk against the per-student recommend_jobs """
+
+    def test_batch_matches_per_student_recommendations(self):
+        grade_dicts = random_grades(1, 200)
+        self.assertEqual(BatchRecommender().recommend(grade_dicts), [recommend_for_grades(g) for g in grade_dicts])
+
+    def test_bulk_matches_recommend_jobs(self):
+        Student.objects.bulk_create(
+            [Student(name=f'Student {i}', student_id=f'B{i}', grades=grades)
+             for i, grades in enumerate(random_grades(2, 50))]
+            # Grades stored as a JSON string, and as something that is not grades at all
+            + [Student(name='Legacy', student_id='B-json',
+                       grades=json.dumps({'Cybersecurity': 'A', 'Computer Networks': 'B'})),
+               Student(name='Broken', student_id='B-junk', grades='not json')]
+        )
+        student_ids = [f'B{i}' for i in range(50)] + ['B-json', 'B-junk', 'missing']
+        self.assertEqual(
+            recommend_jobs_bulk(student_ids),
+            {student_id: recommend_jobs(student_id) for student_id in student_ids}
+        )
+        self.assertEqual(recommend_jobs_bulk(['B-json'])['B-json'], ['Cybersecurity Analyst'])
+
+
+def posting(url, title='Backend Engineer', source='indeed'):
+    return {'title': title, 'company': 'Acme', 'location': 'Pune', 'job_url': url, 'source': source}
+
+
+class IngestTests(TestCase):
+    """ ingest_jobs: one row per (source, job_url), however often and in whichever batch it arrives """
+
+    def test_repeats_within_and_across_batches_are_merged(self):
+        result = ingest_jobs([
+            posting('https://example.com/1'),
+            posting('https://example.com/1', title='Senior Backend Engineer'),
+            posting('https://example.com/2'),
+            posting('https://example.com/1', title='Staff Backend Engineer'),
+            # Same URL, another site: a separate posting
+            posting('https://example.com/1', source='linkedin'),
+        ], batch_size=2)
+        self.assertEqual(result, {'created': 3, 'updated': 1, 'errors': []})
+        self.assertEqual(
+            sorted(Job.objects.values_list('external_id', 'title')),
+            [('indeed_https://example.com/1', 'Staff Backend Engineer'),
+             ('indeed_https://example.com/2', 'Backend Engineer'),
+             ('linkedin_https://example.com/1', 'Backend Engineer')]
+        )
+
+        again = ingest_jobs([posting('https://example.com/2', title='Data Engineer')])
+        self.assertEqual((again['created'], again['updated']), (0, 1))
+        self.assertEqual(Job.objects.count(), 3)
+
+    def test_bad_items_are_reported_by_position(self):
+        lines = [json.dumps(posting('https://example.com/1')), '', '{not json', json.dumps({'title': 'No URL'})]
+        result = ingest_jobs(iter_ndjson(lines))
+        self.assertEqual((result['created'], result['updated']), (1, 0))
+        self.assertEqual([error['index'] for error in result['errors']], [1, 2])
+        self.assertEqual(Job.objects.count(), 1)
+
+
+class MaterializedRecommendationTests(TestCase):
+    """ Recommendation rows and get_stored_recommendations against scoring the grades live """
+
+    def setUp(self):
+        recommendations_cache().clear()
+
+    def assert_matches_live(self, student):
+        recommender = BatchRecommender()
+        scores = recommender.score(recommender.encode([parse_grades(student.grades)]))[0]
+        self.assertEqual(
+            dict(Recommendation.objects.filter(student=student).values_list('job_title', 'score')),
+            {job: int(scores[j]) for j, job in enumerate(recommender.jobs)}
+        )
+        self.assertEqual(get_stored_recommendations(student.student_id), recommend_jobs(student.student_id))
+
+    def test_saved_students_are_materialized(self):
+        for i, grades in enumerate(random_grades(3, 20)):
+            self.assert_matches_live(Student.objects.create(name=f'Student {i}', student_id=f'M{i}', grades=grades))
+
+    def test_refresh_student_after_a_bulk_grade_change(self):
+        student = Student.objects.create(name='Asha', student_id='M-bulk',
+                                         grades={'Cybersecurity': 'A', 'Computer Networks': 'A'})
+        self.assertEqual(get_stored_recommendations('M-bulk'), ['Cybersecurity Analyst'])
+
+        # A queryset update skips the post_save signal, so the caller refreshes the rows and the cached ranking
+        Student.objects.filter(pk=student.pk).update(
+            grades={'Mobile App Development': 'A', 'Programming Fundamentals': 'B'}
+        )
+        student.refresh_from_db()
+        refresh_student(student)
+        self.assert_matches_live(student)
+        self.assertEqual(get_stored_recommendations('M-bulk'), ['Mobile Developer'])
+
+
+class FlaskDbTestCase(TestCase):
+    """ A KoraQuest.db migrated by the Flask app's own backend/schema.py, copied fresh for every test """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.template_db = os.path.join(cls.tmp_dir, 'template.db')
+        subprocess.run([sys.executable, 'schema.py', cls.template_db], cwd=settings.BASE_DIR.parent / 'backend',
+                       check=True, capture_output=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        path = os.path.join(self.tmp_dir, f"{self._testMethodName}.db")
+        shutil.copy(self.template_db, path)
+        self.flask_db = open_flask_db(path)
+        self.addCleanup(self.flask_db.close)
+
+
+class JobSyncTests(FlaskDbTestCase):
+    """ sync_to_django / sync_to_flask """
+
+    def add_flask_job(self, title, source='external_api'):
+        return self.flask_db.execute(
+            "INSERT INTO Jobs (job_title, org_name, job_location, job_description, is_remote, job_url, source) "
+            "VALUES (?, 'Acme', 'Pune', 'Build things', 0, 'https://example.com/job', ?)",
+            (title, source)
+        ).lastrowid
+
+    def add_django_job(self, title):
+        return Job.objects.create(title=title, company='Globex', location='Mumbai', description='Ship things',
+                                  job_url='https://example.com/job', source='manual')
+
+    def flask_titles(self):
+        return sorted(title for (title,) in self.flask_db.execute('SELECT job_title FROM Jobs'))
+
+    def test_replayed_batch_is_a_no_op(self):
+        self.add_flask_job('Backend Engineer')
+        self.add_flask_job('Data Analyst')
+        first = sync_to_django(self.flask_db, prune=False)
+        self.assertEqual((first['created'], first['changes']), (2, 2))
+        copies = {job.external_id: job.updated_at for job in Job.objects.all()}
+
+        # As if the process died after applying the batch but before its mark was saved
+        JobSyncState.objects.filter(direction=TO_DJANGO).update(last_seq=0)
+        replay = sync_to_django(self.flask_db, prune=False)
+        self.assertEqual(replay['changes'], 2)
+        self.assertEqual((replay['created'], replay['updated'], replay['unchanged']), (0, 0, 2))
+        self.assertEqual({job.external_id: job.updated_at for job in Job.objects.all()}, copies)
+
+    def test_flask_delete_propagates_to_django(self):
+        job_id = self.add_flask_job('Backend Engineer')
+        self.add_flask_job('Data Analyst')
+        sync_to_django(self.flask_db)
+        self.flask_db.execute('DELETE FROM Jobs WHERE id = ?', (job_id,))
+
+        stats = sync_to_django(self.flask_db)
+        self.assertEqual(stats['deleted'], 1)
+        self.assertEqual(list(Job.objects.values_list('title', flat=True)), ['Data Analyst'])
+
+    def test_django_delete_propagates_to_flask(self):
+        job = self.add_django_job('Site Reliability Engineer')
+        self.add_django_job('QA Engineer')
+        sync_to_flask(self.flask_db)
+        self.assertEqual(self.flask_titles(), ['QA Engineer', 'Site Reliability Engineer'])
+        job.delete()
+
+        stats = sync_to_flask(self.flask_db)
+        self.assertEqual(stats['deleted'], 1)
+        self.assertEqual(self.flask_titles(), ['QA Engineer'])
+
+    def test_copied_rows_are_not_synced_back(self):
+        self.add_flask_job('Backend Engineer')
+        self.add_django_job('QA Engineer')
+        self.assertEqual(sync_to_django(self.flask_db)['created'], 1)
+
+        # The Django job and the copy of the Flask one are both in the Django log; only the first is copied
+        to_flask = sync_to_flask(self.flask_db)
+        self.assertEqual((to_flask['changes'], to_flask['created']), (2, 1))
+        self.assertEqual(self.flask_titles(), ['Backend Engineer', 'QA Engineer'])
+
+        # Likewise the copy of the Django job, logged in Flask, is not written back
+        (source,) = self.flask_db.execute('SELECT source FROM JobChanges ORDER BY seq DESC LIMIT 1').fetchone()
+        self.assertEqual(source, DJANGO_ORIGIN)
+        to_django = sync_to_django(self.flask_db)
+        self.assertEqual(to_django['changes'], 1)
+        self.assertEqual((to_django['created'], to_django['updated'], to_django['deleted']), (0, 0, 0))
+        self.assertEqual(sorted(Job.objects.values_list('source', flat=True)), [FLASK_ORIGIN, 'manual'])
+        self.assertEqual(sync_to_flask(self.flask_db)['changes'], 0)
+
+    def test_high_water_mark_advances_only_after_its_batch_commits(self):
+        for title in ('Backend Engineer', 'Data Analyst', 'QA Engineer'):
+            self.add_flask_job(title)
+        write = job_sync._write_django_jobs
+        calls = []
+
+        def fail_second_batch(rows, deleted_ids):
+            calls.append(rows)
+            counts = write(rows, deleted_ids)
+            if len(calls) == 2:
+                raise RuntimeError("crash before commit")
+            return counts
+
+        with mock.patch.object(job_sync, '_write_django_jobs', side_effect=fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                sync_to_django(self.flask_db, batch_size=2, prune=False)
+        # The first batch committed with its mark; the second rolled back along with its mark
+        self.assertEqual(JobSyncState.objects.get(direction=TO_DJANGO).last_seq, 2)
+        self.assertEqual(sorted(Job.objects.values_list('title', flat=True)), ['Backend Engineer', 'Data Analyst'])
+
+        stats = sync_to_django(self.flask_db, batch_size=2, prune=False)
+        self.assertEqual((stats['changes'], stats['created'], stats['last_seq']), (1, 1, 3))
+        self.assertEqual(Job.objects.count(), 3)
+
+    def test_flask_mark_is_saved_only_after_the_flask_commit(self):
+        self.add_django_job('QA Engineer')
+        with mock.patch.object(job_sync, '_write_flask_jobs', side_effect=RuntimeError("database is locked")):
+            with self.assertRaises(RuntimeError):
+                sync_to_flask(self.flask_db)
+        self.assertEqual(JobSyncState.objects.get(direction=TO_FLASK).last_seq, 0)
+
+        sync_to_flask(self.flask_db, prune=False)
+        self.assertEqual(self.flask_titles(), ['QA Engineer'])
+        self.assertEqual(JobSyncState.objects.get(direction=TO_FLASK).last_seq, JobChange.objects.latest('seq').seq)
+
+
+class GradeSyncTests(FlaskDbTestCase):
+    """ sync_grades_to_django: transcript grades parsed by the Flask app reach the Student the recommender reads """
+
+    def add_talent(self, name, grades=None):
+        return self.flask_db.execute(
+            "INSERT INTO Talent (name, password, email, phone, resume, grades) VALUES (?, 'x', ?, '555', '', ?)",
+            (name, f"{name.lower()}@example.com", None if grades is None else json.dumps(grades))
+        ).lastrowid
+
+    def set_grades(self, talent_id, grades):
+        self.flask_db.execute('UPDATE Talent SET grades = ? WHERE id = ?', (json.dumps(grades), talent_id))
+
+    def test_uploaded_grades_become_student_grades(self):
+        talent_id = self.add_talent('Asha')
+        self.assertEqual(sync_grades_to_django(self.flask_db)['changes'], 0)
+
+        # What finish_transcript_job stores once the transcript is parsed
+        self.set_grades(talent_id, {'Machine Learning': 'A', 'Databases': 'C'})
+        stats = sync_grades_to_django(self.flask_db, prune=False)
+        self.assertEqual(stats['created'], 1)
+        student = Student.objects.get(student_id=f"{FLASK_ORIGIN}:{talent_id}")
+        self.assertEqual((student.name, student.grades), ('Asha', {'Machine Learning': 'A', 'Databases': 'C'}))
+        self.assertTrue(bytes(student.strong_courses))
+
+        JobSyncState.objects.filter(direction=GRADES_TO_DJANGO).update(last_seq=0)
+        replay = sync_grades_to_django(self.flask_db)
+        self.assertEqual((replay['created'], replay['updated'], replay['unchanged']), (0, 0, 1))
+
+    def test_regraded_and_deleted_talents_propagate(self):
+        kept = self.add_talent('Asha', {'Algorithms': 'B'})
+        removed = self.add_talent('Ravi', {'Cryptography': 'A'})
+        self.assertEqual(sync_grades_to_django(self.flask_db)['created'], 2)
+
+        self.set_grades(kept, {'Algorithms': 'A'})
+        self.flask_db.execute('DELETE FROM Talent WHERE id = ?', (removed,))
+        stats = sync_grades_to_django(self.flask_db)
+        self.assertEqual((stats['updated'], stats['deleted']), (1, 1))
+        self.assertEqual(
+            list(Student.objects.values_list('student_id', 'grades')),
+            [(f"{FLASK_ORIGIN}:{kept}", {'Algorithms': 'A'})]
+        )
+
+
+class CourseListTests(TestCase):
+    """ courses.json: the course names shared with the Flask transcript parser """
+
+    def test_matching_criteria_only_name_listed_courses(self):
+        required = {course for courses in JOB_MATCHING_CRITERIA.values() for course in course_weights(courses)}
+        self.assertLessEqual(required, set(COURSES))
+
+    def test_transcript_parser_reads_the_same_list(self):
+        script = 'import json, transcript_grades; print(json.dumps(transcript_grades.CANONICAL_COURSES))'
+        output = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR.parent / 'backend', check=True, capture_output=True, text=True
+        ).stdout
+        self.assertEqual(json.loads(output), COURSES)
+
+
+class CriteriaVersionTests(TestCase):
+    """ job_criteria_versions: kept by set_job_profile rather than rehashed per request """
+
+    def test_versions_follow_profile_changes(self):
+        before = job_criteria_versions()
+        self.assertIs(job_criteria_versions(), before)
+
+        self.addCleanup(remove_job_profile, 'Data Engineer')
+        set_job_profile('Data Engineer', ['Big Data Analytics', 'Database Systems'])
+        after = job_criteria_versions()
+        self.assertEqual({job: version for job, version in after.items() if job != 'Data Engineer'}, before)
+        self.assertEqual(after, job_criteria_versions(JOB_MATCHING_CRITERIA))
+
+        set_job_profile('Data Engineer', ['Big Data Analytics', 'Database Systems'], threshold=9)
+        self.assertNotEqual(job_criteria_versions()['Data Engineer'], after['Data Engineer'])
+
+
+class VectorIndexTests(TestCase):
+    """ JobVectorIndex.sync and the ANN recommendations served from it """
+
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        self.index = JobVectorIndex(os.path.join(tmp_dir, 'job_vectors'), writable=True)
+        for title in ('Python Developer', 'Python Data Engineer', 'Django Python Engineer', 'Python QA Engineer',
+                      'Nurse', 'Chef'):
+            Job.objects.create(title=title, company='Acme', location='Pune', description=f'{title} using Python',
+                               job_url='https://example.com/job', source='manual')
+        Student.objects.create(name='Asha', student_id='S1', skills='Python, Django', interests='Data Engineering')
+
+    def test_deleted_jobs_leave_the_index(self):
+        self.assertEqual(self.index.sync(), 6)
+        self.index.train(nlist=2)
+        best = recommend_postings_ann(['S1'], k=3, nprobe=2, index=self.index)['S1']
+        self.assertEqual(len(best), 3)
+
+        Job.objects.filter(pk=best[0]['id']).delete()
+        self.assertEqual(self.index.sync(), 0)
+        self.assertEqual(len(self.index), 5)
+        postings = recommend_postings_ann(['S1'], k=3, nprobe=2, index=self.index)['S1']
+        self.assertEqual(len(postings), 3)
+        self.assertNotIn(best[0]['id'], [posting['id'] for posting in postings])
+        self.assertEqual(postings[:2], best[1:])
+
+
+class JobIndexSyncTests(TestCase):
+    """ JobMatchIndex.sync following the JobChange log """
+
+    def setUp(self):
+        self.jobs = [
+            Job.objects.create(title=title, company='Acme', location='Pune', description='Build things',
+                               job_url='https://example.com/job', source='manual')
+            for title in ('Backend Engineer', 'Data Analyst', 'QA Engineer')
+        ]
+        self.index = JobMatchIndex()
+        self.assertEqual(self.index.sync(), 3)
+
+    def test_change_behind_the_newest_updated_at_is_indexed(self):
+        # As if its transaction committed after a newer job's; updated_at no longer orders the changes
+        old = self.jobs[0].updated_at - timedelta(hours=1)
+        Job.objects.filter(pk=self.jobs[0].pk).update(title='Rust Developer', updated_at=old)
+        self.assertEqual(self.index.sync(), 1)
+        self.assertIn('rust', self.index.vocab)
+        self.assertEqual(self.index.last_seq, JobChange.objects.latest('seq').seq)
+
+    def test_deletes_are_read_from_the_log(self):
+        self.jobs[1].delete()
+        self.assertEqual(self.index.sync(), 0)
+        self.assertEqual(len(self.index), 2)
+
+    def test_pruned_log_is_rescanned(self):
+        self.jobs[1].delete()
+        Job.objects.create(title='Site Reliability Engineer', company='Acme', location='Pune',
+                           description='Run things', job_url='https://example.com/job', source='manual')
+        # What sync_to_flask leaves behind once it has copied and pruned everything
+        last_seq = JobChange.objects.latest('seq').seq
+        JobSyncState.objects.create(direction=TO_FLASK, last_seq=last_seq)
+        JobChange.objects.all().delete()
+
+        self.assertEqual(self.index.sync(), 3)
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.last_seq, last_seq)
+        self.assertEqual(self.index.sync(), 0)
@@ -1,9 +1,18 @@
 from django.urls import path
 from . import views
-from .views import StoreJobsView
+from .metrics import metrics
+from .views import StoreJobsView, BulkStoreJobsView
 
 urlpatterns = [
+    path('metrics', metrics, name='metrics'),
+    path('recommendations/bulk/', views.get_bulk_recommendations, name='get_bulk_recommendations'),
+    path('students/qualifying/', views.get_qualifying_students, name='get_qualifying_students'),
+    path('jobs/<str:job_title>/top-students/', views.get_top_students, name='get_top_students'),
+    path('recommendations/<str:student_id>/jobs/', views.get_job_postings, name='get_job_postings'),
     path('recommendations/<str:student_id>/', views.get_recommendations, name='get_recommendations'),
+    path('async/recommendations/bulk/', views.aget_bulk_recommendations, name='aget_bulk_recommendations'),
+    path('async/recommendations/<str:student_id>/', views.aget_recommendations, name='aget_recommendations'),
+    path('async/store-jobs/bulk/', views.aingest_jobs, name='aingest_jobs'),
     path('', views.home, name='home'),
     path('recommend/', views.recommendation_page, name='recommend_page'),
     path('login/', views.login, name='login'),
@@ -14,5 +23,6 @@ urlpatterns = [
     path('org/dashboard/', views.org_dashboard, name='org_dashboard'),
     path('user-dashboard/', views.user_dashboard, name='user-dashboard'),
     path('api/store-jobs/', StoreJobsView.as_view(), name='store-jobs'),
+    path('api/store-jobs/bulk/', BulkStoreJobsView.as_view(), name='store-jobs-bulk'),
     
 ]
@@ -0,0 +1,447 @@
+import json
+import math
+import os
+import threading
+import zlib
+from collections import Counter
+import numpy as np
+import scipy.sparse as sp
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .job_recommendation import GRADE_WEIGHTS, parse_grades
+from .job_matching import TITLE_WEIGHT, changed_job_batches, postings_for_matches, tokenize
+from .models import Job, Student
+
+# Store layout: vectors.f32 and ids.i64 are raw arrays sized to `capacity`
+# rows, of which the first `count` are valid. meta.json is replaced last on
+# every save, so readers never look past rows that were fully written.
+VECTORS_FILE = 'vectors.f32'
+IDS_FILE = 'ids.i64'
+META_FILE = 'meta.json'
+DELETED_ID = -1
+
+
+class HashingEncoder:
+    """
+    Local, stateless text encoder: unigrams and bigrams are hashed into a
+    fixed number of signed buckets, weighted by 1 + log(count) and scaled to
+    unit length. Nothing is trained or downloaded, so any process produces
+    the same vector for the same text.
+    """
+    name = 'hashing-v1'
+
+    def __init__(self, dim=512, bigrams=True):
+        self.dim = dim
+        self.bigrams = bigrams
+        self._buckets = {}
+
+    def _bucket(self, token):
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            data = token.encode('utf-8')
+            sign = 1.0 if zlib.crc32(data, 0x5bd1e995) & 1 else -1.0
+            bucket = self._buckets[token] = (zlib.crc32(data) % self.dim, sign)
+        return bucket
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            if self.bigrams:
+                tokens += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for token, count in Counter(tokens).items():
+                col, sign = self._bucket(token)
+                vectors[i, col] += sign * (1 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+
+def get_encoder():
+    """ The encoder named by the JOB_ENCODER setting (a dotted path), or a HashingEncoder """
+    path = getattr(settings, 'JOB_ENCODER', None)
+    return import_string(path)() if path else HashingEncoder()
+
+
+def job_text(title, description):
+    return ' '.join([title or ''] * TITLE_WEIGHT + [description or ''])
+
+
+def student_text(skills, interests, grades):
+    """ Skills, interests and course names repeated by grade points """
+    courses = [
+        course for course, grade in parse_grades(grades).items()
+        for _ in range(GRADE_WEIGHTS.get(grade, 0))
+    ]
+    return ' '.join([skills or '', interests or ''] + courses)
+
+
+def top_k_rows(scores, k):
+    """ Indices of the k largest scores, best first """
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind='stable')]
+
+
+def nearest_centroids(vectors, centroids, block_size=8192):
+    """ Index of the most similar centroid per vector, computed in blocks to bound memory """
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def kmeans(vectors, n_clusters, iterations=10, seed=0):
+    """ Spherical k-means: centroids are unit vectors and assignment is by dot product """
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(len(vectors), n_clusters, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assign = nearest_centroids(vectors, centroids)
+        members = sp.csr_matrix(
+            (np.ones(len(vectors), dtype=np.float32), (assign, np.arange(len(vectors)))),
+            shape=(n_clusters, len(vectors))
+        )
+        sums = np.asarray(members @ vectors, dtype=np.float32)
+        empty = ~sums.any(axis=1)
+        # Reseed empty clusters from random points so every list stays in use
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+class VectorStore:
+    """ Append-only float32 vectors with a job id per row, kept in memory-mapped files """
+
+    def __init__(self, path, dim, count=0, writable=False):
+        self.path = path
+        self.dim = dim
+        self.count = count
+        self.writable = writable
+        self.vectors = None
+        self.ids = None
+        self._open()
+
+    def _open(self):
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if not os.path.exists(vectors_path):
+            if not self.writable:
+                raise FileNotFoundError(vectors_path)
+            self._resize(1024)
+            return
+        capacity = os.path.getsize(vectors_path) // (4 * self.dim)
+        mode = 'r+' if self.writable else 'r'
+        self.vectors = np.memmap(vectors_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        self.ids = np.memmap(os.path.join(self.path, IDS_FILE), dtype=np.int64, mode=mode, shape=(capacity,))
+
+    def _resize(self, capacity):
+        self.flush()
+        self.vectors = self.ids = None
+        os.makedirs(self.path, exist_ok=True)
+        for name, itemsize in ((VECTORS_FILE, 4 * self.dim), (IDS_FILE, 8)):
+            with open(os.path.join(self.path, name), 'ab') as f:
+                f.truncate(capacity * itemsize)
+        self._open()
+
+    @property
+    def capacity(self):
+        return len(self.ids)
+
+    def append(self, ids, vectors):
+        """ Write rows after the current ones and return their row numbers """
+        needed = self.count + len(ids)
+        if needed > self.capacity:
+            self._resize(max(needed, 2 * self.capacity))
+        rows = np.arange(self.count, needed)
+        self.vectors[rows] = vectors
+        self.ids[rows] = ids
+        self.count = needed
+        return rows
+
+    def delete(self, rows):
+        self.ids[rows] = DELETED_ID
+
+    def flush(self):
+        if self.writable and self.vectors is not None:
+            self.vectors.flush()
+            self.ids.flush()
+
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors are bucketed by their nearest k-means
+    centroid and a query only scans the `nprobe` closest buckets. nprobe is
+    the recall/latency knob; nprobe == nlist is an exact scan.
+    """
+
+    def __init__(self, centroids, assign):
+        self.centroids = centroids
+        self.assign = assign  # list number per store row, -1 for deleted rows
+        self._lists = None
+
+    @classmethod
+    def train(cls, vectors, nlist, live, iterations=10, sample_size=50000, seed=0):
+        """ Fit centroids to a sample of the `live` rows, then place every live row in a list """
+        rng = np.random.default_rng(seed)
+        sample = live if len(live) <= sample_size else np.sort(rng.choice(live, sample_size, replace=False))
+        centroids = kmeans(np.asarray(vectors[sample], dtype=np.float32), nlist, iterations, seed)
+        assign = nearest_centroids(vectors, centroids)
+        dead = np.ones(len(vectors), dtype=bool)
+        dead[live] = False
+        assign[dead] = -1
+        return cls(centroids, assign)
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    def add(self, vectors):
+        self.assign = np.concatenate([self.assign, nearest_centroids(vectors, self.centroids)])
+        self._lists = None
+
+    def delete(self, rows):
+        self.assign[rows] = -1
+        self._lists = None
+
+    def lists(self):
+        """ (rows ordered by list, start offset of each list) """
+        if self._lists is None:
+            order = np.argsort(self.assign, kind='stable')
+            counts = np.bincount(self.assign[self.assign >= 0], minlength=self.nlist)
+            skip = int((self.assign < 0).sum())
+            offsets = np.concatenate([[0], np.cumsum(counts)]) + skip
+            self._lists = (order.astype(np.int64), offsets)
+        return self._lists
+
+    def search(self, vectors, queries, k, nprobe):
+        order, offsets = self.lists()
+        nprobe = min(nprobe, self.nlist)
+        probes = top_k_rows_2d(queries @ self.centroids.T, nprobe)
+        results = []
+        for query, probe in zip(queries, probes):
+            candidates = np.concatenate([order[offsets[p]:offsets[p + 1]] for p in probe])
+            if not len(candidates):
+                results.append((candidates, np.zeros(0, dtype=np.float32)))
+                continue
+            candidates.sort()  # Sequential reads from the memory-mapped file
+            scores = vectors[candidates] @ query
+            best = top_k_rows(scores, k)
+            results.append((candidates[best], scores[best]))
+        return results
+
+
+def top_k_rows_2d(scores, k):
+    """ Per row, the column indices of the k largest scores (unordered) """
+    if scores.shape[1] <= k:
+        return np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+class JobVectorIndex:
+    """
+    Job vectors in a memory-mapped VectorStore plus an IVF index over them.
+
+    Only the build_vector_index command writes: new postings are encoded
+    and appended, an updated posting gets a new row and its old row is
+    tombstoned, and the IVF lists are extended without retraining until the
+    catalog has grown `retrain_growth` times since the centroids were fit.
+    Web workers open the saved index read-only and reopen it when a newer
+    generation has been saved.
+    """
+
+    def __init__(self, path, encoder=None, writable=False):
+        self.path = path
+        self.encoder = encoder or HashingEncoder()
+        self.writable = writable
+        self.meta = self._read_meta() or {
+            'dim': self.encoder.dim, 'encoder': self.encoder.name, 'count': 0, 'generation': 0,
+            'trained_count': 0, 'last_seq': 0,
+        }
+        if self.meta['encoder'] != self.encoder.name or self.meta['dim'] != self.encoder.dim:
+            raise ValueError(f"Index at {path} was built with {self.meta['encoder']} ({self.meta['dim']} dims); "
+                             f"rebuild it to use {self.encoder.name}")
+        self.store = VectorStore(path, self.meta['dim'], self.meta['count'], writable)
+        self.ivf = self._read_ivf()
+        self._row_by_id = None
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.path, META_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _ivf_path(self, generation):
+        return os.path.join(self.path, f"ivf-{generation}.npz")
+
+    def _read_ivf(self):
+        if not self.meta['trained_count']:
+            return None
+        with np.load(self._ivf_path(self.meta['generation'])) as data:
+            return IVFIndex(data['centroids'], data['assign'][:self.meta['count']].copy())
+
+    @property
+    def last_seq(self):
+        # Indexes saved before the change log replay it from the start
+        return self.meta.get('last_seq', 0)
+
+    def __len__(self):
+        return int((self.store.ids[:self.store.count] != DELETED_ID).sum())
+
+    def add_jobs(self, jobs):
+        """ Encode and append (pk, title, description) tuples; earlier rows of the same jobs are tombstoned """
+        latest = {pk: (title, description) for pk, title, description in jobs}
+        if not latest:
+            return 0
+        self._tombstone([self._rows()[pk] for pk in latest if pk in self._rows()])
+
+        vectors = self.encoder.encode([job_text(title, description) for title, description in latest.values()])
+        rows = self.store.append(np.fromiter(latest, dtype=np.int64, count=len(latest)), vectors)
+        self._row_by_id.update(zip(latest, rows.tolist()))
+        if self.ivf is not None:
+            self.ivf.add(vectors)
+        return len(latest)
+
+    def remove_jobs(self, pks):
+        """ Tombstone the rows of deleted jobs; returns how many of them were stored """
+        rows = [self._rows().pop(pk) for pk in set(pks) if pk in self._rows()]
+        self._tombstone(rows)
+        return len(rows)
+
+    def _rows(self):
+        """ job pk -> store row of its live vector, read from the store on first use """
+        if self._row_by_id is None:
+            ids = np.asarray(self.store.ids[:self.store.count])
+            self._row_by_id = {int(pk): row for row, pk in enumerate(ids) if pk != DELETED_ID}
+        return self._row_by_id
+
+    def _tombstone(self, rows):
+        if rows:
+            self.store.delete(rows)
+            if self.ivf is not None:
+                self.ivf.delete(rows)
+
+    def train(self, nlist=None, iterations=10, seed=0):
+        """ Fit the IVF centroids to the live vectors; nlist defaults to about 4 * sqrt(n) """
+        live = np.flatnonzero(self.store.ids[:self.store.count] != DELETED_ID)
+        if not len(live):
+            return
+        nlist = min(nlist or max(1, int(4 * math.sqrt(len(live)))), len(live))
+        self.ivf = IVFIndex.train(self.store.vectors[:self.store.count], nlist, live, iterations, seed=seed)
+        self.meta['trained_count'] = len(live)
+
+    def needs_training(self, retrain_growth=4.0):
+        return self.ivf is None or len(self) > retrain_growth * self.meta['trained_count']
+
+    def save(self):
+        """ Flush vectors, then publish a new IVF generation and the meta that points at it """
+        self.store.flush()
+        generation = self.meta['generation'] + 1
+        if self.ivf is not None:
+            tmp_path = self._ivf_path(generation) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, centroids=self.ivf.centroids, assign=self.ivf.assign)
+            os.replace(tmp_path, self._ivf_path(generation))
+
+        self.meta.update(count=self.store.count, generation=generation)
+        tmp_path = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+        # Readers may still hold the previous generation open; anything older can go
+        stale = self._ivf_path(generation - 2)
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    def sync(self, batch_size=2000):
+        """ Encode jobs changed since last_seq and tombstone deleted ones; returns how many were added """
+        total = 0
+        for batch, deleted, last_seq in changed_job_batches(self.last_seq, batch_size):
+            total += self.add_jobs(batch)
+            self.remove_jobs(deleted)
+            self.meta['last_seq'] = last_seq
+        # A rescan of a pruned log reports no deletes; the store then outnumbers the table
+        if Job.objects.count() < len(self):
+            live = set(Job.objects.values_list('pk', flat=True).iterator(chunk_size=batch_size))
+            self.remove_jobs([pk for pk in list(self._rows()) if pk not in live])
+        return total
+
+    def search(self, queries, k=10, nprobe=8):
+        """ Return, per query vector, up to k (job pk, cosine similarity) pairs from the probed lists """
+        if self.ivf is None:
+            return self.search_exact(queries, k)
+        vectors = self.store.vectors
+        ids = self.store.ids
+        return [
+            [(int(ids[row]), float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in self.ivf.search(vectors, np.asarray(queries, dtype=np.float32), k, nprobe)
+        ]
+
+    def search_exact(self, queries, k=10, block_size=65536):
+        """ Brute-force top k over every live vector, scanned in blocks """
+        queries = np.asarray(queries, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, self.store.count, block_size):
+            stop = min(start + block_size, self.store.count)
+            scores = np.asarray(self.store.vectors[start:stop]) @ queries.T
+            scores[np.asarray(self.store.ids[start:stop]) == DELETED_ID] = -np.inf
+            rows = np.broadcast_to(np.arange(start, stop)[:, None], scores.shape)
+            best_rows = np.concatenate([best_rows, rows.T], axis=1)
+            best_scores = np.concatenate([best_scores, scores.T], axis=1)
+            keep = top_k_rows_2d(best_scores, k)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        results = []
+        for rows, scores in zip(best_rows, best_scores):
+            order = np.argsort(-scores, kind='stable')
+            results.append([
+                (int(self.store.ids[rows[i]]), float(scores[i])) for i in order if np.isfinite(scores[i])
+            ])
+        return results
+
+
+def vector_index_path():
+    return str(getattr(settings, 'JOB_VECTOR_INDEX_DIR', settings.BASE_DIR / 'job_vectors'))
+
+
+_vector_index = None
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index():
+    """ The saved index opened read-only, reopened when build_vector_index publishes a new generation """
+    global _vector_index
+    path = vector_index_path()
+    with _vector_index_lock:
+        try:
+            mtime = os.stat(os.path.join(path, META_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if _vector_index is None or _vector_index[0] != mtime:
+            _vector_index = (mtime, JobVectorIndex(path, get_encoder()))
+        return _vector_index[1]
+
+
+def recommend_postings_ann(student_ids, k=10, nprobe=8, index=None):
+    """
+    Like job_matching.recommend_postings, but searches the saved vector
+    index. Returns None when no index has been built yet.
+    """
+    index = get_vector_index() if index is None else index
+    if index is None:
+        return None
+    student_ids = [str(student_id) for student_id in student_ids]
+    rows = Student.objects.filter(student_id__in=student_ids).values_list('student_id', 'skills', 'interests', 'grades')
+    texts = {student_id: student_text(skills, interests, grades) for student_id, skills, interests, grades in rows}
+
+    found_ids = [student_id for student_id in student_ids if student_id in texts]
+    queries = index.encoder.encode([texts[student_id] for student_id in found_ids])
+    matches = dict(zip(found_ids, index.search(queries, k, nprobe))) if found_ids else {}
+    return postings_for_matches(student_ids, matches)
@@ -1,8 +1,13 @@
 from django.shortcuts import render
+from asgiref.sync import sync_to_async
 
 # Create your views here.
-from django.http import JsonResponse
-from .job_recommendation import recommend_jobs
+from .metrics import JsonResponse
+from .job_recommendation import arecommend_jobs_bulk, recommend_jobs_bulk
+from .recommendation_store import aget_stored_recommendations, get_stored_recommendations, top_students_for_job
+from .job_matching import recommend_postings
+from .vector_store import recommend_postings_ann
+from .strong_courses import qualifying_students
 from django.views.decorators.csrf import csrf_exempt
 import json
 from .models import Job
@@ -10,10 +15,144 @@ from .models import Job
 
 def get_recommendations(request, student_id):
     """ API to get job recommendations for a student """
-    recommendations = recommend_jobs(student_id)
+    recommendations = get_stored_recommendations(student_id)
     return JsonResponse({"student_id": student_id, "recommended_jobs": recommendations})
 
 
+def get_job_postings(request, student_id):
+    """
+    API to get the job postings whose text best matches a student's profile.
+
+    ?engine=ann searches the approximate vector index (?nprobe= trades
+    recall for speed) and falls back to exact TF-IDF until it is built.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 100)
+        nprobe = max(int(request.GET.get('nprobe', 8)), 1)
+    except ValueError:
+        return JsonResponse({"error": "limit and nprobe must be integers"}, status=400)
+
+    results = None
+    if request.GET.get('engine') == 'ann':
+        results = recommend_postings_ann([student_id], k=limit, nprobe=nprobe)
+    if results is None:
+        results = recommend_postings([student_id], k=limit)
+    postings = results[str(student_id)]
+    if postings is None:
+        return JsonResponse({"error": "Student not found"}, status=404)
+    return JsonResponse({"student_id": student_id, "jobs": postings})
+
+
+def get_qualifying_students(request):
+    """
+    API to find students with an A or B in at least min_count of the given courses,
+    e.g. ?course=Algorithms&course=Data Structures&course=Operating Systems&min_count=2
+    """
+    courses = [course.strip() for course in request.GET.getlist('course') if course.strip()]
+    if not courses:
+        return JsonResponse({"error": "At least one course is required"}, status=400)
+    try:
+        min_count = int(request.GET.get('min_count', min(2, len(courses))))
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 500)
+    except ValueError:
+        return JsonResponse({"error": "min_count and limit must be integers"}, status=400)
+    if not 1 <= min_count <= len(courses):
+        return JsonResponse({"error": "min_count must be between 1 and the number of courses"}, status=400)
+
+    total, students = qualifying_students(courses, min_count, limit)
+    return JsonResponse({"courses": courses, "min_count": min_count, "count": total, "students": students})
+
+
+def get_top_students(request, job_title):
+    """ API to list the best-matching students for a job category """
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+
+    students = [
+        {"student_id": row['student__student_id'], "name": row['student__name'], "score": row['score']}
+        for row in top_students_for_job(job_title, limit)
+    ]
+    return JsonResponse({"job_title": job_title, "students": students})
+
+
+@csrf_exempt
+def get_bulk_recommendations(request):
+    """ API to get job recommendations for a list of students in one call """
+    student_ids, error = _bulk_student_ids(request)
+    if error:
+        return error
+
+    recommendations = recommend_jobs_bulk(student_ids)
+    return JsonResponse({"recommendations": recommendations})
+
+
+def _bulk_student_ids(request):
+    """ Return (student_ids, None) from a bulk request body, or (None, error response) """
+    if request.method != 'POST':
+        return None, JsonResponse({"error": "POST required"}, status=405)
+
+    try:
+        student_ids = json.loads(request.body).get('student_ids', [])
+    except (json.JSONDecodeError, AttributeError):
+        return None, JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    if not isinstance(student_ids, list) or not student_ids:
+        return None, JsonResponse({"error": "student_ids must be a non-empty list"}, status=400)
+    return student_ids, None
+
+
+# Async versions of the recommendation and ingest APIs, served under /async/.
+# Under ASGI they run on the event loop instead of holding a worker thread
+# while they wait on the database; under WSGI Django runs them in a loop per request.
+
+async def aget_recommendations(request, student_id):
+    """ Async API to get job recommendations for a student """
+    recommendations = await aget_stored_recommendations(student_id)
+    return JsonResponse({"student_id": student_id, "recommended_jobs": recommendations})
+
+
+@csrf_exempt
+async def aget_bulk_recommendations(request):
+    """ Async API to get job recommendations for a list of students in one call """
+    student_ids, error = _bulk_student_ids(request)
+    if error:
+        return error
+
+    recommendations = await arecommend_jobs_bulk(student_ids)
+    return JsonResponse({"recommendations": recommendations})
+
+
+@csrf_exempt
+async def aingest_jobs(request):
+    """ Async bulk ingest: the same bodies and response as BulkStoreJobsView """
+    if request.method != 'POST':
+        return JsonResponse({"error": "POST required"}, status=405)
+    try:
+        batch_size = int(request.GET.get('batch_size', DEFAULT_BATCH_SIZE))
+    except ValueError:
+        batch_size = 0
+    if batch_size < 1:
+        return JsonResponse({'error': 'batch_size must be a positive integer'}, status=400)
+
+    if request.content_type in BulkStoreJobsView.NDJSON_CONTENT_TYPES:
+        jobs = iter_ndjson(request)
+    else:
+        try:
+            jobs = json.loads(request.body).get('jobs', [])
+        except (json.JSONDecodeError, AttributeError):
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    # The async ORM has no transactions, so the atomic ingest runs on the sync thread
+    result = await sync_to_async(ingest_jobs)(jobs, batch_size=batch_size)
+    stored = result['created'] + result['updated']
+    return JsonResponse({
+        'message': f'Successfully stored {stored} jobs',
+        **result
+    }, status=201 if stored or not result['errors'] else 400)
+
+
 def recommendation_page(request):
     """ Renders the page where students enter their ID """
     return render(request, 'recommend.html')
@@ -46,6 +185,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Job
 from .serializers import JobSerializer
+from .job_ingest import DEFAULT_BATCH_SIZE, ingest_jobs, iter_ndjson
 
 class StoreJobsView(APIView):
     def post(self, request):
@@ -76,4 +216,35 @@ class StoreJobsView(APIView):
         return Response({
             'message': f'Successfully stored {len(stored_jobs)} jobs',
             'jobs': stored_jobs
-        }, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        }, status=status.HTTP_201_CREATED)
+
+
+class BulkStoreJobsView(APIView):
+    """
+    Bulk ingest mode for the scraper: accepts {"jobs": [...]} or a streamed
+    NDJSON body (Content-Type: application/x-ndjson, one job per line).
+    Rows are written in batches (?batch_size=) inside one transaction and
+    invalid rows are reported per item instead of failing the whole batch.
+    """
+    NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl')
+
+    def post(self, request):
+        try:
+            batch_size = int(request.query_params.get('batch_size', DEFAULT_BATCH_SIZE))
+        except ValueError:
+            batch_size = 0
+        if batch_size < 1:
+            return Response({'error': 'batch_size must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.content_type.split(';')[0].strip() in self.NDJSON_CONTENT_TYPES:
+            # Read line by line so large uploads are never held in memory at once
+            jobs = iter_ndjson(request.stream or [])
+        else:
+            jobs = request.data.get('jobs', [])
+
+        result = ingest_jobs(jobs, batch_size=batch_size)
+        stored = result['created'] + result['updated']
+        return Response({
+            'message': f'Successfully stored {stored} jobs',
+            **result
+        }, status=status.HTTP_201_CREATED if stored or not result['errors'] else status.HTTP_400_BAD_REQUEST)
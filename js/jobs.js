@@ -1,13 +1,19 @@
-// Function to search jobs with pagination
-async function searchJobs(query = '', jobType = '', location = '', page = 1) {
+// Parameters of the current search, reused when paging with cursors
+const currentSearch = { query: '', jobType: '', location: '' };
+
+// Function to search jobs with cursor pagination
+async function searchJobs(query = '', jobType = '', location = '', cursor = '') {
     try {
+        Object.assign(currentSearch, { query, jobType, location });
         const params = new URLSearchParams({
             q: query,
             type: jobType,
             location: location,
-            page: page,
             per_page: 10
         });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
 
         const response = await fetch(`http://127.0.0.1:5000/search/jobs?${params}`, {
             method: 'GET',
@@ -22,7 +28,13 @@ async function searchJobs(query = '', jobType = '', location = '', page = 1) {
 
         displayJobs(data.jobs);
         displayPagination(data);
-        updateSearchStats(data.total_count);
+        updateSearchStats(data.total_count, data.count_is_exact);
+
+        // The server is fetching fresher external jobs for this search; ask again shortly
+        if (data.refresh_pending && !cursor) {
+            clearTimeout(searchJobs.refreshTimer);
+            searchJobs.refreshTimer = setTimeout(() => searchJobs(query, jobType, location), 5000);
+        }
 
     } catch (error) {
         console.error('Error searching jobs:', error);
@@ -30,6 +42,11 @@ async function searchJobs(query = '', jobType = '', location = '', page = 1) {
     }
 }
 
+// Function to load the page before or after the current one
+function searchJobsPage(cursor) {
+    searchJobs(currentSearch.query, currentSearch.jobType, currentSearch.location, cursor);
+}
+
 // Function to display jobs
 function displayJobs(jobs) {
     const jobsContainer = document.getElementById('jobsContainer');
@@ -81,23 +98,16 @@ function displayPagination(data) {
     const paginationContainer = document.getElementById('pagination');
     if (!paginationContainer) return;
 
-    const { page, total_pages } = data;
+    const { prev_cursor, next_cursor } = data;
     
     let paginationHTML = '';
     
-    if (page > 1) {
-        paginationHTML += `<button onclick="searchJobs(undefined, undefined, undefined, ${page - 1})">Previous</button>`;
-    }
-    
-    for (let i = Math.max(1, page - 2); i <= Math.min(total_pages, page + 2); i++) {
-        paginationHTML += `
-            <button class="${i === page ? 'active' : ''}" 
-                    onclick="searchJobs(undefined, undefined, undefined, ${i})">${i}</button>
-        `;
+    if (prev_cursor) {
+        paginationHTML += `<button onclick="searchJobsPage('${prev_cursor}')">Previous</button>`;
     }
     
-    if (page < total_pages) {
-        paginationHTML += `<button onclick="searchJobs(undefined, undefined, undefined, ${page + 1})">Next</button>`;
+    if (next_cursor) {
+        paginationHTML += `<button onclick="searchJobsPage('${next_cursor}')">Next</button>`;
     }
     
     paginationContainer.innerHTML = paginationHTML;
@@ -131,10 +141,10 @@ function formatTimeAgo(date) {
 }
 
 // Function to update search statistics
-function updateSearchStats(count) {
+function updateSearchStats(count, isExact = true) {
     const statsElement = document.getElementById('searchStats');
-    if (statsElement) {
-        statsElement.textContent = `Found ${count} job${count !== 1 ? 's' : ''}`;
+    if (statsElement && count !== null && count !== undefined) {
+        statsElement.textContent = `Found ${count}${isExact ? '' : '+'} job${count !== 1 ? 's' : ''}`;
     }
 }
 
@@ -12,26 +12,21 @@ document.addEventListener('DOMContentLoaded', function() {
             email: email,
         };
 
-        // If transcript file is provided, read it
-        if (transcriptFile) {
-            try {
-                // Convert file to base64 for sending to backend
-                const base64Content = await readFileAsBase64(transcriptFile);
-                talentData.transcript = {
-                    content: base64Content,
-                    filename: transcriptFile.name,
-                    fileType: transcriptFile.type
-                };
-            } catch (error) {
-                console.error('Error reading transcript file:', error);
-                alert('Error reading transcript file. Please make sure it\'s a valid PDF document.');
-                return;
-            }
+        if (transcriptFile && !transcriptFile.type.includes('pdf')) {
+            alert('Please upload a PDF document.');
+            return;
         }
 
         try {
             const result = await loginTalent(talentData);
             console.log('Talent Logged in successfully:', result);
+
+            // Login only authenticates; the transcript is uploaded and processed in the background
+            if (transcriptFile) {
+                const upload = await uploadTranscript(transcriptFile);
+                console.log('Transcript queued for processing:', upload.job_id);
+            }
+
             window.location.href = 'dashboard.html';
         } catch (error) {
             console.error('Error logging in talent:', error);
@@ -40,29 +35,24 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-// Function to read file as base64
-function readFileAsBase64(file) {
-    return new Promise((resolve, reject) => {
-        const reader = new FileReader();
-        
-        reader.onload = (event) => {
-            // Remove the data URL prefix (e.g., "data:application/pdf;base64,")
-            const base64Content = event.target.result.split(',')[1];
-            resolve(base64Content);
-        };
-        
-        reader.onerror = (error) => {
-            reject(error);
-        };
-
-        if (!file.type.includes('pdf')) {
-            alert('Please upload a PDF document.');
-            reject(new Error('Only PDF files are supported'));
-            return;
-        }
+// Function to upload the transcript PDF as multipart form data
+async function uploadTranscript(file) {
+    const formData = new FormData();
+    formData.append('transcript', file);
 
-        reader.readAsDataURL(file);
+    const response = await fetch('http://127.0.0.1:5000/upload/transcript', {
+        method: 'POST',
+        credentials: 'include',
+        body: formData
     });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+        throw new Error(data.error || 'Transcript upload failed');
+    }
+
+    return data;
 }
 
 async function loginTalent(talentData) {
@@ -71,6 +61,7 @@ async function loginTalent(talentData) {
     try {
         const response = await fetch(url, {
             method: 'POST',
+            credentials: 'include',
             headers: {
                 'Content-Type': 'application/json'
             },